@@ -0,0 +1,124 @@
+"""
+Fleet collector load test on localhost.
+
+Starts a collector, then client processes that each hold one connection per simulated
+endpoint and send a wire frame per endpoint every --interval seconds (stats for every
+agent plus an alert with probability --alert-rate). Frames are encoded once per endpoint
+and resent, so the clients measure the collector rather than themselves. Reports frames
+and alerts ingested per second, CPU per frame in the collector workers, and whether every
+frame sent was ingested.
+
+Usage:
+    python benchmarks/fleet.py [--endpoints 2000] [--duration 20] [--interval 1.0]
+                               [--workers N] [--clients 2] [--listen unix:///tmp/guardio-bench.sock]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+DEFAULT_LISTEN = "unix:///tmp/guardio-bench.sock" if hasattr(__import__("socket"), "AF_UNIX") else "tcp://127.0.0.1:7356"
+
+
+def _frames(name, rng, alert_rate):
+    from agents.records import Alert, Severity, Source, Stats
+    from agents.wire import encode_frame
+
+    now = time.time()
+    stats = [Stats(source, rng.uniform(0, 500), rng.uniform(1, 50), rng.uniform(0, 3), "Stable", ts=now)
+             for source in (Source.MOVEMENT, Source.TYPING, Source.APP_USAGE)]
+    alert = Alert(Source.TYPING, Severity.MEDIUM, now, message="Delay 840ms, z=4.10", count=3,
+                  last_ts=now + 2.0, z=4.1)
+    return encode_frame(name, (), stats), encode_frame(name, [alert], stats)
+
+
+async def _endpoint(address, name, duration, interval, alert_rate, seed, sent):
+    from agents.wire import parse_address
+
+    rng = random.Random(seed)
+    quiet, noisy = _frames(name, rng, alert_rate)
+    family, addr = parse_address(address)
+    if family == "unix":
+        reader, writer = await asyncio.open_unix_connection(addr)
+    else:
+        reader, writer = await asyncio.open_connection(*addr)
+    # Spread endpoints over the interval instead of sending in lockstep
+    await asyncio.sleep(rng.uniform(0, interval))
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        if rng.random() < alert_rate:
+            writer.write(noisy)
+            sent["alerts"] += 1
+        else:
+            writer.write(quiet)
+        sent["frames"] += 1
+        await writer.drain()
+        await asyncio.sleep(interval)
+    writer.close()
+    await writer.wait_closed()
+
+
+def _client(address, names, duration, interval, alert_rate, results):
+    async def run():
+        sent = {"frames": 0, "alerts": 0}
+        await asyncio.gather(*(_endpoint(address, name, duration, interval, alert_rate, i, sent)
+                               for i, name in enumerate(names)))
+        return sent
+
+    from collector import _raise_fd_limit
+    _raise_fd_limit()
+    results.put(asyncio.run(run()))
+
+
+def main(argv=None):
+    from collector import Collector
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--endpoints", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds each endpoint sends for")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between an endpoint's frames")
+    parser.add_argument("--alert-rate", type=float, default=0.1, help="share of frames carrying an alert")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="collector worker processes")
+    parser.add_argument("--clients", type=int, default=2, help="client processes")
+    parser.add_argument("--listen", default=DEFAULT_LISTEN)
+    args = parser.parse_args(argv)
+
+    collector = Collector(args.listen, args.workers, max_endpoints=args.endpoints * 2, report_interval=1.0).start()
+    time.sleep(0.5)
+
+    names = [f"ws-{i:05d}" for i in range(args.endpoints)]
+    results = multiprocessing.Queue()
+    clients = [multiprocessing.Process(target=_client, args=(args.listen, names[i::args.clients], args.duration,
+                                                             args.interval, args.alert_rate, results))
+               for i in range(args.clients)]
+    started = time.perf_counter()
+    for c in clients:
+        c.start()
+    sent = {"frames": 0, "alerts": 0}
+    for _ in clients:
+        for key, value in results.get().items():
+            sent[key] += value
+    for c in clients:
+        c.join()
+    elapsed = time.perf_counter() - started
+
+    totals = collector.stop()["totals"]
+    print(f"{args.endpoints} endpoints, {collector.workers} collector workers, {args.clients} clients, "
+          f"{elapsed:.1f}s")
+    print(f"sent      {sent['frames']:>9} frames  {sent['alerts']:>8} alerts")
+    print(f"ingested  {totals['frames']:>9} frames  {totals['alerts']:>8} alerts  "
+          f"{totals['bytes'] / max(totals['frames'], 1):.0f} bytes/frame  errors={totals['errors']}")
+    print(f"rate      {totals['frames'] / elapsed:>9.0f} frames/s  "
+          f"collector CPU {totals['cpu_s'] / max(totals['frames'], 1) * 1e6:.1f} us/frame  "
+          f"endpoints tracked={totals['endpoints']}")
+    return 0 if totals["frames"] == sent["frames"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
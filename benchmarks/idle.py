@@ -0,0 +1,85 @@
+"""
+Idle backoff check: wakeups per minute of the engine's periodic loops, active vs idle.
+
+Runs one thread per loop with the live agents' base intervals (Movement and Typing 50 ms,
+AppUsage 2 s, Fusion 5 s, UI 100 ms) sleeping through a shared ActivityMonitor, feeds
+125 Hz pointer input for --active seconds, goes quiet for --idle seconds, then sends a
+single event and measures how long the Movement loop takes to wake up.
+
+Usage:
+    python benchmarks/idle.py [--active 10] [--idle 60] [--idle-after 5]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+LOOPS = {"Movement": 0.05, "Typing": 0.05, "AppUsage": 2.0, "Fusion": 5.0}
+
+
+def main(argv=None):
+    from agents.activity import ActivityMonitor
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--active", type=float, default=10.0, help="seconds of simulated input")
+    parser.add_argument("--idle", type=float, default=60.0, help="seconds without input")
+    parser.add_argument("--idle-after", type=float, default=5.0, help="ActivityMonitor.idle_after")
+    parser.add_argument("--max-interval", type=float, default=10.0, help="ActivityMonitor.max_interval")
+    args = parser.parse_args(argv)
+
+    activity = ActivityMonitor(idle_after=args.idle_after, max_interval=args.max_interval)
+    activity.watch()
+    stop = threading.Event()
+    woke = {}
+
+    def loop(name, base):
+        while not activity.wait(stop, name, base):
+            woke[name] = time.monotonic()
+
+    def ui():
+        # Like GuardioApp.process_queues: a Tk after() timer, so input does not cut it short
+        while not stop.wait(activity.next_interval("UI", 0.1, cap=1.0)):
+            pass
+
+    threads = [threading.Thread(target=loop, args=item, daemon=True) for item in LOOPS.items()]
+    threads.append(threading.Thread(target=ui, daemon=True))
+    for t in threads:
+        t.start()
+
+    deadline = time.monotonic() + args.active
+    while time.monotonic() < deadline:
+        activity.touch()
+        time.sleep(1 / 125)
+    before = dict(activity.wakeups)
+    time.sleep(args.idle)
+    after = dict(activity.wakeups)
+
+    touched = time.monotonic()
+    activity.touch()
+    while woke.get("Movement", 0) < touched:
+        time.sleep(0.001)
+    latency = woke["Movement"] - touched
+
+    stop.set()
+    activity.wake()
+    for t in threads:
+        t.join(timeout=2)
+
+    idle_span = args.idle - args.idle_after
+    print(f"{'loop':<10} {'active/min':>11} {'idle/min':>9}")
+    for name in list(LOOPS) + ["UI"]:
+        active = before.get(name, 0) * 60 / args.active
+        # Wakeups after idle_after elapsed, i.e. once the backoff had started
+        idle = max(after.get(name, 0) - before.get(name, 0) - active * args.idle_after / 60, 0) * 60 / idle_span
+        print(f"{name:<10} {active:>11.0f} {idle:>9.1f}")
+    print(f"total      {sum(before.values()) * 60 / args.active:>11.0f}   "
+          f"idle periods={activity.idle_periods}  wake latency on input {latency * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Load test: many synthetic users fed straight into their own agent pipelines.
+
+Each worker process hosts a share of the users, builds one full set of agents per user (as
+the desktop engine does) and feeds the users' event batches round-robin, so every user's
+state is live at once. Reports pipeline events/s, CPU time per event, alerts against the
+injected anomaly episodes, and peak resident memory per worker.
+
+Usage:
+    python benchmarks/load.py [--users 20] [--duration 3600] [--workers N] [--mouse-hz 125]
+                              [--pace 0] [--config agents.json] [--json results.json]
+    python benchmarks/load.py --write DIR [--users 20] [--duration 3600]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class _Discard:
+    def put(self, item):
+        pass
+
+
+class _AlertCount:
+    def __init__(self):
+        self.alerts = 0
+        self.flagged = 0
+
+    def put(self, alert):
+        self.alerts += 1
+        self.flagged += alert.count
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def run_users(seeds, duration, mouse_hz=125.0, pace=0.0, config_path=None):
+    """Drive one set of agents per seed, interleaving users batch by batch. Returns a summary dict."""
+    from agents.pipeline import dispatch
+    from agents.registry import AgentRegistry
+    from agents.synthetic import SyntheticUser
+    from engine import GuardioEngine
+
+    baseline_mb = _peak_rss_mb()
+    registry = AgentRegistry.discover().load_config(config_path)
+    users = []
+    for seed in seeds:
+        alerts = _AlertCount()
+        engine = GuardioEngine(alerts, _Discard(), registry)
+        user = SyntheticUser(seed, mouse_hz=mouse_hz)
+        users.append((user.batches(duration), engine.build_agents(), alerts, user))
+
+    events = 0
+    busy = 0.0
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    active = list(users)
+    while active:
+        for entry in list(active):
+            batch = next(entry[0], None)
+            if batch is None:
+                active.remove(entry)
+                for agent in entry[1]:
+                    if hasattr(agent, "flush_alerts"):
+                        agent.flush_alerts()
+                continue
+            if pace > 0:
+                ahead = (batch[0][1] - entry[3].start) / pace - (time.perf_counter() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+            t = time.perf_counter()
+            dispatch(batch, entry[1])
+            busy += time.perf_counter() - t
+            events += len(batch)
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+
+    peak_mb = _peak_rss_mb()
+    return {
+        "users": len(seeds),
+        "events": events,
+        "elapsed_s": elapsed,
+        "pipeline_s": busy,
+        "events_per_s": events / busy if busy > 0 else None,
+        "end_to_end_events_per_s": events / elapsed if elapsed > 0 else None,
+        "cpu_us_per_event": cpu / events * 1e6 if events else None,
+        "alerts": sum(entry[2].alerts for entry in users),
+        "flagged_samples": sum(entry[2].flagged for entry in users),
+        "episodes": sum(len(entry[3].schedule(duration)) for entry in users),
+        "peak_rss_mb": peak_mb,
+        "rss_per_user_mb": (peak_mb - baseline_mb) / len(seeds) if peak_mb is not None and seeds else None
+    }
+
+
+def write_users(seeds, duration, out_dir, mouse_hz=125.0):
+    """Write each user's stream and labels instead of scoring it, for analyze.py."""
+    from agents.synthetic import SyntheticUser, write_session
+
+    for seed in seeds:
+        write_session(SyntheticUser(seed, mouse_hz=mouse_hz),
+                      os.path.join(out_dir, f"user_{seed:04d}.jsonl.gz"), duration)
+    return {"users": len(seeds)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=3600.0, help="simulated seconds per user")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first user")
+    parser.add_argument("--mouse-hz", type=float, default=125.0, help="pointer report rate")
+    parser.add_argument("--pace", type=float, default=0.0,
+                        help="simulated seconds per wall second (0 = as fast as possible)")
+    parser.add_argument("--config", default=None, help="agent configuration (default ~/.guardio/agents.json)")
+    parser.add_argument("--write", default=None, metavar="DIR", help="write recordings and labels instead of scoring")
+    parser.add_argument("--json", default=None, help="write results to this file")
+    args = parser.parse_args(argv)
+
+    seeds = list(range(args.seed, args.seed + args.users))
+    workers = max(1, min(args.workers, len(seeds)))
+    shares = [seeds[i::workers] for i in range(workers)]
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if args.write:
+            os.makedirs(args.write, exist_ok=True)
+            list(pool.map(write_users, shares, [args.duration] * workers, [args.write] * workers,
+                          [args.mouse_hz] * workers))
+            print(f"Wrote {len(seeds)} sessions of {args.duration:.0f}s to {args.write} "
+                  f"in {time.perf_counter() - started:.1f}s")
+            return 0
+        results = list(pool.map(run_users, shares, [args.duration] * workers, [args.mouse_hz] * workers,
+                                [args.pace] * workers, [args.config] * workers))
+    elapsed = time.perf_counter() - started
+
+    for i, r in enumerate(results):
+        rss = f"{r['peak_rss_mb']:.0f} MB" if r["peak_rss_mb"] is not None else "n/a"
+        print(f"worker {i:<3} users={r['users']:<4} events={r['events']:>10} "
+              f"{r['events_per_s'] or 0:>9.0f} events/s  {r['cpu_us_per_event'] or 0:6.1f} us/event  "
+              f"alerts={r['alerts']:<6} peak rss={rss}")
+
+    events = sum(r["events"] for r in results)
+    overall = {
+        "users": len(seeds),
+        "workers": workers,
+        "simulated_s": args.duration,
+        "events": events,
+        "elapsed_s": elapsed,
+        "events_per_s": events / elapsed if elapsed > 0 else None,
+        "alerts": sum(r["alerts"] for r in results),
+        "episodes": sum(r["episodes"] for r in results)
+    }
+    print(f"\n{len(seeds)} users x {args.duration:.0f}s simulated: {events} events in {elapsed:.1f}s "
+          f"({overall['events_per_s'] or 0:.0f} events/s overall), "
+          f"{overall['alerts']} alerts for {overall['episodes']} injected episodes")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"overall": overall, "workers": results}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
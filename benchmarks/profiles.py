@@ -0,0 +1,86 @@
+"""
+ProfileTable benchmark: vectorized scoring of many users' profiles.
+
+Scores random event blocks spread over --users profiles with ProfileTable.score_update(),
+checks a prefix against per-user AdaptiveProfile objects event by event, and times save/load.
+
+Usage:
+    python benchmarks/profiles.py [--users 500000] [--events 2000000] [--block 200000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+
+def _check(n=20000, users=200, seed=1):
+    """Number of events where the table and AdaptiveProfile disagree (should be 0)."""
+    from agents.profile import AdaptiveProfile
+    from agents.profile_table import ProfileTable
+
+    rng = np.random.default_rng(seed)
+    keys, values = rng.integers(0, users, n), rng.lognormal(5.0, 0.5, n)
+    table = ProfileTable()
+    z, flagged = table.score_update(keys, values)
+    profiles = {}
+    mismatches = 0
+    for i, (k, v) in enumerate(zip(keys.tolist(), values.tolist())):
+        p = profiles.setdefault(k, AdaptiveProfile())
+        zz, ff = p.check(v, 3.0)
+        p.update(v)
+        if ff != flagged[i] or (zz is None) != np.isnan(z[i]) or (zz is not None and abs(zz - z[i]) > 1e-9):
+            mismatches += 1
+    return mismatches
+
+
+def main(argv=None):
+    from agents.profile_table import ProfileTable
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=500000)
+    parser.add_argument("--events", type=int, default=2000000)
+    parser.add_argument("--block", type=int, default=200000, help="events per score_update() call")
+    args = parser.parse_args(argv)
+
+    print(f"equivalence with AdaptiveProfile: {_check()} mismatches")
+
+    rng = np.random.default_rng(0)
+    keys = rng.integers(0, args.users, args.events)
+    values = rng.lognormal(5.0, 0.5, args.events)
+    table = ProfileTable(capacity=args.users)
+
+    started = time.perf_counter()
+    for i in range(0, args.events, args.block):
+        table.score_update(keys[i:i + args.block], values[i:i + args.block])
+    elapsed = time.perf_counter() - started
+    print(f"score_update by key   {args.events / elapsed:>12,.0f} events/s  ({len(table)} profiles)")
+
+    rows = table.lookup(keys)
+    started = time.perf_counter()
+    for i in range(0, args.events, args.block):
+        table.score_update(None, values[i:i + args.block], rows=rows[i:i + args.block])
+    elapsed = time.perf_counter() - started
+    print(f"score_update by row   {args.events / elapsed:>12,.0f} events/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profiles.npz")
+        started = time.perf_counter()
+        table.save(path)
+        saved = time.perf_counter() - started
+        started = time.perf_counter()
+        loaded = ProfileTable.load(path)
+        load_time = time.perf_counter() - started
+        size = os.path.getsize(path)
+    same = np.array_equal(loaded.table, table.table)
+    print(f"save {saved * 1000:.0f} ms, load {load_time * 1000:.0f} ms, {size / 1e6:.1f} MB, round trip exact: {same}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
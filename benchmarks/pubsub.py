@@ -0,0 +1,122 @@
+"""
+Event stream benchmark: one EventPublisher, many local subscribers, one of them stalled.
+
+Publishes --rate alerts+stats per second for --duration seconds to --subscribers reader
+processes (half of them filtered to Typing alerts of High severity) plus one subscriber that
+never reads. Reports the producer-side cost per record, frames and records each kind of
+subscriber received, delivery latency, and what the stalled subscriber cost (its bounded
+buffer and dropped frames), which must not slow anyone else.
+
+Usage:
+    python benchmarks/pubsub.py [--subscribers 8] [--rate 5000] [--duration 5]
+                                [--listen unix:///tmp/guardio-events-bench.sock]
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+DEFAULT_LISTEN = ("unix:///tmp/guardio-events-bench.sock" if hasattr(socket, "AF_UNIX")
+                  else "tcp://127.0.0.1:7357")
+
+
+def _reader(address, filtered, results):
+    from agents.pubsub import ALERTS, EventSubscriber
+    from agents.records import Severity
+
+    kw = dict(kinds=ALERTS, sources=["Typing"], min_severity=Severity.HIGH) if filtered else {}
+    frames = records = 0
+    latency = []
+    with EventSubscriber(address, **kw) as stream:
+        results.put(("ready", None))
+        for alerts, stats in stream:
+            now = time.time()
+            frames += 1
+            records += len(alerts) + len(stats)
+            if alerts:
+                latency.append(now - alerts[-1].ts)
+    latency.sort()
+    p50 = latency[len(latency) // 2] if latency else float("nan")
+    p99 = latency[int(len(latency) * 0.99)] if latency else float("nan")
+    results.put(("done", (filtered, frames, records, p50, p99)))
+
+
+def main(argv=None):
+    from agents.pubsub import EventPublisher, encode_subscription
+    from agents.records import Alert, Severity, Source, Stats
+    from agents.wire import parse_address
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=5000.0, help="records per second (alerts and stats)")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--listen", default=DEFAULT_LISTEN)
+    args = parser.parse_args(argv)
+
+    publisher = EventPublisher(args.listen, endpoint="bench")
+    results = multiprocessing.Queue()
+    readers = [multiprocessing.Process(target=_reader, args=(args.listen, i % 2 == 1, results))
+               for i in range(args.subscribers)]
+    for r in readers:
+        r.start()
+    for _ in readers:
+        results.get()
+    family, addr = parse_address(args.listen)
+    stalled = socket.socket(socket.AF_UNIX if family == "unix" else socket.AF_INET, socket.SOCK_STREAM)
+    stalled.connect(addr)
+    stalled.sendall(encode_subscription())
+    time.sleep(0.2)
+
+    sources = (Source.MOVEMENT, Source.TYPING, Source.APP_USAGE)
+    interval = 2.0 / args.rate
+    produced = 0
+    spent = 0.0
+    started = time.perf_counter()
+    deadline = started + args.duration
+    next_at = started
+    while time.perf_counter() < deadline:
+        now = time.time()
+        source = sources[produced % 3]
+        severity = Severity.HIGH if produced % 5 == 0 else Severity.MEDIUM
+        t0 = time.perf_counter()
+        publisher.add_alert(Alert(source, severity, now, message=f"Delay {produced}ms", z=4.2))
+        publisher.add_stats(Stats(source, 150.0, 20.0, 1.1, "Stable", ts=now))
+        spent += time.perf_counter() - t0
+        produced += 2
+        next_at += interval
+        pause = next_at - time.perf_counter()
+        if pause > 0:
+            time.sleep(pause)
+    time.sleep(0.5)
+    # The stalled subscriber is the one holding the most buffered bytes
+    stalled_state = sorted(publisher.subscribers(), key=lambda s: s[1])[-1:]
+    publisher.close()
+    stalled.close()
+
+    done = [results.get()[1] for _ in readers]
+    for r in readers:
+        r.join()
+    print(f"produced {produced} records in {args.duration:.0f}s, {spent / produced * 1e6:.2f} us/record on the producer, "
+          f"{publisher.frames} frames queued, overflow={publisher.overflow}")
+    for filtered in (False, True):
+        group = [d for d in done if d[0] == filtered]
+        if not group:
+            continue
+        label = "Typing High alerts" if filtered else "everything"
+        print(f"{len(group)} x {label:<18} {sum(d[1] for d in group) / len(group):>8.0f} frames "
+              f"{sum(d[2] for d in group) / len(group):>9.0f} records  latency p50 "
+              f"{sum(d[3] for d in group) / len(group) * 1000:.1f} ms  p99 {max(d[4] for d in group) * 1000:.1f} ms")
+    if stalled_state:
+        _, queued, dropped, _ = stalled_state[0]
+        print(f"stalled subscriber: {queued / 1024:.0f} KB buffered (cap {publisher.max_buffer / 1024:.0f} KB), "
+              f"{dropped} frames dropped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
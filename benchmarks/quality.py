@@ -0,0 +1,276 @@
+"""
+Detection-quality benchmark: accuracy and cost measured together.
+
+Scores labeled sessions with fresh agents at each sensitivity setting and reports, per agent,
+episode recall, alert precision, time-to-detect and false alarms per hour, next to events/s
+and CPU time per event. Sessions are synthetic users (agents/synthetic.py) generated in the
+worker, and/or recordings under --sessions that have a <name>.labels.json beside them.
+
+An alert counts as a detection when its [ts, last_ts] span overlaps an injected episode
+(extended by --grace seconds) of the agent's own source; Fusion alerts may match any episode.
+Every other alert is a false alarm.
+
+Usage:
+    python benchmarks/quality.py [--users 8] [--duration 3600] [--sigma 2,3,4] [--cooldown 3]
+                                 [--sessions DIR] [--grace 5] [--workers N]
+                                 [--json results.json] [--compare previous.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+# Keys compared by --compare, and whether higher is better
+COMPARED = {"recall": True, "precision": True, "ttd_median_s": False, "false_alarms_per_hour": False,
+            "events_per_s": True, "cpu_us_per_event": False}
+
+
+class _Discard:
+    def put(self, item):
+        pass
+
+
+class _AlertLog:
+    def __init__(self):
+        self.alerts = []
+
+    def put(self, alert):
+        self.alerts.append((str(alert.source), alert.ts, alert.last_ts))
+
+
+def _matches(source, episode):
+    return source == "Fusion" or source == episode.source
+
+
+def score_session(session, sigma, cooldown=3.0, grace=5.0, config_path=None):
+    """Score one session (("synthetic", seed, duration) or ("recording", path)) at one sigma."""
+    from agents.pipeline import read_recording
+    from agents.registry import AgentRegistry
+    from agents.synthetic import SyntheticUser, labels_path, load_labels
+    from engine import GuardioEngine
+
+    if session[0] == "synthetic":
+        _, seed, duration = session
+        user = SyntheticUser(seed)
+        name = f"synthetic-{seed}"
+        episodes = user.schedule(duration)
+        source = user.batches(duration)
+    else:
+        path = session[1]
+        name = os.path.basename(path)
+        episodes = load_labels(labels_path(path))
+        source = read_recording(path)
+        duration = None
+
+    log = _AlertLog()
+    engine = GuardioEngine(log, _Discard(), AgentRegistry.discover().load_config(config_path))
+    engine.sigma = sigma
+    engine.cooldown = cooldown
+    agents = engine.build_agents()
+
+    # Same routing as pipeline.dispatch(), with CPU time charged per agent
+    busy = defaultdict(float)
+    handled = defaultdict(int)
+    events = 0
+    span = [None, None]
+    cpu_started = time.process_time()
+    for batch in source:
+        if not batch:
+            continue
+        events += len(batch)
+        span[0] = batch[0][1] if span[0] is None else span[0]
+        span[1] = batch[-1][1]
+        for agent in agents:
+            kinds = getattr(agent, "kinds", ())
+            part = [e for e in batch if e[0] in kinds]
+            if part:
+                t = time.process_time()
+                agent.process(part)
+                busy[agent.name] += time.process_time() - t
+                handled[agent.name] += len(part)
+        for agent in agents:
+            if hasattr(agent, "tick"):
+                t = time.process_time()
+                agent.tick(batch[-1][1])
+                busy[agent.name] += time.process_time() - t
+    for agent in agents:
+        if hasattr(agent, "flush_alerts"):
+            agent.flush_alerts()
+    cpu = time.process_time() - cpu_started
+    if duration is None:
+        duration = (span[1] - span[0]) if span[0] is not None else 0.0
+
+    per_agent = {}
+    for agent in agents:
+        src = agent.name
+        mine = [a for a in log.alerts if a[0] == src]
+        relevant = [ep for ep in episodes if _matches(src, ep)]
+        true_alerts = sum(1 for _, ts, last in mine
+                          if any(ts <= ep.end + grace and last >= ep.start for ep in relevant))
+        ttd = []
+        for ep in relevant:
+            hits = [ts for _, ts, last in mine if ts <= ep.end + grace and last >= ep.start]
+            if hits:
+                ttd.append(max(0.0, min(hits) - ep.start))
+        per_agent[src] = {
+            "alerts": len(mine),
+            "true_alerts": true_alerts,
+            # Fusion has no episodes of its own; its recall is over all of them
+            "episodes": len(relevant),
+            "detected": len(ttd),
+            "ttd_s": ttd,
+            "events": handled.get(src, 0),
+            "busy_s": busy.get(src, 0.0)
+        }
+    return {"session": name, "sigma": sigma, "duration_s": duration, "events": events,
+            "cpu_s": cpu, "agents": per_agent}
+
+
+def summarize(results):
+    """Fold per-session results into {sigma: {agent or "all": metrics}}."""
+    grouped = defaultdict(list)
+    for r in results:
+        grouped[r["sigma"]].append(r)
+
+    summary = {}
+    for sigma, runs in sorted(grouped.items()):
+        hours = sum(r["duration_s"] for r in runs) / 3600.0
+        events = sum(r["events"] for r in runs)
+        cpu = sum(r["cpu_s"] for r in runs)
+        totals = defaultdict(lambda: defaultdict(float))
+        ttds = defaultdict(list)
+        for r in runs:
+            for src, a in r["agents"].items():
+                for key in ("alerts", "true_alerts", "episodes", "detected", "events", "busy_s"):
+                    totals[src][key] += a[key]
+                ttds[src].extend(a["ttd_s"])
+
+        rows = {}
+        for src, t in totals.items():
+            rows[src] = _metrics(t, ttds[src], hours)
+            # Fusion handles no events itself; its per-feature work is inside the other agents' time
+            rows[src]["events_per_s"] = t["events"] / t["busy_s"] if t["busy_s"] > 0 and t["events"] else None
+            rows[src]["cpu_us_per_event"] = t["busy_s"] / t["events"] * 1e6 if t["events"] else None
+        overall = defaultdict(float)
+        for src, t in totals.items():
+            if src != "Fusion":
+                for key in ("alerts", "true_alerts", "episodes", "detected"):
+                    overall[key] += t[key]
+        rows["all"] = _metrics(overall, [x for src, v in ttds.items() if src != "Fusion" for x in v], hours)
+        rows["all"]["events_per_s"] = events / cpu if cpu > 0 else None
+        rows["all"]["cpu_us_per_event"] = cpu / events * 1e6 if events else None
+        summary[sigma] = {"sessions": len(runs), "hours": hours, "events": events, "agents": rows}
+    return summary
+
+
+def _metrics(t, ttd, hours):
+    false_alarms = t["alerts"] - t["true_alerts"]
+    return {
+        "episodes": int(t["episodes"]),
+        "detected": int(t["detected"]),
+        "recall": t["detected"] / t["episodes"] if t["episodes"] else None,
+        "alerts": int(t["alerts"]),
+        "precision": t["true_alerts"] / t["alerts"] if t["alerts"] else None,
+        "ttd_median_s": statistics.median(ttd) if ttd else None,
+        "false_alarms_per_hour": false_alarms / hours if hours > 0 else None
+    }
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else "-".rjust(len(format(0.0, spec)))
+
+
+def print_summary(summary, previous=None):
+    print(f"{'sigma':>5}  {'agent':<9} {'episodes':>8} {'recall':>7} {'precision':>9} {'ttd(s)':>7} "
+          f"{'FA/hour':>8} {'events/s':>10} {'us/event':>8}")
+    for sigma, block in summary.items():
+        for src, m in sorted(block["agents"].items(), key=lambda kv: (kv[0] == "all", kv[0])):
+            print(f"{sigma:>5.1f}  {src:<9} {m['episodes']:>8} {_fmt(m['recall'], '7.2f')} "
+                  f"{_fmt(m['precision'], '9.2f')} {_fmt(m['ttd_median_s'], '7.1f')} "
+                  f"{_fmt(m['false_alarms_per_hour'], '8.1f')} {_fmt(m['events_per_s'], '10.0f')} "
+                  f"{_fmt(m['cpu_us_per_event'], '8.1f')}")
+            old = (previous or {}).get(str(sigma), {}).get("agents", {}).get(src)
+            if old:
+                changes = []
+                for key, higher_better in COMPARED.items():
+                    new_v, old_v = m.get(key), old.get(key)
+                    if new_v is None or old_v is None or new_v == old_v:
+                        continue
+                    better = (new_v > old_v) == higher_better
+                    changes.append(f"{key} {old_v:.3g}->{new_v:.3g}{'' if better else ' (worse)'}")
+                if changes:
+                    print(f"{'':>16}vs previous: " + ", ".join(changes))
+
+
+def find_labeled(root):
+    from agents.synthetic import labels_path
+
+    sessions = []
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            if name.endswith((".jsonl", ".jsonl.gz")) and os.path.exists(labels_path(path)):
+                sessions.append(("recording", path))
+    return sorted(sessions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=8, help="synthetic users (0 for recordings only)")
+    parser.add_argument("--duration", type=float, default=3600.0, help="simulated seconds per synthetic user")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first synthetic user")
+    parser.add_argument("--sessions", default=None, help="directory of recordings with .labels.json files")
+    parser.add_argument("--sigma", default="2,3,4", help="comma-separated sensitivity settings")
+    parser.add_argument("--cooldown", type=float, default=3.0)
+    parser.add_argument("--grace", type=float, default=5.0, help="seconds after an episode that still count")
+    parser.add_argument("--config", default=None, help="agent configuration (default ~/.guardio/agents.json)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--json", default=None, help="write results to this file")
+    parser.add_argument("--compare", default=None, help="earlier --json output to print changes against")
+    args = parser.parse_args(argv)
+
+    sigmas = [float(s) for s in args.sigma.split(",") if s.strip()]
+    sessions = [("synthetic", args.seed + i, args.duration) for i in range(args.users)]
+    if args.sessions:
+        sessions += find_labeled(args.sessions)
+    if not sessions:
+        print("No sessions to score", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(score_session, session, sigma, args.cooldown, args.grace, args.config): session
+                   for sigma in sigmas for session in sessions}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"[ERROR] {futures[future]}: {e}", file=sys.stderr)
+
+    summary = summarize(results)
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            previous = json.load(fh)["summary"]
+    print_summary(summary, previous)
+    print(f"\n{len(sessions)} sessions x {len(sigmas)} settings in {time.perf_counter() - started:.1f}s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"settings": {"sigma": sigmas, "cooldown": args.cooldown, "grace": args.grace,
+                                    "users": args.users, "duration": args.duration, "sessions": args.sessions},
+                       "summary": {str(k): v for k, v in summary.items()},
+                       "sessions": sorted(results, key=lambda r: (r["sigma"], r["session"]))}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
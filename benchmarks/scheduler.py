@@ -0,0 +1,94 @@
+"""
+Scheduler benchmark: periodic agent work on one timer-wheel thread against a thread per loop.
+
+Simulates --agents input agents, each with a 50 ms poll and a 0.5 s stats task, plus the
+engine's 30 s memory check, for --duration seconds both ways. The thread-per-loop baseline
+sleeps each loop on its own stop_event.wait() like the old agent loops. Reports threads,
+wakeups per second, CPU time, and the worst lateness of a task run against its due time.
+
+Usage:
+    python benchmarks/scheduler.py [--agents 2,8,32] [--duration 5] [--work 0.0002]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+
+def _loops(agents):
+    loops = [("Memory", 30.0)]
+    for i in range(agents):
+        loops += [(f"agent{i}", 0.05), (f"agent{i} stats", 0.5)]
+    return loops
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _threads(loops, duration, work):
+    stop = threading.Event()
+    late = []
+    wakeups = [0]
+
+    def loop(interval):
+        due = time.monotonic() + interval
+        while not stop.wait(max(0.0, due - time.monotonic())):
+            wakeups[0] += 1
+            late.append(time.monotonic() - due)
+            _busy(work)
+            due += interval
+
+    threads = [threading.Thread(target=loop, args=(interval,), daemon=True) for _, interval in loops]
+    cpu = time.process_time()
+    for t in threads:
+        t.start()
+    peak = threading.active_count()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return peak, wakeups[0], time.process_time() - cpu, late
+
+
+def _scheduled(loops, duration, work):
+    from agents.scheduler import Scheduler
+
+    scheduler = Scheduler()
+    for name, interval in loops:
+        scheduler.every(name, interval, lambda: _busy(work))
+    cpu = time.process_time()
+    scheduler.start()
+    peak = threading.active_count()
+    time.sleep(duration)
+    stats = scheduler.stats()
+    scheduler.stop()
+    late = [s["late_ms"] / 1000.0 for s in stats.values()]
+    return peak, scheduler.wakeups, time.process_time() - cpu, late
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--agents", default="2,8,32", help="comma-separated agent counts")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--work", type=float, default=0.0002, help="seconds of CPU per task run")
+    args = parser.parse_args(argv)
+
+    print(f"{'agents':>6} {'mode':<10} {'threads':>7} {'wakeups/s':>10} {'cpu %':>6} {'late max':>9}")
+    for agents in (int(n) for n in args.agents.split(",")):
+        loops = _loops(agents)
+        for mode, run in (("threads", _threads), ("scheduler", _scheduled)):
+            peak, wakeups, cpu, late = run(loops, args.duration, args.work)
+            print(f"{agents:>6} {mode:<10} {peak:>7} {wakeups / args.duration:>10.0f} "
+                  f"{cpu / args.duration * 100:>6.1f} {max(late, default=0.0) * 1000:>7.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
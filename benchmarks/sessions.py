@@ -0,0 +1,121 @@
+"""
+Session store benchmark: columnar .session directory against a JSON-lines recording.
+
+Generates --hours of synthetic input (agents/synthetic.py), repeated to reach --events if
+that is larger, and writes it both ways. Reports write rate and size on disk, the latency of
+seeking to random time ranges in the session, feature-scan throughput over the mmapped
+columns (mouse speed over the whole session, in GB/s of column data) and full replay rate
+through read_recording() for both formats.
+
+Usage:
+    python benchmarks/sessions.py [--hours 1] [--events 20000000] [--dir /tmp/guardio-sessions-bench]
+                                  [--seeks 1000]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+
+def _disk_size(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.stat(os.path.join(path, n)).st_blocks * 512 for n in os.listdir(path))
+
+
+def main(argv=None):
+    import numpy as np
+
+    from agents.pipeline import read_recording
+    from agents.session_store import SessionReader, SessionWriter
+    from agents.synthetic import SyntheticUser
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--events", type=int, default=20_000_000, help="minimum events in the session")
+    parser.add_argument("--dir", default="/tmp/guardio-sessions-bench")
+    parser.add_argument("--seeks", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    shutil.rmtree(args.dir, ignore_errors=True)
+    os.makedirs(args.dir)
+    duration = args.hours * 3600
+    batches = list(SyntheticUser(7).batches(duration))
+    per_pass = sum(len(b) for b in batches)
+    passes = max(1, -(-args.events // per_pass))
+
+    def stream():
+        # Later passes are shifted in time so the session stays one continuous timeline
+        for p in range(passes):
+            shift = p * duration
+            for batch in batches:
+                yield [(e[0], e[1] + shift) + tuple(e[2:]) for e in batch] if shift else batch
+
+    session = os.path.join(args.dir, "bench.session")
+    writer = SessionWriter(session)
+    count = 0
+    session_s = 0.0
+    for batch in stream():
+        started = time.perf_counter()
+        writer.append(batch)
+        session_s += time.perf_counter() - started
+        count += len(batch)
+    started = time.perf_counter()
+    writer.close()
+    session_s += time.perf_counter() - started
+
+    jsonl = os.path.join(args.dir, "bench.jsonl")
+    jsonl_s = 0.0
+    with open(jsonl, "w", encoding="utf-8") as fh:
+        for batch in stream():
+            started = time.perf_counter()
+            fh.write("".join(json.dumps(list(e), separators=(",", ":")) + "\n" for e in batch))
+            jsonl_s += time.perf_counter() - started
+
+    print(f"{count} events ({passes} x {args.hours:g} h synthetic)")
+    print(f"write   session {count / session_s / 1e6:6.2f} M events/s  {_disk_size(session) / 1e6:8.1f} MB")
+    print(f"write   jsonl   {count / jsonl_s / 1e6:6.2f} M events/s  {_disk_size(jsonl) / 1e6:8.1f} MB")
+
+    with SessionReader(session) as reader:
+        t0, t1 = reader.time_range()
+        rng = random.Random(1)
+        latency = []
+        for _ in range(args.seeks):
+            start = rng.uniform(t0, t1)
+            s = time.perf_counter()
+            reader.range("move", start, start + 10.0)
+            latency.append(time.perf_counter() - s)
+        latency.sort()
+        print(f"seek    10 s range  p50 {latency[len(latency) // 2] * 1e6:.0f} us  "
+              f"p99 {latency[int(len(latency) * 0.99)] * 1e6:.0f} us")
+
+        for attempt in ("cold", "warm"):
+            started = time.perf_counter()
+            scanned = 0
+            total = 0.0
+            for chunk in reader.chunks("move"):
+                t, x, y = chunk["t"], chunk["x"], chunk["y"]
+                dt = np.diff(t)
+                dist = np.hypot(np.diff(x), np.diff(y))
+                total += float(np.sum(dist[dt > 0] / dt[dt > 0]))
+                scanned += t.nbytes + x.nbytes + y.nbytes
+            elapsed = time.perf_counter() - started
+            print(f"scan    mouse speed ({attempt}) {scanned / elapsed / 1e9:6.2f} GB/s over {scanned / 1e6:.0f} MB")
+
+    for label, path in (("session", session), ("jsonl", jsonl)):
+        started = time.perf_counter()
+        replayed = sum(len(b) for b in read_recording(path, batch_size=4096))
+        elapsed = time.perf_counter() - started
+        print(f"replay  {label:<7} {replayed / elapsed / 1e6:6.2f} M events/s")
+    shutil.rmtree(args.dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Startup benchmark: module import cost and time-to-first-frame.
+
+Every measurement runs in a fresh interpreter so nothing is served from a warm
+sys.modules. Time-to-first-frame needs a display; it is skipped when none is available.
+
+Usage:
+    python benchmarks/startup.py [--repeat 5] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+MODULES = [
+    "dashboard",
+    "main",
+    "agents",
+    "agents.pipeline",
+    "agents.movement_agent",
+    "agents.fusion_agent",
+]
+
+IMPORT_PROBE = """
+import sys, time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+# Prints seconds from interpreter start to the first mapped frame, and to the fully built dashboard
+FRAME_PROBE = """
+import sys, time
+start = time.perf_counter()
+from main import GuardioApp
+app = GuardioApp()
+root = app.root
+marks = {}
+
+def mapped(event):
+    if event.widget is root and "first_frame" not in marks:
+        marks["first_frame"] = time.perf_counter() - start
+
+def poll():
+    if root._ready and "first_frame" in marks:
+        marks["full_ui"] = time.perf_counter() - start
+        print(marks["first_frame"], marks["full_ui"])
+        root.destroy()
+    else:
+        root.after(1, poll)
+
+root.bind("<Map>", mapped, add="+")
+root.after(1, poll)
+root.after(10000, root.destroy)
+root.mainloop()
+"""
+
+
+def _probe(code):
+    env = dict(os.environ, PYTHONPATH=SRC + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    out = subprocess.run([sys.executable, "-c", code], cwd=SRC, env=env,
+                         capture_output=True, text=True, timeout=60)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "probe failed")
+    return [float(v) for v in out.stdout.split()]
+
+
+def _summary(samples):
+    return {"median_ms": statistics.median(samples) * 1000, "min_ms": min(samples) * 1000}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", default=None, help="write results to this file")
+    args = parser.parse_args(argv)
+
+    results = {"imports": {}, "frame": None}
+    for module in MODULES:
+        try:
+            samples = [_probe(IMPORT_PROBE.format(module=module))[0] for _ in range(args.repeat)]
+            results["imports"][module] = _summary(samples)
+            print(f"import {module:<28} {results['imports'][module]['median_ms']:8.1f} ms")
+        except Exception as e:
+            results["imports"][module] = {"error": str(e)}
+            print(f"import {module:<28}  skipped ({e})")
+
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        try:
+            samples = [_probe(FRAME_PROBE) for _ in range(args.repeat)]
+            results["frame"] = {
+                "first_frame": _summary([s[0] for s in samples]),
+                "full_ui": _summary([s[1] for s in samples])
+            }
+            print(f"time to first frame            {results['frame']['first_frame']['median_ms']:8.1f} ms")
+            print(f"time to fully built dashboard  {results['frame']['full_ui']['median_ms']:8.1f} ms")
+        except Exception as e:
+            print(f"time to first frame             skipped ({e})")
+    else:
+        print("time to first frame             skipped (no display)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    code = main()
+    print(f"(benchmark took {time.perf_counter() - t0:.1f}s)")
+    sys.exit(code)
@@ -1,10 +1,41 @@
-
 """
 Guardio Agents Package
+
+Submodules are imported on first attribute access so that importing the package
+(or one agent module) does not pull in numpy and every other agent up front.
 """
 
-from .app_usage_agent import AppUsageAgent
-from .movement_agent import MovementAgent
-from .typing_agent import TypingAgent
+import importlib
+
+_EXPORTS = {
+    'MovementAgent': '.movement_agent',
+    'TypingAgent': '.typing_agent',
+    'AppUsageAgent': '.app_usage_agent',
+    'FusionAgent': '.fusion_agent',
+    'AdaptiveProfile': '.profile',
+    'P2Quantile': '.sketch',
+    'ProfileTable': '.profile_table',
+    'Pipeline': '.pipeline',
+    'Recorder': '.pipeline',
+    'compose': '.pipeline',
+    'read_recording': '.pipeline',
+    'SessionReader': '.session_store',
+    'SessionWriter': '.session_store',
+    'replay': '.pipeline',
+    'run': '.pipeline',
+    'Alert': '.records',
+    'Stats': '.records',
+    'Source': '.records',
+    'Severity': '.records',
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = ['MovementAgent', 'TypingAgent', 'AppUsageAgent']
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
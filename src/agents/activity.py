@@ -0,0 +1,144 @@
+"""
+Engine-wide activity state for idle-aware polling.
+
+Input listeners call touch() on every event. Once no input has arrived for idle_after
+seconds the monitor is idle and every periodic loop that sleeps through it (agent polling,
+Fusion buckets, UI ticks) doubles its own interval on each wakeup, up to max_interval. The
+first input after that wakes all sleeping loops at once and they return to their base rate.
+Loops that do not sleep here (the engine's Scheduler) register a listener for that moment.
+Wakeups are counted per loop, so the power saving can be read off wakeup_rates().
+"""
+import threading
+import time
+from collections import deque
+
+
+class ActivityMonitor:
+    def __init__(self, idle_after=60.0, max_interval=10.0, window=60.0):
+        self.idle_after = idle_after
+        self.max_interval = max_interval
+        self.window = window
+        # Idle detection only engages once an input source is watching; without one
+        # (e.g. only AppUsage enabled) the loops always run at their base rate
+        self.sources = 0
+        self.last_input = time.monotonic()
+        self.started = self.last_input
+        self._idle = False
+        self._wake = threading.Event()
+        self._delays = {}
+        self._ticks = {}
+        # Total wakeups per loop name, and the number of times the user went idle
+        self.wakeups = {}
+        self.idle_periods = 0
+        self._listeners = []
+
+    def add_listener(self, fn):
+        """Call fn() whenever the loops are woken back to their base rate; it must not block."""
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _notify(self):
+        self._wake.set()
+        for fn in self._listeners:
+            fn()
+
+    def watch(self):
+        """Register an input source whose events will be passed to touch()."""
+        self.sources += 1
+
+    def unwatch(self):
+        """Unregister a source whose listener stopped; with none left the loops return to their base rate."""
+        self.sources = max(0, self.sources - 1)
+        if not self.sources:
+            self.wake()
+
+    def touch(self):
+        """Record user input; called from listener callbacks, so it stays cheap."""
+        self.last_input = time.monotonic()
+        if self._idle:
+            self._idle = False
+            self._notify()
+
+    def wake(self):
+        """Return every loop to its base rate now (resume, stop, or input seen elsewhere)."""
+        self.last_input = time.monotonic()
+        self._idle = False
+        self._notify()
+
+    @property
+    def idle(self):
+        return self._idle
+
+    @property
+    def state(self):
+        return "Idle" if self._idle else "Active"
+
+    def idle_for(self):
+        """Seconds since the last input."""
+        return time.monotonic() - self.last_input
+
+    def _check(self, now):
+        if self._idle or not self.sources or now - self.last_input < self.idle_after:
+            return
+        # Clear before publishing idle so a touch() racing with this either lands before
+        # the re-check below or finds _idle set and wakes the sleepers
+        self._wake.clear()
+        self._idle = True
+        if time.monotonic() - self.last_input < self.idle_after:
+            self._idle = False
+        else:
+            self.idle_periods += 1
+
+    def next_interval(self, name, base, cap=None):
+        """
+        Count a wakeup of loop `name` and return how long it should sleep: base while
+        active, doubling per wakeup while idle up to max(base, cap or max_interval).
+        """
+        now = time.monotonic()
+        self.wakeups[name] = self.wakeups.get(name, 0) + 1
+        ticks = self._ticks.get(name)
+        if ticks is None:
+            ticks = self._ticks[name] = deque()
+        ticks.append(now)
+        while ticks[0] < now - self.window:
+            ticks.popleft()
+        self._check(now)
+        if not self._idle:
+            delay = base
+        else:
+            limit = max(base, cap if cap is not None else self.max_interval)
+            delay = min(limit, 2 * self._delays.get(name, base))
+        self._delays[name] = delay
+        return delay
+
+    def wait(self, stop_event, name, base):
+        """
+        Sleep one interval of loop `name`; returns True when stop_event is set. While idle
+        the sleep ends early on the first input (or wake()), not on stop_event alone, so
+        whoever sets stop_event must call wake() too.
+        """
+        delay = self.next_interval(name, base)
+        if self._idle:
+            self._wake.wait(delay)
+            return stop_event.is_set()
+        return stop_event.wait(delay)
+
+    def wakeup_rates(self):
+        """Wakeups per minute of every loop over the last `window` seconds."""
+        now = time.monotonic()
+        span = min(self.window, max(now - self.started, 1e-3))
+        rates = {}
+        for name, ticks in list(self._ticks.items()):
+            recent = sum(1 for t in list(ticks) if t >= now - self.window)
+            rates[name] = recent * 60.0 / span
+        return rates
+
+
+def idle_wait(activity, stop_event, name, base):
+    """ActivityMonitor.wait(), or a plain stop_event.wait() for agents run without one."""
+    if activity is None:
+        return stop_event.wait(base)
+    return activity.wait(stop_event, name, base)
@@ -0,0 +1,139 @@
+"""
+Ships one Guardio instance's alerts and stats to a fleet collector (src/collector.py).
+
+Producers (agent threads via HistoryTap) only append to bounded in-memory buffers. A
+background thread wakes every flush_interval, packs everything pending into one wire frame
+and sends it, reconnecting with exponential backoff when the collector is down. Stats are
+reduced to the latest record per agent per flush; when the collector stays unreachable the
+oldest alerts are dropped beyond max_pending, so monitoring never blocks on the network
+or grows without bound.
+"""
+import socket
+import threading
+import time
+from collections import deque
+
+from .memory import RECORD_BYTES
+from .wire import MAX_RECORDS, encode_frames, parse_address
+
+
+class FleetShipper:
+    """Queue-side interface matches HistoryStore: add_alert(), add_stats(), close()."""
+    def __init__(self, address, endpoint=None, flush_interval=1.0, max_pending=10000, timeout=5.0):
+        self.address = address
+        self.endpoint = endpoint or socket.gethostname()
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.sent_frames = 0
+        self.sent_bytes = 0
+        self.dropped = 0
+
+        self._lock = threading.Lock()
+        self._alerts = deque(maxlen=max_pending)
+        self._stats = {}
+        self._sock = None
+        self._retry_at = 0.0
+        self._backoff = 1.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    # Producers
+
+    def add_alert(self, alert):
+        with self._lock:
+            if len(self._alerts) == self._alerts.maxlen:
+                self.dropped += 1
+            self._alerts.append(alert)
+
+    def add_stats(self, stats):
+        with self._lock:
+            self._stats[str(stats.source)] = stats
+
+    def memory_usage(self):
+        return (len(self._alerts) + len(self._stats)) * RECORD_BYTES
+
+    def compact(self):
+        """Drop the oldest half of the alerts still waiting for the collector (counted in dropped)."""
+        with self._lock:
+            drop = len(self._alerts) // 2
+            for _ in range(drop):
+                self._alerts.popleft()
+            self.dropped += drop
+        return drop
+
+    # Sender
+
+    def _connect(self):
+        family, addr = parse_address(self.address)
+        if family == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET6 if ":" in addr[0] else socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(addr)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def flush(self):
+        """Send everything pending now. Returns False if the collector could not be reached."""
+        with self._lock:
+            alerts = [self._alerts.popleft() for _ in range(min(len(self._alerts), MAX_RECORDS))]
+            stats, self._stats = list(self._stats.values()), {}
+        if not alerts and not stats:
+            return True
+        # Split by encoded size so long messages never push a frame past MAX_FRAME
+        frames, failed = encode_frames(self.endpoint, alerts, stats)
+        self.dropped += failed
+        try:
+            if self._sock is None:
+                if time.monotonic() < self._retry_at:
+                    raise OSError("collector unreachable, waiting to retry")
+                self._sock = self._connect()
+                self._backoff = 1.0
+            while frames:
+                frame = frames[0][0]
+                self._sock.sendall(frame)
+                frames.pop(0)
+                self.sent_frames += 1
+                self.sent_bytes += len(frame)
+            return True
+        except OSError:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+            if time.monotonic() >= self._retry_at:
+                self._retry_at = time.monotonic() + self._backoff
+                self._backoff = min(self._backoff * 2.0, 60.0)
+            # Keep the newest unsent alerts for the next attempt, still within max_pending; stats are superseded
+            alerts = [a for _, framed, _ in frames for a in framed]
+            with self._lock:
+                room = self._alerts.maxlen - len(self._alerts)
+                keep = alerts[max(0, len(alerts) - room):]
+                self.dropped += len(alerts) - len(keep)
+                self._alerts.extendleft(reversed(keep))
+            return False
+
+    def _flush(self):
+        try:
+            self.flush()
+        except Exception as e:
+            # The sender must outlive any one bad batch
+            print(f"Fleet shipping error: {e}")
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush()
+        self._flush()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def close(self):
+        """Send what is pending and stop the sender thread."""
+        self._stop.set()
+        self._thread.join(timeout=self.timeout + 1.0)
@@ -0,0 +1,233 @@
+import math
+import threading
+
+import numpy as np
+
+from .pipeline import AgentControl, AggregationPolicy, Pipeline, PipelineAgent, QueueSink, Sample
+from .profile import AdaptiveProfile
+from .records import Severity, Source, Stats
+from .series import SignalSeries
+
+
+def _shift_message(s):
+    # The window's strongest bucket: its sources travel in note
+    lead = s.window.lead if s.window is not None else s
+    return f"Correlated shift in {lead.note} (d={lead.value:.2f}, z={s.z or 0.0:.2f})"
+
+
+class FusionAgent(PipelineAgent):
+    """
+    Cross-agent correlation detector.
+    Features reported by the other agents (through their feature_sink) are averaged into
+    fixed time buckets, giving one vector per bucket. Each vector is scored by its Mahalanobis
+    distance to an exponentially weighted mean/covariance of past buckets, so several small,
+    simultaneous shifts can raise an alert even when no single agent crosses its own threshold.
+
+    The precision (inverse covariance) matrix is maintained incrementally with a Woodbury
+    update (Sherman-Morrison when every source reported), so each bucket costs O(k^2) for
+    k sources, independent of session length. Sources missing from a bucket are scored on the
+    observed marginal and imputed with their conditional expectation for the update.
+
+    Flagged buckets go through an AggregationPolicy like the other agents' samples, so a
+    sustained shift is one alert with a count and last_ts per cooldown window.
+    """
+    name = "Fusion"
+    kinds = ()
+    SOURCES = ("Movement", "Typing", "AppUsage")
+
+    def __init__(self, anomaly_queue, stats_queue, sigma=3.0, cooldown=3.0,
+                 bucket_seconds=5.0, alpha=0.02, sources=SOURCES):
+        self.anomaly_queue = anomaly_queue
+        self.stats_queue = stats_queue
+        self.sigma = sigma
+        self.bucket_seconds = bucket_seconds
+        self.alpha = alpha
+        self.sources = tuple(sources)
+        self.min_buckets = 20
+        self.refresh_every = 256
+
+        self._index = {name: i for i, name in enumerate(self.sources)}
+        self._lock = threading.Lock()
+        self._sums = np.zeros(len(self.sources))
+        self._counts = np.zeros(len(self.sources))
+
+        self.distance_profile = AdaptiveProfile(alpha=alpha)
+        self.series = SignalSeries(self.distance_profile)
+        self.policy = AggregationPolicy(window=cooldown)
+        # Stats are published per bucket by _publish_stats, not by the sink
+        self.sink = QueueSink("Fusion", anomaly_queue, stats_queue, self.distance_profile, None,
+                              {"distance": _shift_message})
+        self.pipeline = Pipeline(self.policy, self.sink)
+        self.reset()
+
+        self._bucket_start = None
+        self.control = AgentControl()
+        # Engine-wide ActivityMonitor (set by the engine); bucket ticks back off while the user is idle
+        self.activity = None
+
+    def reset(self):
+        k = len(self.sources)
+        self.mean = np.zeros(k)
+        self.cov = np.eye(k)
+        self.precision = np.eye(k)
+        self._seen = np.zeros(k, dtype=bool)
+        self.count = 0
+        self.distance_profile.reset()
+        self.series.reset()
+        self.policy.reset()
+        with self._lock:
+            self._sums[:] = 0.0
+            self._counts[:] = 0.0
+
+    def observe(self, source, value, ts=None):
+        """Feature sink for the other agents; safe to call from any thread."""
+        i = self._index.get(source)
+        if i is None or value is None or value < 0:
+            return
+        with self._lock:
+            self._sums[i] += math.log1p(value)
+            self._counts[i] += 1
+
+    def _take_bucket(self):
+        with self._lock:
+            observed = self._counts > 0
+            x = np.divide(self._sums, self._counts, out=np.zeros_like(self._sums), where=observed)
+            self._sums[:] = 0.0
+            self._counts[:] = 0.0
+        return x, observed
+
+    def _score(self, d, obs, mis):
+        """Squared Mahalanobis distance of the observed marginal, via the Schur complement of P."""
+        P = self.precision
+        if not mis.any():
+            return float(d @ P @ d)
+        P_oo = P[np.ix_(obs, obs)]
+        P_om = P[np.ix_(obs, mis)]
+        P_mm = P[np.ix_(mis, mis)]
+        marginal = P_oo - P_om @ np.linalg.solve(P_mm, P_om.T)
+        d_o = d[obs]
+        return float(d_o @ marginal @ d_o)
+
+    def _update(self, d, obs, mis):
+        """EW mean/covariance update with Woodbury-maintained precision."""
+        a = self.alpha
+        k = len(self.sources)
+        P = self.precision
+        if mis.any():
+            # E-step: conditional mean and covariance of the missing block given the observed one
+            P_mm = P[np.ix_(mis, mis)]
+            cond_cov = np.linalg.inv(P_mm)
+            d = d.copy()
+            d[mis] = -cond_cov @ P[np.ix_(mis, obs)] @ d[obs]
+            L = np.linalg.cholesky(cond_cov)
+            U = np.zeros((k, 1 + L.shape[1]))
+            U[:, 0] = d
+            U[mis, 1:] = L
+        else:
+            U = d.reshape(k, 1)
+
+        self.mean += a * d
+        self.cov = (1.0 - a) * (self.cov + a * (U @ U.T))
+        PU = P @ U
+        inner = np.eye(U.shape[1]) / a + U.T @ PU
+        self.precision = (P - PU @ np.linalg.solve(inner, PU.T)) / (1.0 - a)
+        self.count += 1
+
+        if self.count % self.refresh_every == 0:
+            # Bound floating-point drift of the incremental inverse
+            self.cov = 0.5 * (self.cov + self.cov.T) + 1e-9 * np.eye(k)
+            self.precision = np.linalg.inv(self.cov)
+
+    @property
+    def interval(self):
+        return self.bucket_seconds
+
+    def _publish_stats(self, z=None, note=None, now=None):
+        p = self.distance_profile
+        self.stats_queue.put(Stats(
+            Source.FUSION,
+            p.mean,
+            p.std() if p.mean is not None else None,
+            z,
+            note or ("Adapting" if self.count < self.min_buckets else "Stable"),
+            ts=now
+        ))
+
+    def flush(self, now=None):
+        """Close the current bucket: score it, then fold it into the profile."""
+        now = self._now() if now is None else now
+        x, obs = self._take_bucket()
+        if not obs.any():
+            self._publish_stats(note="NoSignal", now=now)
+            return
+
+        # A source's mean starts at its first report; until then it is simply treated as missing
+        fresh = obs & ~self._seen
+        self.mean[fresh] = x[fresh]
+        self._seen |= obs
+        mis = ~obs
+        d = np.where(obs, x - self.mean, 0.0)
+
+        z = None
+        dof = int(obs.sum())
+        if self.count >= self.min_buckets and dof >= 2:
+            d2 = self._score(d, obs, mis)
+            dist = math.sqrt(max(d2, 0.0))
+            # Wilson-Hilferty: chi-square(dof) -> standard normal, comparable to the agents' sigma
+            h = 2.0 / (9.0 * dof)
+            z = ((max(d2, 0.0) / dof) ** (1.0 / 3.0) - (1.0 - h)) / math.sqrt(h)
+            sample = Sample(now, "distance", dist, note=", ".join(s for s, o in zip(self.sources, obs) if o))
+            sample.z = z
+            if z > self.sigma:
+                sample.flagged = True
+                sample.severity = Severity.HIGH if z > (self.sigma + 2.0) else Severity.MEDIUM
+            self.pipeline.push([sample])
+            self.series.add(now, dist, z)
+            self.distance_profile.update(dist)
+
+        self._update(d, obs, mis)
+        self._publish_stats(z=z, now=now)
+
+    def tick(self, now):
+        """Close the bucket once bucket_seconds of (event or wall) time have passed."""
+        if self._bucket_start is None:
+            self._bucket_start = now
+        elif now - self._bucket_start >= self.bucket_seconds:
+            self._bucket_start = now
+            self.flush(now)
+
+    def memory_usage(self):
+        return self.series.memory_usage() + sum(a.nbytes for a in (self.mean, self.cov, self.precision))
+
+    def restart(self):
+        # Start a fresh bucket; anything reported around the pause is discarded
+        self._take_bucket()
+        self._bucket_start = None
+
+    def announce(self):
+        self._publish_stats(note="Adapting")
+
+    def sample(self, batch):
+        """Close the current bucket once it is due."""
+        self.tick(self._now())
+
+    def _stateful(self):
+        return {"distance": self.distance_profile}
+
+    def get_state(self):
+        state = {
+            "mean": self.mean, "cov": self.cov, "precision": self.precision,
+            "seen": self._seen, "count": np.array(self.count)
+        }
+        state.update(super().get_state())
+        return state
+
+    def set_state(self, state):
+        if state.get("mean") is None or state["mean"].shape != self.mean.shape:
+            return
+        self.mean = state["mean"].astype(float)
+        self.cov = state["cov"].astype(float)
+        self.precision = state["precision"].astype(float)
+        self._seen = state["seen"].astype(bool)
+        self.count = int(state["count"])
+        super().set_state(state)
@@ -0,0 +1,278 @@
+"""
+Streaming half-space trees (Tan, Ting & Liu, 2011) as a pipeline scorer.
+
+An ensemble of random binary trees partitions feature space by halving a randomly chosen
+dimension at each node. Trees are built once, from random work ranges, without looking at
+the data; each node then counts how many vectors of the previous window passed through it
+(reference mass r) while counting the current window (latest mass l). When a window fills,
+l becomes r. A vector's score is r * 2**depth at the node where it stops (a leaf, or the
+first node whose reference mass is below size_limit), summed over trees: points in sparsely
+populated regions score low. Memory is fixed by trees x nodes whatever the stream length,
+and because r only changes at window boundaries a whole batch is scored and counted with one
+vectorised walk per tree level.
+
+HalfSpaceScorer is an alternative to ZScoreScorer for the agents (scorer="halfspace"): it
+scores the vector of several features (and optionally their rates of change) and replaces
+the per-feature z-score verdict on its trigger feature.
+"""
+import math
+
+import numpy as np
+
+from .records import Severity
+
+
+class HalfSpaceTrees:
+    """Fixed-memory half-space tree ensemble over vectors scaled to roughly [0, 1]."""
+    def __init__(self, n_features, trees=25, depth=8, window=250, size_limit=None, seed=0):
+        self.n_features = n_features
+        self.trees = trees
+        self.depth = depth
+        self.window = window
+        self.size_limit = 0.1 * window if size_limit is None else size_limit
+        self.seed = seed
+        nodes = (1 << (depth + 1)) - 1
+        self.split_dim = np.zeros((trees, nodes), np.int64)
+        self.split_value = np.zeros((trees, nodes))
+        self.r = np.zeros((trees, nodes))
+        self.l = np.zeros((trees, nodes))
+        self._build(np.random.default_rng(seed))
+        # Flat index of each tree's root; nodes are addressed as root + heap index
+        self._root = np.arange(trees) * nodes
+        self.reset()
+
+    def reset(self):
+        self.r.fill(0.0)
+        self.l.fill(0.0)
+        self.filled = 0
+        self.windows = 0
+
+    def _build(self, rng):
+        internal = (1 << self.depth) - 1
+        for t in range(self.trees):
+            s = rng.random(self.n_features)
+            span = 2.0 * np.maximum(s, 1.0 - s)
+            lo = [None] * ((1 << (self.depth + 1)) - 1)
+            hi = list(lo)
+            lo[0], hi[0] = s - span, s + span
+            for node in range(internal):
+                q = rng.integers(self.n_features)
+                mid = (lo[node][q] + hi[node][q]) / 2.0
+                self.split_dim[t, node] = q
+                self.split_value[t, node] = mid
+                left, right = 2 * node + 1, 2 * node + 2
+                lo[left], hi[left] = lo[node], hi[node].copy()
+                hi[left][q] = mid
+                lo[right], hi[right] = lo[node].copy(), hi[node]
+                lo[right][q] = mid
+
+    @property
+    def ready(self):
+        return self.windows > 0
+
+    def _walk(self, x):
+        """Score rows of x against r and count them into l; x must not cross a window boundary."""
+        n = len(x)
+        root = self._root
+        split_dim = self.split_dim.reshape(-1)
+        split_value = self.split_value.reshape(-1)
+        flat_x = x.reshape(-1)
+        row = (np.arange(n) * self.n_features)[:, None]
+        path = np.empty((self.depth + 1, n, self.trees), np.int64)
+        path[0] = root
+        for d in range(self.depth):
+            idx = path[d]
+            right = flat_x[row + split_dim[idx]] >= split_value[idx]
+            path[d + 1] = 2 * idx - root + 1 + right
+        mass = self.r.reshape(-1)[path]
+        stop = mass < self.size_limit
+        stop[-1] = True
+        # Scoring stops at the first node below size_limit; the latest mass counts the whole path
+        depth = stop.argmax(axis=0)
+        score = np.take_along_axis(mass, depth[None], 0)[0] * np.left_shift(1, depth)
+        if path.size < 4096:
+            np.add.at(self.l.reshape(-1), path.reshape(-1), 1.0)
+        else:
+            self.l += np.bincount(path.reshape(-1), minlength=self.l.size).reshape(self.l.shape)
+        return score.sum(axis=1)
+
+    def score_update(self, x):
+        """Scores of rows of x (higher is more normal; NaN until a window is complete), then count them."""
+        x = np.asarray(x, float).reshape(-1, self.n_features)
+        out = np.empty(len(x))
+        done = 0
+        while done < len(x):
+            n = min(len(x) - done, self.window - self.filled)
+            scores = self._walk(x[done:done + n])
+            out[done:done + n] = scores if self.windows else np.nan
+            done += n
+            self.filled += n
+            if self.filled == self.window:
+                self.r, self.l = self.l, self.r
+                self.l.fill(0.0)
+                self.filled = 0
+                self.windows += 1
+        return out
+
+    def memory_usage(self):
+        return self.split_dim.nbytes + self.split_value.nbytes + self.r.nbytes + self.l.nbytes
+
+    def state(self):
+        return {"r": self.r, "l": self.l, "filled": np.array(self.filled), "windows": np.array(self.windows)}
+
+    def load_state(self, state):
+        if state["r"].shape != self.r.shape:
+            return
+        self.r[:] = state["r"]
+        self.l[:] = state["l"]
+        self.filled = int(state["filled"])
+        self.windows = int(state["windows"])
+
+
+class HalfSpaceScorer:
+    """
+    Scores the vector [latest value of each of `features`] (plus each one's rate of change per
+    second when rates=True) every time the first feature arrives, with a HalfSpaceTrees model.
+    Values are compressed with a signed log and scaled so the central 98% of the first
+    `calibrate` vectors spans [0.25, 0.75].
+
+    Tree scores are heavy-tailed and sustained anomalies soon become "normal" to a fast
+    moving average, so the threshold comes from the previous window of log scores instead:
+    a score below its `tail` quantile and more than sigma robust deviations (1.4826 x MAD)
+    under its median flags the trigger sample. This verdict replaces any earlier scorer's
+    on that sample; z is the robust deviation.
+    """
+    def __init__(self, features, sigma=3.0, rates=False, tail=0.001, trees=25, depth=8,
+                 window=250, calibrate=1000, seed=0):
+        self.features = tuple(features)
+        self.trigger = self.features[0]
+        self.sigma = sigma
+        self.rates = rates
+        self.tail = tail
+        n = len(self.features) * (2 if rates else 1)
+        self.model = HalfSpaceTrees(n, trees=trees, depth=depth, window=window, seed=seed)
+        self._calibration = np.zeros((max(1, calibrate), n))
+        self._scores = np.zeros(window)
+        self.reset()
+
+    def reset(self):
+        self.model.reset()
+        self.latest = dict.fromkeys(self.features)
+        self.previous = {}
+        self.lo = None
+        self.scale = None
+        self._calibrated = 0
+        self._scored = 0
+        self.floor = None
+        self.center = None
+        self.spread = None
+
+    def _calibrate(self, raw):
+        """Collect the first compressed vectors, then fix the scaling from their spread. Returns how many it took."""
+        n = min(len(raw), len(self._calibration) - self._calibrated)
+        self._calibration[self._calibrated:self._calibrated + n] = raw[:n]
+        self._calibrated += n
+        if self._calibrated == len(self._calibration):
+            lo, hi = np.percentile(self._calibration, (1.0, 99.0), axis=0)
+            span = hi - lo
+            # Tails keep room inside the trees' work range
+            self.scale = np.where(span > 1e-9, 0.5 / np.maximum(span, 1e-9), 1.0)
+            self.lo = lo - 0.25 / self.scale
+        return n
+
+    def _close_window(self):
+        scores = self._scores
+        self.floor = float(np.quantile(scores, self.tail))
+        self.center = float(np.median(scores))
+        self.spread = max(1.4826 * float(np.median(np.abs(scores - self.center))), 1e-6)
+        self._scored = 0
+
+    def __call__(self, batches):
+        for batch in batches:
+            triggers = []
+            vectors = []
+            for s in batch:
+                if s.feature not in self.latest or s.value is None:
+                    continue
+                rate = None
+                if self.rates:
+                    prev = self.previous.get(s.feature)
+                    rate = 0.0
+                    if prev is not None and s.t > prev[0]:
+                        rate = (s.value - prev[1]) / (s.t - prev[0])
+                    self.previous[s.feature] = (s.t, s.value)
+                self.latest[s.feature] = (s.value, rate)
+                if s.feature != self.trigger:
+                    continue
+                s.flagged = False
+                s.severity = None
+                s.z = None
+                values = [self.latest[f] for f in self.features]
+                if any(v is None for v in values):
+                    continue
+                vector = [v for v, _ in values]
+                if self.rates:
+                    vector += [r for _, r in values]
+                triggers.append(s)
+                vectors.append(vector)
+            if vectors:
+                self._score(triggers, vectors)
+            yield batch
+
+    def _score(self, triggers, vectors):
+        raw = np.asarray(vectors, float)
+        raw = np.sign(raw) * np.log1p(np.abs(raw))
+        if self.scale is None:
+            used = self._calibrate(raw)
+            if self.scale is None:
+                return
+            # The calibration vectors are the model's first input; nothing is scored before its first window
+            self.model.score_update((self._calibration - self.lo) * self.scale)
+            raw, triggers = raw[used:], triggers[used:]
+            if not triggers:
+                return
+        scores = self.model.score_update((raw - self.lo) * self.scale)
+        window = len(self._scores)
+        for s, score in zip(triggers, scores.tolist()):
+            if math.isnan(score):
+                continue
+            value = math.log1p(score)
+            if self.floor is not None:
+                s.z = (self.center - value) / self.spread
+                if value < self.floor and s.z > self.sigma:
+                    s.flagged = True
+                    s.severity = Severity.HIGH if score == 0.0 or s.z > self.sigma + 2.0 else Severity.MEDIUM
+            self._scores[self._scored] = value
+            self._scored += 1
+            if self._scored == window:
+                self._close_window()
+
+    def memory_usage(self):
+        return self.model.memory_usage() + self._calibration.nbytes + self._scores.nbytes
+
+    def state(self):
+        if self.scale is None:
+            return {}
+        state = {f"model.{k}": v for k, v in self.model.state().items()}
+        state.update(lo=self.lo, scale=self.scale)
+        if self.floor is not None:
+            state.update(threshold=np.array([self.floor, self.center, self.spread]))
+        return state
+
+    def load_state(self, state):
+        if "scale" not in state or len(state["scale"]) != self.model.n_features:
+            return
+        self.lo = np.array(state["lo"], float)
+        self.scale = np.array(state["scale"], float)
+        self.model.load_state({k[len("model."):]: v for k, v in state.items() if k.startswith("model.")})
+        if "threshold" in state:
+            self.floor, self.center, self.spread = (float(v) for v in state["threshold"])
+
+
+def make_scorer(kind, features, sigma=3.0, **kwargs):
+    """The model scorer an agent's `scorer` option selects, or None for the plain z-score."""
+    if kind == "zscore":
+        return None
+    if kind == "halfspace":
+        return HalfSpaceScorer(features, sigma=sigma, **kwargs)
+    raise ValueError(f"Unknown scorer: {kind}")
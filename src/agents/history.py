@@ -0,0 +1,252 @@
+"""
+Durable alert and stats history in SQLite.
+
+Producers (agent threads via HistoryTap, or any caller) only append the record to an
+in-memory queue. A single writer thread drains it, formats alert messages and commits
+everything pending in one transaction, so a burst of alerts costs one fsync instead of
+one per row and neither the agents nor the Tk thread ever touch the database for writes.
+The database runs in WAL mode, so queries from other threads read a consistent snapshot
+while the writer appends.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from .memory import queue_usage
+from .records import Alert, Severity, Source
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    ended REAL
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER REFERENCES sessions(id),
+    ts REAL NOT NULL,
+    source TEXT NOT NULL,
+    severity INTEGER NOT NULL,
+    message TEXT,
+    count INTEGER NOT NULL DEFAULT 1,
+    last_ts REAL,
+    z REAL
+);
+CREATE INDEX IF NOT EXISTS alerts_ts ON alerts(ts);
+CREATE INDEX IF NOT EXISTS alerts_source_ts ON alerts(source, ts);
+CREATE INDEX IF NOT EXISTS alerts_severity_ts ON alerts(severity, ts);
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER REFERENCES sessions(id),
+    ts REAL NOT NULL,
+    source TEXT NOT NULL,
+    mean REAL,
+    std REAL,
+    z REAL,
+    note TEXT,
+    wpm REAL
+);
+CREATE INDEX IF NOT EXISTS stats_source_ts ON stats(source, ts);
+"""
+
+_STOP = object()
+
+
+class HistoryStore:
+    """
+    Append-only alert/stats history with a background batched writer.
+    add_alert()/add_stats() never block on I/O; queries open their own read connection.
+    Every alert is kept; stats are thinned to one row per agent every stats_interval seconds.
+    """
+    def __init__(self, path, max_batch=1000, flush_interval=1.0, stats_interval=10.0):
+        self.path = path
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.stats_interval = stats_interval
+        self.session_id = None
+        self._last_stats = {}
+        self.written = 0
+        self.transactions = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _query(self, sql, params=()):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    # Producers
+
+    def begin_session(self, started=None):
+        """Open a session row synchronously so later rows can reference it."""
+        conn = self._connect()
+        try:
+            with conn:
+                cur = conn.execute("INSERT INTO sessions (started) VALUES (?)",
+                                   (started if started is not None else time.time(),))
+            self.session_id = cur.lastrowid
+        finally:
+            conn.close()
+        return self.session_id
+
+    def end_session(self, ended=None):
+        if self.session_id is not None:
+            self._queue.put(("session", (ended if ended is not None else time.time(), self.session_id)))
+
+    def add_alert(self, alert):
+        self._queue.put(("alert", (self.session_id, alert)))
+
+    def add_stats(self, stats):
+        ts = stats.ts if stats.ts is not None else time.time()
+        last = self._last_stats.get(stats.source)
+        if last is not None and ts - last < self.stats_interval:
+            return
+        self._last_stats[stats.source] = ts
+        self._queue.put(("stats", (self.session_id, stats)))
+
+    def memory_usage(self):
+        """Records queued for the writer; grows only if the disk falls behind."""
+        return queue_usage(self._queue)
+
+    # Writer
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                item = self._queue.get()
+                batch = [item]
+                # Let a burst accumulate, then take everything pending in one transaction
+                deadline = time.monotonic() + self.flush_interval
+                while item is not _STOP and len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    batch.append(item)
+                entries = [entry for entry in batch if entry is not _STOP]
+                if entries:
+                    self._commit(conn, entries)
+                if item is _STOP:
+                    return
+        finally:
+            conn.close()
+
+    def _commit(self, conn, entries):
+        alerts, stats, ended = [], [], []
+        now = time.time()
+        for kind, payload in entries:
+            if kind == "alert":
+                session_id, a = payload
+                ts = a.ts if a.ts is not None else now
+                alerts.append((session_id, ts, str(a.source), int(a.severity), a.message,
+                               a.count, a.last_ts if a.last_ts is not None else ts, a.z))
+            elif kind == "stats":
+                session_id, st = payload
+                stats.append((session_id, st.ts if st.ts is not None else now,
+                              str(st.source), st.mean, st.std, st.z, st.note, st.wpm))
+            else:
+                ended.append(payload)
+        try:
+            with conn:
+                conn.executemany("INSERT INTO alerts (session_id, ts, source, severity, message, count, last_ts, z) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", alerts)
+                conn.executemany("INSERT INTO stats (session_id, ts, source, mean, std, z, note, wpm) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", stats)
+                conn.executemany("UPDATE sessions SET ended = ? WHERE id = ?", ended)
+            self.written += len(entries)
+            self.transactions += 1
+        except sqlite3.Error as e:
+            print(f"Error writing history: {e}")
+
+    def close(self, end_session=True):
+        """Flush pending rows and stop the writer."""
+        if end_session:
+            self.end_session()
+        self._queue.put(_STOP)
+        self._writer.join(timeout=5.0)
+
+    # Queries
+
+    def alerts(self, since=None, until=None, source=None, min_severity=None, limit=1000):
+        """Alert records, newest first."""
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if source is not None:
+            clauses.append("source = ?")
+            params.append(str(source))
+        if min_severity is not None:
+            clauses.append("severity >= ?")
+            params.append(int(Severity.coerce(min_severity)))
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        sql = (f"SELECT ts, source, severity, message, count, last_ts, z FROM alerts{where} "
+               f"ORDER BY ts DESC LIMIT ?")
+        rows = self._query(sql, params + [limit])
+        return [Alert(Source.coerce(src), Severity(sev), ts, message=msg, count=n, last_ts=last, z=z)
+                for ts, src, sev, msg, n, last, z in rows]
+
+    def recent_alerts(self, hours=24, **filters):
+        """Alerts in the last N hours, newest first."""
+        return self.alerts(since=time.time() - hours * 3600.0, **filters)
+
+    def alert_counts(self, since=None):
+        """{(source, severity): count} since a timestamp."""
+        sql = "SELECT source, severity, COUNT(*) FROM alerts"
+        params = []
+        if since is not None:
+            sql += " WHERE ts >= ?"
+            params.append(since)
+        sql += " GROUP BY source, severity"
+        rows = self._query(sql, params)
+        return {(src, str(Severity(sev))): n for src, sev, n in rows}
+
+    def stats(self, source, since=None, limit=10000):
+        """(ts, mean, std, z, note, wpm) rows for one agent, oldest first."""
+        sql = "SELECT ts, mean, std, z, note, wpm FROM stats WHERE source = ?"
+        params = [str(source)]
+        if since is not None:
+            sql += " AND ts >= ?"
+            params.append(since)
+        sql += " ORDER BY ts DESC LIMIT ?"
+        return self._query(sql, params + [limit])[::-1]
+
+    def sessions(self, limit=100):
+        """(id, started, ended, alert_count) rows, newest first."""
+        return self._query("SELECT s.id, s.started, s.ended, COUNT(a.id) FROM sessions s "
+                           "LEFT JOIN alerts a ON a.session_id = s.id "
+                           "GROUP BY s.id ORDER BY s.started DESC LIMIT ?", (limit,))
+
+
+class HistoryTap:
+    """Queue wrapper that records every alert or stats record before passing it on."""
+    def __init__(self, target, record):
+        self.target = target
+        self.record = record
+
+    def put(self, item):
+        self.record(item)
+        self.target.put(item)
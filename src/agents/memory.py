@@ -0,0 +1,192 @@
+"""
+Memory budget and per-component accounting for long-running instances.
+
+Stateful structures register with a MemoryAccountant under a component name: a usage()
+callable returning their approximate footprint in bytes and, where state can be shed,
+a compact() callable. check() sums the reports and, while the total is over budget,
+compacts the largest compactable components first. Footprints are estimates from
+sys.getsizeof over a sample of each container's items, cheap enough to run every few
+seconds on structures of any size. diagnostics() renders the per-component table and,
+on demand, the top allocations of a tracemalloc snapshot grouped by source file.
+"""
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+# Items of a container measured individually before the rest are extrapolated
+SAMPLE = 64
+# Rough size of one queued Alert/Stats record with its message fields
+RECORD_BYTES = 200
+
+
+def approx_size(obj, depth=3):
+    """Approximate deep size in bytes of nested dicts/lists/tuples/sets/deques of scalars."""
+    size = sys.getsizeof(obj)
+    if depth <= 0:
+        return size
+    if isinstance(obj, dict):
+        n = len(obj)
+        if not n:
+            return size
+        items = list(obj.items())
+        sample = items[:: max(1, n // SAMPLE)][:SAMPLE]
+        per = sum(approx_size(k, depth - 1) + approx_size(v, depth - 1) for k, v in sample) / len(sample)
+        return size + int(per * n)
+    if isinstance(obj, (list, tuple, set, frozenset, deque)):
+        n = len(obj)
+        if not n:
+            return size
+        items = list(obj)
+        sample = items[:: max(1, n // SAMPLE)][:SAMPLE]
+        per = sum(approx_size(item, depth - 1) for item in sample) / len(sample)
+        return size + int(per * n)
+    # NumPy arrays: views report only their header to getsizeof
+    return max(size, getattr(obj, "nbytes", 0))
+
+
+def queue_usage(q, per_item=RECORD_BYTES):
+    """Approximate footprint of a queue-like object's pending items (qsize() or len())."""
+    size = getattr(q, "qsize", None)
+    n = size() if size is not None else len(q) if hasattr(q, "__len__") else 0
+    return n * per_item
+
+
+class _Component:
+    __slots__ = ("name", "usage", "compact", "last", "compactions")
+
+    def __init__(self, name, usage, compact):
+        self.name = name
+        self.usage = usage
+        self.compact = compact
+        self.last = 0
+        self.compactions = 0
+
+
+class MemoryAccountant:
+    """
+    Central memory budget. Components are measured and compacted from whichever thread
+    calls check(); compact callables that touch another thread's state should only request
+    the work (as the agents' request_compact() does) and let the owner apply it.
+    """
+    def __init__(self, budget=64 * 2**20, check_interval=30.0):
+        self.budget = budget
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._components = {}
+        self.checks = 0
+        self.over_budget = 0
+        self.last_total = 0
+        # (time, total bytes, names of compacted components) per over-budget check
+        self.events = deque(maxlen=50)
+
+    def register(self, name, usage, compact=None):
+        with self._lock:
+            self._components[name] = _Component(name, usage, compact)
+
+    def unregister(self, name):
+        with self._lock:
+            self._components.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._components.clear()
+
+    def _measure(self, component):
+        try:
+            component.last = int(component.usage())
+        except Exception:
+            # A structure resized by its own thread mid-measurement keeps its last reading
+            pass
+        return component.last
+
+    def usage(self):
+        """Current footprint of every component in bytes, largest first."""
+        with self._lock:
+            components = list(self._components.values())
+        sizes = {c.name: self._measure(c) for c in components}
+        return dict(sorted(sizes.items(), key=lambda item: -item[1]))
+
+    def total(self):
+        return sum(self.usage().values())
+
+    def check(self):
+        """Measure everything; when over budget, compact the largest components until it fits."""
+        with self._lock:
+            components = list(self._components.values())
+        total = sum(self._measure(c) for c in components)
+        self.checks += 1
+        self.last_total = total
+        if total <= self.budget:
+            return []
+        self.over_budget += 1
+        compacted = []
+        for c in sorted(components, key=lambda c: -c.last):
+            if total <= self.budget:
+                break
+            if c.compact is None:
+                continue
+            before = c.last
+            try:
+                c.compact()
+            except Exception as e:
+                print(f"Memory compaction of {c.name} failed: {e}")
+                continue
+            c.compactions += 1
+            compacted.append(c.name)
+            freed = before - self._measure(c)
+            # Deferred compactions (request_compact) free memory on the owner's thread later;
+            # count them as halving the component meanwhile
+            total -= freed if freed > 0 else before // 2
+        self.events.append((time.time(), self.last_total, compacted))
+        return compacted
+
+    # Diagnostics
+
+    @staticmethod
+    def start_tracing(frames=1):
+        """Start tracemalloc if needed; only allocations made after this are traced."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    @staticmethod
+    def stop_tracing():
+        tracemalloc.stop()
+
+    def diagnostics(self, trace=False, top=10):
+        """
+        Text report: per-component footprint against the budget and, with trace=True, the
+        source files holding the most traced memory. The first traced call starts
+        tracemalloc, so only later allocations show up.
+        """
+        sizes = self.usage()
+        total = sum(sizes.values())
+        lines = [f"Memory budget {self.budget / 2**20:.1f} MB, accounted {total / 2**20:.2f} MB "
+                 f"({self.over_budget} of {self.checks} checks over budget)"]
+        with self._lock:
+            compactions = {name: c.compactions for name, c in self._components.items()}
+        for name, size in sizes.items():
+            share = size / total if total else 0.0
+            lines.append(f"  {name:<24} {size / 1024:>10.1f} KB  {share:>6.1%}  compacted {compactions.get(name, 0)}x")
+        if trace:
+            if not tracemalloc.is_tracing():
+                self.start_tracing()
+                lines.append("tracemalloc started; request the report again to see allocations")
+            else:
+                snapshot = tracemalloc.take_snapshot().filter_traces((
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                ))
+                stats = snapshot.statistics("filename")
+                traced = sum(s.size for s in stats)
+                lines.append(f"tracemalloc: {traced / 2**20:.2f} MB traced, top {top} files")
+                for stat in stats[:top]:
+                    frame = stat.traceback[0]
+                    lines.append(f"  {_short(frame.filename):<40} {stat.size / 1024:>10.1f} KB  {stat.count:>8} blocks")
+        return "\n".join(lines)
+
+
+def _short(filename):
+    parts = filename.replace("\\", "/").split("/")
+    return "/".join(parts[-2:])
@@ -1,108 +1,109 @@
-import time
-import math
-from pynput import mouse
+from .pipeline import (AgentControl, AggregationPolicy, EventBuffer, FeatureTap, MouseSpeed, Pipeline,
+                       PipelineAgent, QueueSink, SeriesTap, ZScoreScorer)
+from .profile import AdaptiveProfile
+from .records import MoveEvent
+from .series import SignalSeries
 
-class MovementAgent:
+class MovementAgent(PipelineAgent):
     """
     Adaptive movement anomaly detector with exponential moving averages and cooldown.
+    Assembled from pipeline stages: MouseSpeed -> ZScoreScorer -> AggregationPolicy -> QueueSink.
     Publishes:
-      - anomalies to anomaly_queue as dicts: {"source","severity","message"}
-      - stats to stats_queue: {"source","mean","std","z","note"}
+      - anomalies to anomaly_queue as records.Alert (source, severity, ts, message)
+      - stats to stats_queue as records.Stats (source, mean, std, z, note)
     """
-    def __init__(self, anomaly_queue, stats_queue, sigma=3.0, cooldown=3.0):
+    name = "Movement"
+    kinds = ("move",)
+    hold_stats = True
+
+    def __init__(self, anomaly_queue, stats_queue, sigma=3.0, cooldown=3.0,
+                 threshold="zscore", quantile=0.99, baseline="global", feature_sink=None,
+                 recorder=None, sample_interval=0.05, batch_size=512, scorer="zscore"):
         self.anomaly_queue = anomaly_queue
         self.stats_queue = stats_queue
-        self.sigma = sigma
-        self.cooldown = cooldown
-
-        self.positions = []
-        self.listener = mouse.Listener(on_move=self._on_move)
-
-        self.mean_speed = None
-        self.var_speed = None
-        self.count = 0
+        self.feature_sink = feature_sink
+        self.sample_interval = sample_interval
+        self.batch_size = batch_size
 
         self.alpha = 0.01
-        self.sigma = sigma
-        self.cooldown = cooldown
-        self._last_alert_ts = 0.0
-        self._last_stat_ts = 0.0
+        self.profile = AdaptiveProfile(alpha=self.alpha, threshold=threshold, quantile=quantile,
+                                       baseline=baseline)
 
-    def _now(self):
-        return time.time()
+        self.extractor = MouseSpeed()
+        self.scorer = ZScoreScorer(self.profile, "speed", sigma=sigma, min_count=10)
+        # scorer="halfspace" scores speed by its density over the last ~3 minutes of movement;
+        # acceleration from 125 Hz jittered samples only dilutes the trees' resolution
+        self.model = None
+        if scorer != "zscore":
+            from .halfspace import make_scorer
+            self.model = make_scorer(scorer, ("speed",), sigma=sigma, window=5000)
+        self.policy = AggregationPolicy(window=cooldown)
+        self.sink = QueueSink("Movement", anomaly_queue, stats_queue, self.profile, "speed", {
+            "speed": lambda s: f"Speed {s.value:.1f}, z={s.z or 0.0:.2f}"
+        })
+        self.series = SignalSeries(self.profile)
+        self.stages = ((recorder,) if recorder else ()) + (
+            self.extractor, self.scorer) + ((self.model,) if self.model else ()) + (FeatureTap("speed", "Movement", feature_sink),
+            SeriesTap("speed", self.series),
+            self.policy, self.sink
+        )
+        self.pipeline = Pipeline(*self.stages)
 
-    def _on_move(self, x, y):
-        t = self._now()
-        self.positions.append({'x': x, 'y': y, 'time': t})
-        if len(self.positions) > 200:
-            self.positions.pop(0)
-        self._step()
+        self.buffer = EventBuffer()
+        self.control = AgentControl()
+        self.listener = None
+        # Engine-wide ActivityMonitor (set by the engine); input here keeps every loop at full rate
+        self.activity = None
 
-    def _speed(self):
-        if len(self.positions) < 2:
-            return None
-        p1, p2 = self.positions[-2], self.positions[-1]
-        dt = p2['time'] - p1['time']
-        if dt <= 0:
-            return None
-        dx, dy = p2['x'] - p1['x'], p2['y'] - p1['y']
-        dist = math.hypot(dx, dy)
-        return dist / dt
+    @property
+    def sigma(self):
+        return self.scorer.sigma
 
-    def _update_profile(self, value):
-        if self.mean_speed is None:
-            self.mean_speed = value
-            self.var_speed = 0.0
-            self.count = 1
-        else:
-            self.count += 1
-            delta = value - self.mean_speed
-            self.mean_speed += self.alpha * delta
-            self.var_speed = (1 - self.alpha) * self.var_speed + self.alpha * (delta ** 2)
+    @sigma.setter
+    def sigma(self, value):
+        self.scorer.sigma = value
+        if self.model is not None:
+            self.model.sigma = value
 
-    def _std(self):
-        return (self.var_speed ** 0.5) if self.var_speed is not None else 0.0
+    def _on_move(self, x, y):
+        if self.control.paused:
+            return
+        if self.activity is not None:
+            self.activity.touch()
+        self.buffer.append(MoveEvent("move", self._now(), x, y))
 
-    def _publish_stats(self, z=None, note=None):
-        now = self._now()
-        if now - self._last_stat_ts >= 0.5:
-            self._last_stat_ts = now
-            mean = self.mean_speed if self.mean_speed is not None else None
-            std = self._std() if self.mean_speed is not None else None
-            self.stats_queue.put({
-                "source": "Movement",
-                "mean": mean,
-                "std": std,
-                "z": z,
-                "note": note or ("Adapting" if self.count < 30 else "Stable")
-            })
+    def reset(self):
+        self.profile.reset()
+        if self.model is not None:
+            self.model.reset()
+        self.series.reset()
+        self.extractor.reset()
+        self.policy.reset()
 
-    def _step(self):
-        spd = self._speed()
-        if spd is None or spd < 0.1:
-            self._publish_stats(z=None, note="NoSignal")
-            return
+    def restart(self):
+        # Events on either side of a pause are not consecutive
+        self.extractor.reset()
 
-        z = None
-        if self.mean_speed is not None and self._std() > 1e-6 and self.count > 10:
-            z = abs(spd - self.mean_speed) / max(self._std(), 1e-6)
-            if z > self.sigma:
-                now = self._now()
-                if now - self._last_alert_ts >= self.cooldown:
-                    self._last_alert_ts = now
-                    sev = "High" if z > (self.sigma + 2.0) else "Medium"
-                    self.anomaly_queue.put({
-                        "source": "Movement",
-                        "severity": sev,
-                        "message": f"Speed {spd:.1f}, z={z:.2f}"
-                    })
+    def memory_usage(self):
+        """Approximate bytes held: signal history rings and events not yet drained."""
+        model = self.model.memory_usage() if self.model is not None else 0
+        return self.series.memory_usage() + self.buffer.memory_usage() + model
 
-        self._update_profile(spd)
-        self._publish_stats(z=z)
+    def _stateful(self):
+        parts = {"profile": self.profile}
+        if self.model is not None:
+            parts["model"] = self.model
+        return parts
 
-    def run(self, stop_event):
+    def start_input(self):
+        # Imported here so offline analysis never needs an input backend
+        from pynput import mouse
+        self.listener = mouse.Listener(on_move=self._on_move)
         self.listener.start()
-        self._publish_stats(z=None, note="Adapting")
-        while not stop_event.is_set():
-            time.sleep(0.05)
+        if self.activity is not None:
+            self.activity.watch()
+
+    def stop_input(self):
         self.listener.stop()
+        if self.activity is not None:
+            self.activity.unwatch()
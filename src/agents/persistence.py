@@ -0,0 +1,31 @@
+import os
+
+import numpy as np
+
+
+def save_profiles(path, agents):
+    """Write every agent's learned profile state into a single .npz file, atomically."""
+    state = {}
+    for agent in agents:
+        if not hasattr(agent, "get_state"):
+            continue
+        for key, value in agent.get_state().items():
+            state[f"{agent.name}/{key}"] = np.asarray(value)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        np.savez_compressed(fh, **state)
+    os.replace(tmp, path)
+
+
+def load_profiles(path, agents):
+    """Restore agent state saved by save_profiles. Returns False if there is nothing to load."""
+    if not os.path.exists(path):
+        return False
+    with np.load(path, allow_pickle=False) as data:
+        for agent in agents:
+            prefix = agent.name + "/"
+            state = {k[len(prefix):]: data[k] for k in data.files if k.startswith(prefix)}
+            if state and hasattr(agent, "set_state"):
+                agent.set_state(state)
+    return True
@@ -0,0 +1,833 @@
+"""
+Composable streaming pipeline for the detection agents.
+
+A pipeline is source -> feature extractor -> scorer -> alert policy -> sink. Every stage
+is a callable taking an iterator of event batches (lists) and yielding exactly one output
+batch per input batch, so stages chain with compose() and the same stages can be pulled
+from a recorded file or synthetic stream at full speed, or driven live with Pipeline.push().
+
+Events are tuples whose first field is the kind and second the timestamp:
+  ("move", t, x, y), ("key", t, is_char), ("focus", t, app)
+(see records.MoveEvent / KeyEvent / FocusEvent). Sinks publish records.Alert and
+records.Stats.
+"""
+import gzip
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from .activity import idle_wait
+from .memory import approx_size
+from .records import Alert, Severity, Source, Stats, make_event
+
+
+class Sample:
+    """One feature observation flowing from the extractor to the sink."""
+    __slots__ = ("t", "feature", "value", "z", "flagged", "severity", "alert", "note", "window")
+
+    def __init__(self, t, feature, value, note=None):
+        self.t = t
+        self.feature = feature
+        self.value = value
+        self.z = None
+        self.flagged = False
+        self.severity = None
+        self.alert = False
+        self.note = note
+        self.window = None
+
+
+def compose(source, *stages):
+    """Chain stages onto an iterable of batches and return the resulting batch iterator."""
+    stream = iter(source)
+    for stage in stages:
+        stream = stage(stream)
+    return stream
+
+
+def run(source, *stages):
+    """Drain a pull-driven pipeline at full speed. Returns the number of batches processed."""
+    count = 0
+    for _ in compose(source, *stages):
+        count += 1
+    return count
+
+
+class Pipeline:
+    """Push-driven pipeline: each push() runs one batch through every stage."""
+    def __init__(self, *stages):
+        self._pending = None
+        self._out = compose(self._feed(), *stages)
+
+    def _feed(self):
+        while True:
+            batch, self._pending = self._pending, None
+            yield batch
+
+    def push(self, batch):
+        self._pending = batch
+        return next(self._out)
+
+
+def replay(source, agents):
+    """
+    Feed a mixed event stream to several agents, routing each event by kind.
+    Agents expose kinds and process(batch); those with tick(now) (e.g. Fusion) are
+    ticked with the batch's last timestamp so time-based work follows event time.
+    At the end of the stream, alert windows still open are flushed.
+    """
+    for batch in source:
+        dispatch(batch, agents)
+    for agent in agents:
+        if hasattr(agent, "flush_alerts"):
+            agent.flush_alerts()
+
+
+def dispatch(batch, agents):
+    """Route one mixed batch to the agents by event kind, then tick the time-driven ones."""
+    for agent in agents:
+        kinds = getattr(agent, "kinds", ())
+        part = [e for e in batch if e[0] in kinds]
+        if part:
+            agent.process(part)
+    if batch:
+        for agent in agents:
+            if hasattr(agent, "tick"):
+                agent.tick(batch[-1][1])
+
+
+# Sources
+
+class EventBuffer:
+    """Thread-safe hand-off from input listener callbacks to the agent thread."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+
+    def append(self, event):
+        with self._lock:
+            self._events.append(event)
+
+    def drain(self):
+        with self._lock:
+            events, self._events = self._events, []
+        return events
+
+    def memory_usage(self):
+        return approx_size(self._events)
+
+
+class AgentControl:
+    """
+    Pause/resume/reset requests from the UI thread, applied by the agent thread between
+    batches so input listeners stay hooked and no caller ever waits on a join. Compaction
+    requests from the memory accountant travel the same way.
+    """
+    def __init__(self):
+        self.paused = False
+        self._resumed = False
+        self._reset = False
+        self._compact = False
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self._resumed = True
+        self.paused = False
+
+    def request_reset(self):
+        self._reset = True
+
+    @property
+    def reset_pending(self):
+        return self._reset
+
+    def request_compact(self):
+        self._compact = True
+
+    def take_compact(self):
+        compact, self._compact = self._compact, False
+        return compact
+
+    def take(self):
+        """Return and clear (reset_requested, resumed) for the agent thread to act on."""
+        reset, self._reset = self._reset, False
+        resumed, self._resumed = self._resumed, False
+        return reset, resumed
+
+
+class PipelineAgent:
+    """
+    Lifecycle shared by the agents. Requests from other threads go through self.control and
+    are applied by poll() between batches; the agent runs either on the engine's scheduler
+    (schedule()) or on a thread of its own (run()).
+
+    Subclasses set control, policy, pipeline and sink (and buffer for input agents) and
+    override the hooks they need:
+      interval       seconds between polls (sample_interval by default)
+      start_input()  / stop_input()  hook and unhook input listeners
+      sample(batch)  one poll's work on the drained events (process() by default)
+      reset()        forget learned state; restart() after a pause or reset
+      announce()     publish the "Adapting" status
+      _stateful()    {prefix: component with state()/load_state()} for get_state()/set_state()
+    """
+    batch_size = 512
+    buffer = None
+    # Movement and Typing publish stats from a scheduled task instead of per event
+    hold_stats = False
+    # Agents whose poll blocks (e.g. on a subprocess) run on their own thread, never the shared scheduler
+    blocking = False
+
+    @property
+    def interval(self):
+        return self.sample_interval
+
+    @property
+    def cooldown(self):
+        return self.policy.window
+
+    @cooldown.setter
+    def cooldown(self, value):
+        self.policy.window = value
+
+    def _now(self):
+        return time.time()
+
+    def process(self, batch):
+        """Run one batch of events through the pipeline (live or replayed)."""
+        for i in range(0, len(batch), self.batch_size):
+            self.pipeline.push(batch[i:i + self.batch_size])
+
+    def flush_alerts(self, now=None):
+        """Emit alert windows that have ended by now (every open window when now is None)."""
+        self.policy.expire(now)
+        if self.policy.pending:
+            self.pipeline.push([])
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    def request_reset(self):
+        """Forget learned state on the agent's own loop before its next batch."""
+        self.control.request_reset()
+
+    def request_compact(self):
+        """Compact on the agent's own loop before its next batch (memory budget exceeded)."""
+        self.control.request_compact()
+
+    def reset(self):
+        pass
+
+    def restart(self):
+        pass
+
+    def announce(self):
+        self.sink.publish_stats(self._now(), note="Adapting", force=True)
+
+    def _apply_control(self):
+        if self.control.take_compact():
+            self.compact()
+        reset, resumed = self.control.take()
+        if reset:
+            self.reset()
+            self.announce()
+        if reset or resumed:
+            self.restart()
+
+    def _stateful(self):
+        return {}
+
+    def get_state(self):
+        state = {}
+        for prefix, part in self._stateful().items():
+            state.update({f"{prefix}.{k}": v for k, v in part.state().items()})
+        return state
+
+    def set_state(self, state):
+        for prefix, part in self._stateful().items():
+            prefix += "."
+            saved = {k[len(prefix):]: v for k, v in state.items() if k.startswith(prefix)}
+            # Components added since the profile was saved have nothing stored; those start fresh
+            if saved:
+                part.load_state(saved)
+
+    def start_input(self):
+        pass
+
+    def stop_input(self):
+        pass
+
+    def sample(self, batch):
+        self.process(batch)
+
+    def open(self):
+        """Hook up input and announce the agent; poll() then runs once per interval until close()."""
+        self.start_input()
+        self.announce()
+
+    def poll(self):
+        batch = self.buffer.drain() if self.buffer is not None else []
+        self._apply_control()
+        if not self.control.paused:
+            self.sample(batch)
+        self.flush_alerts(self._now())
+
+    def close(self):
+        self.stop_input()
+
+    def schedule(self, scheduler):
+        """Run on the engine's scheduler: poll every interval (and publish held stats)."""
+        self.open()
+        scheduler.every(self.name, self.interval, self.poll)
+        if self.hold_stats:
+            self.sink.hold()
+            scheduler.every(f"{self.name} stats", self.sink.stats_interval, self.sink.publish_held)
+
+    def run(self, stop_event):
+        """Poll on a thread of its own instead, until stop_event is set."""
+        self.open()
+        while not idle_wait(self.activity, stop_event, self.name, self.interval):
+            self.poll()
+        self.close()
+
+
+def read_recording(path, kinds=None, batch_size=512):
+    """
+    Stream a JSON-lines recording (optionally .gz) or a columnar session directory as event
+    batches without loading it whole.
+    """
+    if os.path.isdir(path):
+        from .session_store import SessionReader
+        reader = SessionReader(path)
+        try:
+            yield from reader.batches(kinds=kinds, batch_size=batch_size)
+        finally:
+            reader.close()
+        return
+    batch = []
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            event = make_event(json.loads(line))
+            if kinds is not None and event[0] not in kinds:
+                continue
+            batch.append(event)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+class Recorder:
+    """Pass-through stage that appends raw events to a JSON-lines file; shareable across agents."""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def __call__(self, batches):
+        for batch in batches:
+            if batch:
+                lines = "".join(json.dumps(list(e), separators=(",", ":")) + "\n" for e in batch)
+                with self._lock:
+                    if not self._fh.closed:
+                        self._fh.write(lines)
+            yield batch
+
+    def close(self):
+        with self._lock:
+            self._fh.close()
+
+
+# Feature extractors
+
+class MouseSpeed:
+    """Pointer speed (px/s) between consecutive move events."""
+    def __init__(self, min_speed=0.1):
+        self.min_speed = min_speed
+        self.reset()
+
+    def reset(self):
+        self.last = None
+
+    def __call__(self, batches):
+        for batch in batches:
+            out = []
+            for _, t, x, y in batch:
+                last, self.last = self.last, (t, x, y)
+                spd = None
+                if last is not None and t > last[0]:
+                    spd = math.hypot(x - last[1], y - last[2]) / (t - last[0])
+                if spd is None or spd < self.min_speed:
+                    out.append(Sample(t, "speed", None, note="NoSignal"))
+                else:
+                    out.append(Sample(t, "speed", spd))
+            yield out
+
+
+class KeyBursts:
+    """
+    Incremental burst/pause segmentation of keystrokes. A gap of at least `pause` seconds
+    ends the open burst; add() then returns one sample per burst feature, stamped with the
+    key that ended it. Features are running sums (Welford mean/variance of flight time, key
+    and correction counts), so each key costs O(1) and no keystroke history is kept:
+      burst_keys         keys in the burst
+      burst_flight       mean flight time (s) within the burst
+      burst_jitter       standard deviation of that flight time
+      burst_corrections  share of non-character keys (backspace, arrows, ...)
+      log_pause          log of the pause that ended it (pauses over max_pause are absences)
+    Flight features need min_keys keys; a shorter burst reports only its length.
+    """
+    FEATURES = ("burst_keys", "burst_flight", "burst_jitter", "burst_corrections", "log_pause")
+
+    def __init__(self, pause=1.0, max_pause=300.0, min_keys=3):
+        self.pause = pause
+        self.max_pause = max_pause
+        self.min_keys = min_keys
+        self.bursts = 0
+        self.reset()
+
+    def reset(self):
+        self.last_ts = None
+        self._open()
+
+    def _open(self):
+        self.keys = 0
+        self.corrections = 0
+        self.flights = 0
+        self.flight_mean = 0.0
+        self.flight_m2 = 0.0
+
+    def _close(self, t, gap):
+        out = [Sample(t, "burst_keys", self.keys)]
+        if self.keys >= self.min_keys and self.flights > 1:
+            out.append(Sample(t, "burst_flight", self.flight_mean))
+            out.append(Sample(t, "burst_jitter", math.sqrt(self.flight_m2 / (self.flights - 1))))
+            out.append(Sample(t, "burst_corrections", self.corrections / self.keys))
+        if gap <= self.max_pause:
+            out.append(Sample(t, "log_pause", math.log(gap)))
+        self.bursts += 1
+        self._open()
+        return out
+
+    def add(self, t, is_char):
+        """Account one key; returns the finished burst's samples when this key starts a new one."""
+        out = None
+        if self.last_ts is not None:
+            gap = t - self.last_ts
+            if gap >= self.pause:
+                out = self._close(t, gap)
+            elif gap > 0:
+                self.flights += 1
+                d = gap - self.flight_mean
+                self.flight_mean += d / self.flights
+                self.flight_m2 += d * (gap - self.flight_mean)
+        self.last_ts = t
+        self.keys += 1
+        if not is_char:
+            self.corrections += 1
+        return out
+
+
+class KeyTiming:
+    """
+    Inter-key delay and a smoothed words-per-minute estimate over a sliding window, plus
+    per-burst features when given a KeyBursts segmenter.
+    """
+    WPM_WEIGHTS = (0.1, 0.15, 0.2, 0.25, 0.3)
+
+    def __init__(self, window_size=60, min_delay=0.01, max_delay=2.0, bursts=None):
+        self.window_size = window_size
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.bursts = bursts
+        self.total_chars = 0
+        self.reset()
+
+    def reset(self):
+        if self.bursts is not None:
+            self.bursts.reset()
+        self.last_ts = None
+        self.char_timestamps = deque()
+        self.wpm_samples = deque(maxlen=len(self.WPM_WEIGHTS))
+        self.typing_speed_wpm = 0
+
+    def _calculate_wpm(self, now):
+        while self.char_timestamps and (now - self.char_timestamps[0]) > self.window_size:
+            self.char_timestamps.popleft()
+
+        if not self.char_timestamps or (now - self.char_timestamps[-1]) > 5:
+            return 0
+
+        chars_in_window = len(self.char_timestamps)
+        window_duration = min(self.window_size, now - self.char_timestamps[0]) / 60
+
+        if window_duration > 0:
+            return (chars_in_window / 5) / window_duration
+        return 0
+
+    def _update_wpm(self, now):
+        self.wpm_samples.append(self._calculate_wpm(now))
+        weights = self.WPM_WEIGHTS[:len(self.wpm_samples)]
+        self.typing_speed_wpm = sum(w * s for w, s in zip(weights, self.wpm_samples)) / sum(weights)
+
+    def __call__(self, batches):
+        for batch in batches:
+            out = []
+            for _, t, is_char in batch:
+                delay = None if self.last_ts is None else t - self.last_ts
+                self.last_ts = t
+
+                if is_char:
+                    self.total_chars += 1
+                    self.char_timestamps.append(t)
+                    self._update_wpm(t)
+                out.append(Sample(t, "wpm", self.typing_speed_wpm))
+
+                if delay is not None and self.min_delay < delay < self.max_delay:
+                    out.append(Sample(t, "delay", delay))
+                else:
+                    out.append(Sample(t, "delay", None, note="NoSignal"))
+                if self.bursts is not None:
+                    burst = self.bursts.add(t, is_char)
+                    if burst:
+                        out.extend(burst)
+            yield out
+
+
+class FocusGaps:
+    """Focused-app samples plus the time gap at every app switch."""
+    def __init__(self, history_size=100, poll_interval=2.0):
+        self.history_size = history_size
+        self.poll_interval = poll_interval
+        self.reset()
+
+    def reset(self):
+        self.history = []
+
+    def memory_usage(self):
+        return approx_size(self.history)
+
+    def __call__(self, batches):
+        for batch in batches:
+            out = []
+            for _, t, app in batch:
+                if not app:
+                    out.append(Sample(t, "gap", None, note="NoSignal"))
+                    continue
+                out.append(Sample(t, "app", app))
+                if self.history and app != self.history[-1][1]:
+                    out.append(Sample(t, "gap", t - self.history[-1][0]))
+                else:
+                    out.append(Sample(t, "gap", None))
+                if not self.history or app != self.history[-1][1]:
+                    self.history.append((t, app))
+                    if len(self.history) > self.history_size:
+                        old_time = t - (self.history_size * self.poll_interval)
+                        while self.history and self.history[0][0] < old_time:
+                            self.history.pop(0)
+            yield out
+
+
+# Scorers
+
+class ZScoreScorer:
+    """Scores one feature against an AdaptiveProfile, then folds the value into the profile."""
+    def __init__(self, profile, feature, sigma=3.0, min_count=10, side="both", severity=None):
+        self.profile = profile
+        self.feature = feature
+        self.sigma = sigma
+        self.min_count = min_count
+        self.side = side
+        self.severity = severity
+
+    def __call__(self, batches):
+        for batch in batches:
+            for s in batch:
+                if s.feature != self.feature or s.value is None:
+                    continue
+                s.z, s.flagged = self.profile.check(s.value, self.sigma, self.min_count, self.side, ts=s.t)
+                if s.flagged:
+                    if self.severity is not None:
+                        s.severity = self.severity
+                    else:
+                        s.severity = Severity.HIGH if s.z is not None and s.z > (self.sigma + 2.0) else Severity.MEDIUM
+                self.profile.update(s.value, s.t)
+            yield batch
+
+
+class ThresholdScorer:
+    """Flags a feature whose value exceeds a fixed limit."""
+    def __init__(self, feature, limit, severity=Severity.HIGH):
+        self.feature = feature
+        self.limit = limit
+        self.severity = severity
+
+    def __call__(self, batches):
+        for batch in batches:
+            for s in batch:
+                if s.feature == self.feature and s.value is not None and s.value > self.limit:
+                    s.flagged = True
+                    s.severity = self.severity
+            yield batch
+
+
+class RareAppScorer:
+    """Flags focus on apps that are rarely used and not among the user's usual apps."""
+    def __init__(self, min_app_time=5.0, usual_after=300.0, min_total=30, max_count=2):
+        self.min_app_time = min_app_time
+        self.usual_after = usual_after
+        self.min_total = min_total
+        self.max_count = max_count
+        self.reset()
+
+    def reset(self):
+        self.app_counts = {}
+        self.app_durations = {}
+        self.usual_apps = set()
+        self._current = None
+
+    def restart(self):
+        """Forget the app in focus (e.g. after a pause) but keep learned usage."""
+        self._current = None
+
+    def memory_usage(self):
+        return approx_size(self.app_counts) + approx_size(self.app_durations) + approx_size(self.usual_apps)
+
+    def compact(self, keep=0.5):
+        """
+        Forget the least-used apps (by time in focus), keeping usual apps, the app in focus
+        and the `keep` share of the rest. A forgotten app counts as never seen again, which
+        for the rarely used apps dropped first is nearly what it was. Returns apps dropped.
+        """
+        apps = set(self.app_counts) | set(self.app_durations)
+        protected = set(self.usual_apps)
+        if self._current is not None:
+            protected.add(self._current[1])
+        candidates = sorted(apps - protected, key=lambda app: self.app_durations.get(app, 0.0))
+        drop = candidates[:len(candidates) - int(len(candidates) * keep)]
+        for app in drop:
+            self.app_counts.pop(app, None)
+            self.app_durations.pop(app, None)
+        return len(drop)
+
+    def __call__(self, batches):
+        for batch in batches:
+            for s in batch:
+                if s.feature != "app":
+                    continue
+                t, app = s.t, s.value
+                if self._current is not None:
+                    started, last_app = self._current
+                    self.app_durations[last_app] = self.app_durations.get(last_app, 0) + (t - started)
+                    if self.app_durations[last_app] > self.usual_after:
+                        self.usual_apps.add(last_app)
+                    if t - started >= self.min_app_time:
+                        self.app_counts[app] = self.app_counts.get(app, 0) + 1
+
+                total = sum(self.app_counts.values())
+                if (total > self.min_total and
+                        self.app_counts.get(app, 0) <= self.max_count and
+                        app not in self.usual_apps):
+                    s.flagged = True
+                    s.severity = Severity.HIGH
+
+                if self._current is None or app != self._current[1]:
+                    self._current = (t, app)
+            yield batch
+
+
+class FeatureTap:
+    """Forwards scored values of one feature to a callback, e.g. FusionAgent.observe."""
+    def __init__(self, feature, source, sink):
+        self.feature = feature
+        self.source = source
+        self.sink = sink
+
+    def __call__(self, batches):
+        for batch in batches:
+            if self.sink is not None:
+                for s in batch:
+                    if s.feature == self.feature and s.value is not None:
+                        self.sink(self.source, s.value, s.t)
+            yield batch
+
+
+class SeriesTap:
+    """Records scored values of one feature into a SignalSeries for the dashboard sparklines."""
+    def __init__(self, feature, series):
+        self.feature = feature
+        self.series = series
+
+    def __call__(self, batches):
+        for batch in batches:
+            add = self.series.add
+            for s in batch:
+                if s.feature == self.feature and s.value is not None:
+                    add(s.t, s.value, s.z)
+            yield batch
+
+
+# Alert policy
+
+class AlertWindow:
+    """Flagged samples of one feature grouped into a single alert."""
+    __slots__ = ("feature", "first_ts", "last_ts", "count", "max_z", "severity", "lead")
+
+    def __init__(self, s):
+        self.feature = s.feature
+        self.first_ts = self.last_ts = s.t
+        self.count = 1
+        self.max_z = s.z
+        self.severity = s.severity
+        self.lead = s
+
+    def add(self, s):
+        self.last_ts = s.t
+        self.count += 1
+        if s.severity is not None and (self.severity is None or s.severity > self.severity):
+            self.severity = s.severity
+        if s.z is not None and (self.max_z is None or s.z > self.max_z):
+            self.max_z = s.z
+            self.lead = s
+
+
+class AggregationPolicy:
+    """
+    Groups flagged samples per feature into windows that run `window` seconds from their
+    first sample, and emits one summary alert per window (count, max z, first/last time, worst
+    severity). A sustained anomaly yields O(windows) alerts while every flagged sample is still
+    counted, and features window independently, so a WPM alert never hides a delay alert.
+    A window closes on the first sample at or after its end, or when expire(now) is called.
+    """
+    def __init__(self, window=3.0):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.open = {}
+        self._due = []
+        self.flagged = 0
+        self.emitted = 0
+
+    @property
+    def pending(self):
+        return bool(self._due)
+
+    def expire(self, now=None):
+        """Close windows that have ended by now, or all of them when now is None."""
+        for feature, w in list(self.open.items()):
+            if now is None or now - w.first_ts >= self.window:
+                del self.open[feature]
+                self._due.append(w)
+
+    def _summary(self, w):
+        s = Sample(w.first_ts, w.feature, w.lead.value)
+        s.z = w.max_z
+        s.severity = w.severity
+        s.flagged = s.alert = True
+        s.window = w
+        return s
+
+    def __call__(self, batches):
+        for batch in batches:
+            out = []
+            for s in batch:
+                out.append(s)
+                if s.flagged:
+                    self.flagged += 1
+                    w = self.open.get(s.feature)
+                    if w is None:
+                        self.open[s.feature] = AlertWindow(s)
+                    else:
+                        w.add(s)
+                if self.open:
+                    self.expire(s.t)
+            if self._due:
+                out.extend(self._summary(w) for w in self._due)
+                self.emitted += len(self._due)
+                self._due = []
+            yield out
+
+
+# Sinks
+
+class QueueSink:
+    """
+    Publishes Alert records to anomaly_queue and throttled Stats to stats_queue.
+    messages maps feature -> callable(sample) building the alert text, called only if the
+    message is read; carry lists features whose latest value is attached to every stats
+    update (a Stats field, e.g. "wpm").
+
+    After hold(), stats are no longer throttled per event: the latest stats sample is only
+    stored, and publish_held() (a scheduled task) publishes it once per stats_interval.
+    """
+    def __init__(self, source, anomaly_queue, stats_queue, profile, stats_feature, messages,
+                 stats_interval=0.5, stable_after=30, carry=()):
+        self.source = Source.coerce(source)
+        self.anomaly_queue = anomaly_queue
+        self.stats_queue = stats_queue
+        self.profile = profile
+        self.stats_feature = stats_feature
+        self.messages = messages
+        self.stats_interval = stats_interval
+        self.stable_after = stable_after
+        self.carried = {name: 0 for name in carry}
+        self._last_stat_ts = 0.0
+        self.holding = False
+        self._held = None
+
+    def hold(self):
+        self.holding = True
+
+    def publish_held(self):
+        held, self._held = self._held, None
+        if held is not None:
+            self.publish_stats(*held, force=True)
+
+    def publish_stats(self, t, z=None, note=None, force=False):
+        if not force and t - self._last_stat_ts < self.stats_interval:
+            return
+        self._last_stat_ts = t
+        p = self.profile
+        self.stats_queue.put(Stats(
+            self.source,
+            p.mean,
+            p.std() if p.mean is not None else None,
+            z,
+            note or ("Adapting" if p.count < self.stable_after else "Stable"),
+            ts=t,
+            **self.carried
+        ))
+
+    def __call__(self, batches):
+        for batch in batches:
+            for s in batch:
+                if s.alert:
+                    w = s.window
+                    self.anomaly_queue.put(Alert(self.source, s.severity, s.t,
+                                                 fmt=self.messages[s.feature], data=s,
+                                                 count=w.count if w else 1,
+                                                 last_ts=w.last_ts if w else s.t, z=s.z))
+                    if w is not None:
+                        # Window summary, not a new observation
+                        continue
+                if s.feature in self.carried:
+                    self.carried[s.feature] = s.value
+                elif s.feature == self.stats_feature:
+                    if self.holding:
+                        self._held = (s.t, s.z, s.note)
+                    else:
+                        self.publish_stats(s.t, z=s.z, note=s.note)
+            yield batch
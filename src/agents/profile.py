@@ -0,0 +1,124 @@
+import math
+
+from .sketch import P2Quantile
+
+THRESHOLD_MODES = ("zscore", "quantile")
+BASELINES = ("global", "hour_of_week")
+
+
+class AdaptiveProfile:
+    """
+    Exponential moving average profile of a single behavioural signal.
+    threshold="zscore" flags values more than sigma standard deviations from the mean.
+    threshold="quantile" additionally keeps a decaying P-square sketch of the lower and
+    upper tails and flags values outside [1 - quantile, quantile], which holds up better
+    on heavy-tailed signals such as inter-key delays and app-switch gaps.
+    baseline="hour_of_week" keeps a second, time-of-week conditioned mean/std and uses it
+    for the z-score whenever the current hour has enough history.
+    """
+    def __init__(self, alpha=0.01, threshold="zscore", quantile=0.99, decay=0.001,
+                 baseline="global"):
+        if threshold not in THRESHOLD_MODES:
+            raise ValueError(f"Unknown threshold mode: {threshold}")
+        if baseline not in BASELINES:
+            raise ValueError(f"Unknown baseline: {baseline}")
+        self.alpha = alpha
+        self.threshold = threshold
+        self.quantile = quantile
+        self.decay = decay
+        self.baseline = baseline
+        self.seasonal = None
+        if baseline == "hour_of_week":
+            # numpy-backed; only loaded when a profile actually asks for it
+            from .seasonal import HourOfWeekBaseline
+            self.seasonal = HourOfWeekBaseline(alpha=alpha)
+        self.reset()
+
+    def reset(self):
+        self.mean = None
+        self.var = None
+        self.count = 0
+        if self.threshold == "quantile":
+            self.low = P2Quantile(1.0 - self.quantile, decay=self.decay)
+            self.high = P2Quantile(self.quantile, decay=self.decay)
+        else:
+            self.low = self.high = None
+        if self.seasonal is not None:
+            self.seasonal.reset()
+
+    def std(self):
+        return (self.var ** 0.5) if self.var is not None else 0.0
+
+    def _moments(self, ts):
+        if self.seasonal is not None and ts is not None:
+            found = self.seasonal.lookup(ts)
+            if found is not None:
+                return float(found[0][0]), float(found[1][0])
+        return self.mean, self.std()
+
+    def zscore(self, value, min_count=10, ts=None):
+        if self.mean is None or self.count <= min_count:
+            return None
+        mean, std = self._moments(ts)
+        if std <= 1e-6:
+            return None
+        return abs(value - mean) / max(std, 1e-6)
+
+    def check(self, value, sigma, min_count=10, side="both", ts=None):
+        """Return (z, flagged) for value against the profile before it is updated."""
+        z = self.zscore(value, min_count, ts)
+        if self.threshold == "quantile":
+            if self.count <= min_count or not self.high.ready:
+                return z, False
+            low = side != "high" and value < self.low.value()
+            high = side != "low" and value > self.high.value()
+            return z, low or high
+
+        if z is None:
+            return None, False
+        mean, std = self._moments(ts)
+        if side == "low":
+            return z, value < mean - sigma * std
+        if side == "high":
+            return z, value > mean + sigma * std
+        return z, z > sigma
+
+    def update(self, value, ts=None):
+        if self.mean is None:
+            self.mean = value
+            self.var = 0.0
+            self.count = 1
+        else:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += self.alpha * delta
+            self.var = (1 - self.alpha) * self.var + self.alpha * (delta ** 2)
+        if self.high is not None:
+            self.low.update(value)
+            self.high.update(value)
+        if self.seasonal is not None and ts is not None:
+            self.seasonal.update(ts, (value,))
+
+    def state(self):
+        """Flat dict of arrays suitable for np.savez."""
+        import numpy as np
+        state = {
+            "mean": np.array(math.nan if self.mean is None else self.mean),
+            "var": np.array(math.nan if self.var is None else self.var),
+            "count": np.array(self.count)
+        }
+        for name, part in (("low", self.low), ("high", self.high), ("seasonal", self.seasonal)):
+            if part is not None:
+                state.update({f"{name}.{k}": v for k, v in part.state().items()})
+        return state
+
+    def load_state(self, state):
+        mean = float(state["mean"])
+        self.mean = None if math.isnan(mean) else mean
+        self.var = None if self.mean is None else float(state["var"])
+        self.count = int(state["count"])
+        for name, part in (("low", self.low), ("high", self.high), ("seasonal", self.seasonal)):
+            prefix = name + "."
+            sub = {k[len(prefix):]: v for k, v in state.items() if k.startswith(prefix)}
+            if part is not None and sub:
+                part.load_state(sub)
@@ -0,0 +1,183 @@
+"""
+Columnar EMA profiles for scoring many users at once.
+
+A ProfileTable holds the state of one behavioural signal for every user as a NumPy
+structured array (mean, var, count per row) with a key -> row index, and scores and updates
+whole event blocks with array operations. It follows AdaptiveProfile's global z-score mode
+exactly: each event is scored against its user's profile as it was just before that event,
+then folded in, in block order. Events of different users are independent, so a block is
+applied in rounds: round r takes every user's r-th event of the block, and a block from many
+users needs only as many rounds as its busiest user has events.
+
+Quantile thresholds and hour-of-week baselines keep per-profile sketches and stay on
+AdaptiveProfile.
+"""
+import os
+
+import numpy as np
+
+from .profile import AdaptiveProfile
+
+DTYPE = np.dtype([("mean", "f8"), ("var", "f8"), ("count", "i8")])
+
+
+class ProfileTable:
+    """
+    One signal's profiles keyed by user id (int or str). score_update() is the vectorized
+    equivalent of AdaptiveProfile.check() followed by update() for every event of a block.
+    """
+    def __init__(self, alpha=0.01, capacity=1024):
+        self.alpha = alpha
+        self.rows = np.zeros(max(1, capacity), DTYPE)
+        self.keys = []
+        self.index = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    @property
+    def table(self):
+        """The live rows as a structured array view (mean, var, count)."""
+        return self.rows[:len(self.keys)]
+
+    def _grow(self, size):
+        if size > len(self.rows):
+            rows = np.zeros(max(size, 2 * len(self.rows)), DTYPE)
+            rows[:len(self.keys)] = self.rows[:len(self.keys)]
+            self.rows = rows
+
+    def lookup(self, keys, create=True):
+        """Row index of every key; unknown keys get fresh rows, or -1 with create=False."""
+        index = self.index
+        keys = keys.tolist() if isinstance(keys, np.ndarray) else list(keys)
+        rows = np.fromiter((index.get(k, -1) for k in keys), np.int64, len(keys))
+        if create and (rows < 0).any():
+            for i in np.flatnonzero(rows < 0).tolist():
+                key = keys[i]
+                row = index.get(key)
+                if row is None:
+                    row = index[key] = len(self.keys)
+                    self.keys.append(key)
+                rows[i] = row
+            self._grow(len(self.keys))
+        return rows
+
+    def _score(self, rows, values, sigma, min_count, side):
+        r = self.rows[rows]
+        std = np.sqrt(r["var"])
+        ready = (r["count"] > min_count) & (std > 1e-6)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z = np.where(ready, np.abs(values - r["mean"]) / np.maximum(std, 1e-6), np.nan)
+        if side == "low":
+            flagged = ready & (values < r["mean"] - sigma * std)
+        elif side == "high":
+            flagged = ready & (values > r["mean"] + sigma * std)
+        else:
+            flagged = ready & (z > sigma)
+        return z, flagged
+
+    def _update(self, rows, values):
+        """Fold one value into each row; rows must be distinct."""
+        a = self.alpha
+        r = self.rows[rows]
+        first = r["count"] == 0
+        delta = values - r["mean"]
+        mean = np.where(first, values, r["mean"] + a * delta)
+        var = np.where(first, 0.0, (1 - a) * r["var"] + a * delta * delta)
+        self.rows["mean"][rows] = mean
+        self.rows["var"][rows] = var
+        self.rows["count"][rows] = r["count"] + 1
+
+    @staticmethod
+    def _rounds(rows):
+        """Event indices grouped by their position within their row's run, in block order."""
+        if not len(rows):
+            return []
+        order = np.argsort(rows, kind="stable")
+        sorted_rows = rows[order]
+        starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+        rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+        if len(rows) == len(starts):
+            return [order]
+        by_rank = np.argsort(rank, kind="stable")
+        bounds = np.flatnonzero(np.diff(rank[by_rank])) + 1
+        return np.split(order[by_rank], bounds)
+
+    def score_update(self, keys, values, sigma=3.0, min_count=10, side="both", rows=None):
+        """
+        Score every event against its user's profile as of that event, then fold it in.
+        Returns (z, flagged) arrays aligned with the block; z is NaN until a profile is ready.
+        Pass rows (from lookup()) instead of keys to skip the key lookup on repeated blocks.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if rows is None:
+            rows = self.lookup(keys)
+        z = np.empty(len(values))
+        flagged = np.empty(len(values), dtype=bool)
+        for part in self._rounds(rows):
+            z[part], flagged[part] = self._score(rows[part], values[part], sigma, min_count, side)
+            self._update(rows[part], values[part])
+        return z, flagged
+
+    def score(self, keys, values, sigma=3.0, min_count=10, side="both"):
+        """Score against the current profiles without updating them; unknown keys are never flagged."""
+        values = np.asarray(values, dtype=np.float64)
+        rows = self.lookup(keys, create=False)
+        known = rows >= 0
+        z = np.full(len(values), np.nan)
+        flagged = np.zeros(len(values), dtype=bool)
+        z[known], flagged[known] = self._score(rows[known], values[known], sigma, min_count, side)
+        return z, flagged
+
+    def update(self, keys, values, rows=None):
+        values = np.asarray(values, dtype=np.float64)
+        if rows is None:
+            rows = self.lookup(keys)
+        for part in self._rounds(rows):
+            self._update(rows[part], values[part])
+
+    # AdaptiveProfile interchange
+
+    def set_profile(self, key, profile):
+        row = self.lookup([key])[0]
+        self.rows[row] = (profile.mean if profile.mean is not None else 0.0,
+                          profile.var if profile.var is not None else 0.0, profile.count)
+
+    def to_profile(self, key):
+        """An AdaptiveProfile (global z-score) with this user's state."""
+        profile = AdaptiveProfile(alpha=self.alpha)
+        row = self.index.get(key)
+        if row is not None and self.rows["count"][row] > 0:
+            mean, var, count = self.rows[row].tolist()
+            profile.mean, profile.var, profile.count = mean, var, count
+        return profile
+
+    # Persistence
+
+    def save(self, path):
+        """Write the table atomically as an uncompressed .npz (loads with a single read per column)."""
+        keys = np.asarray(self.keys) if self.keys else np.zeros(0, np.int64)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(fh, rows=self.table, keys=keys, alpha=np.array(self.alpha))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            rows, keys = data["rows"], data["keys"].tolist()
+            table = cls(alpha=float(data["alpha"]), capacity=len(rows))
+        table.rows[:len(rows)] = rows
+        table.keys = keys
+        table.index = dict(zip(keys, range(len(keys))))
+        if len(table.index) != len(keys):
+            raise ValueError(f"duplicate keys in {path}")
+        return table
+
+    def __repr__(self):
+        ready = int(np.count_nonzero(self.table["count"] > 0))
+        return f"ProfileTable({len(self)} profiles, {ready} with data, alpha={self.alpha})"
@@ -0,0 +1,410 @@
+"""
+Local publish/subscribe stream of alerts and stats for external consumers (a SIEM
+forwarder, a lock-screen helper).
+
+EventPublisher listens on a Unix socket (or loopback TCP where Unix sockets are missing;
+other TCP hosts are refused, the stream has no authentication) and has the queue-side interface of HistoryStore: add_alert()/add_stats() only append to a
+pending list, so the engine never waits on a subscriber. A single publisher thread takes
+everything that arrived within flush_interval of the first pending record, encodes it
+once per distinct topic filter as wire frames (agents/wire.py, the fleet collector's
+format) and queues the bytes to each matching subscriber. Sockets are non-blocking, and
+each subscriber's queue is bounded by max_buffer bytes: a subscriber that stops reading
+loses its oldest frames (counted in dropped) instead of slowing anyone else. The thread
+sleeps in select() without a timeout while nothing is pending.
+
+A subscriber connects and sends one subscription frame, then only reads:
+
+    4-byte big-endian body length, then  >BBB  version, kinds, min severity
+                                         >B    number of sources, each >B length + UTF-8 name
+
+kinds is a bit mask (1 alerts, 2 stats); no sources means every source; min severity
+applies to alerts only. EventSubscriber implements the client side.
+"""
+import ipaddress
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+from .records import Severity, Source
+from .wire import LENGTH, decode_frame, encode_frames, parse_address
+
+VERSION = 1
+ALERTS = 1
+STATS = 2
+MAX_SUBSCRIPTION = 4096
+
+_SUBSCRIPTION = struct.Struct(">BBB")
+
+
+def encode_subscription(kinds=ALERTS | STATS, sources=(), min_severity=Severity.LOW):
+    names = [str(Source.coerce(s)).encode("utf-8")[:255] for s in sources]
+    body = _SUBSCRIPTION.pack(VERSION, kinds, int(Severity.coerce(min_severity))) + bytes([len(names)])
+    body += b"".join(bytes([len(n)]) + n for n in names)
+    return LENGTH.pack(len(body)) + body
+
+
+def decode_subscription(body):
+    """(kinds, frozenset of source names or None for all, min severity) from a request body."""
+    try:
+        version, kinds, min_severity = _SUBSCRIPTION.unpack_from(body, 0)
+        if version != VERSION:
+            raise ValueError(f"unsupported subscription version {version}")
+        offset = _SUBSCRIPTION.size
+        count = body[offset]
+        offset += 1
+        sources = []
+        for _ in range(count):
+            n = body[offset]
+            sources.append(body[offset + 1:offset + 1 + n].decode("utf-8"))
+            offset += 1 + n
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"malformed subscription: {e}") from None
+    return kinds, frozenset(sources) or None, min_severity
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def listen(address, backlog=64):
+    """
+    Listening socket for a publisher address; a stale Unix socket file is replaced.
+    Raises ValueError for a TCP host other than loopback.
+    """
+    family, addr = parse_address(address)
+    if family == "unix":
+        os.makedirs(os.path.dirname(addr) or ".", exist_ok=True)
+        if os.path.exists(addr):
+            os.remove(addr)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Alerts describe the user's behaviour: only the same account may subscribe, from the
+        # moment the socket file exists
+        umask = os.umask(0o077)
+        try:
+            sock.bind(addr)
+        except OSError:
+            sock.close()
+            raise
+        finally:
+            os.umask(umask)
+        os.chmod(addr, 0o600)
+    else:
+        if not _is_loopback(addr[0]):
+            raise ValueError(f"event stream must listen on loopback, not {addr[0]}")
+        sock = socket.create_server(addr, family=socket.AF_INET6 if ":" in addr[0] else socket.AF_INET)
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock, family, addr
+
+
+class _Subscriber:
+    __slots__ = ("sock", "inbox", "topic", "frames", "size", "offset", "sent", "dropped")
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbox = b""
+        self.topic = None
+        self.frames = deque()
+        self.size = 0
+        self.offset = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def enqueue(self, frame, max_buffer):
+        self.frames.append(frame)
+        self.size += len(frame)
+        # Drop whole frames from the front, never the one already partly written
+        while self.size > max_buffer and len(self.frames) > 1 + (self.offset > 0):
+            index = 1 if self.offset else 0
+            old = self.frames[index]
+            del self.frames[index]
+            self.size -= len(old)
+            self.dropped += 1
+
+    def send(self):
+        """Write as much as the socket takes; False if the subscriber went away."""
+        while self.frames:
+            head = self.frames[0]
+            try:
+                n = self.sock.send(memoryview(head)[self.offset:])
+            except (BlockingIOError, InterruptedError):
+                return True
+            except OSError:
+                return False
+            self.offset += n
+            if self.offset < len(head):
+                return True
+            self.frames.popleft()
+            self.size -= len(head)
+            self.offset = 0
+            self.sent += 1
+        return True
+
+
+class EventPublisher:
+    """Queue-side interface matches HistoryStore: add_alert(), add_stats(), close()."""
+    def __init__(self, address, endpoint=None, flush_interval=0.02, batch_size=2000, max_buffer=1 << 20,
+                 max_pending=50000):
+        self.address = address
+        self.endpoint = endpoint or socket.gethostname()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.published = 0
+        self.frames = 0
+        # Records lost because the publisher thread fell max_pending behind the producers
+        self.overflow = 0
+        # Records left out of a topic's frames because they could not be encoded
+        self.failed = 0
+        self._dropped_gone = 0
+
+        self._lock = threading.Lock()
+        self._alerts = deque(maxlen=max_pending)
+        self._stats = deque(maxlen=max_pending)
+        self._signalled = False
+        self._subscribers = {}
+        self._sock, self._family, self._path = listen(address)
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._sock, selectors.EVENT_READ, "accept")
+        self._selector.register(self._wake_r, selectors.EVENT_READ, "wake")
+        self._closing = False
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    # Producers
+
+    def _append(self, pending, record):
+        with self._lock:
+            if len(pending) == pending.maxlen:
+                self.overflow += 1
+            pending.append(record)
+            # Wake the thread for the first record (it then waits flush_interval for more)
+            # and again once a full batch is waiting, so bursts go out without delay
+            if self._signalled and len(pending) != self.batch_size:
+                return
+            self._signalled = True
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+
+    def add_alert(self, alert):
+        self._append(self._alerts, alert)
+
+    def add_stats(self, stats):
+        self._append(self._stats, stats)
+
+    # Publisher thread
+
+    def _loop(self):
+        flush_at = None
+        while not self._closing:
+            timeout = None if flush_at is None else max(0.0, flush_at - time.monotonic())
+            for key, mask in self._selector.select(timeout):
+                if key.data == "accept":
+                    self._accept()
+                elif key.data == "wake":
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, InterruptedError):
+                        pass
+                    if flush_at is None:
+                        flush_at = time.monotonic() + self.flush_interval
+                    if max(len(self._alerts), len(self._stats)) >= self.batch_size:
+                        flush_at = 0.0
+                else:
+                    self._service(key.fileobj, key.data, mask)
+            if flush_at is not None and time.monotonic() >= flush_at:
+                flush_at = None
+                self._flush()
+        self._flush()
+        for sub in list(self._subscribers.values()):
+            sub.send()
+            self._drop(sub)
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            conn.setblocking(False)
+            sub = _Subscriber(conn)
+            self._subscribers[conn] = sub
+            self._selector.register(conn, selectors.EVENT_READ, sub)
+
+    def _drop(self, sub):
+        self._subscribers.pop(sub.sock, None)
+        self._dropped_gone += sub.dropped
+        try:
+            self._selector.unregister(sub.sock)
+        except (KeyError, ValueError):
+            pass
+        sub.sock.close()
+
+    def _service(self, sock, sub, mask):
+        if mask & selectors.EVENT_READ:
+            try:
+                data = sock.recv(MAX_SUBSCRIPTION)
+            except (BlockingIOError, InterruptedError):
+                data = None
+            except OSError:
+                data = b""
+            if data == b"":
+                self._drop(sub)
+                return
+            if data and sub.topic is None:
+                sub.inbox += data
+                if len(sub.inbox) >= LENGTH.size:
+                    (n,) = LENGTH.unpack_from(sub.inbox, 0)
+                    if n > MAX_SUBSCRIPTION:
+                        self._drop(sub)
+                        return
+                    if len(sub.inbox) >= LENGTH.size + n:
+                        try:
+                            sub.topic = decode_subscription(sub.inbox[LENGTH.size:LENGTH.size + n])
+                        except ValueError:
+                            self._drop(sub)
+                            return
+                        sub.inbox = b""
+        if mask & selectors.EVENT_WRITE:
+            self._send(sub)
+
+    def _send(self, sub):
+        if not sub.send():
+            self._drop(sub)
+            return
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if sub.frames else 0)
+        try:
+            self._selector.modify(sub.sock, events, sub)
+        except (KeyError, ValueError):
+            pass
+
+    @staticmethod
+    def _select(topic, alerts, stats):
+        kinds, sources, min_severity = topic
+        picked_alerts = [a for a in alerts if int(a.severity) >= min_severity and
+                         (sources is None or str(a.source) in sources)] if kinds & ALERTS else []
+        picked_stats = [s for s in stats if sources is None or str(s.source) in sources] if kinds & STATS else []
+        return picked_alerts, picked_stats
+
+    def _flush(self):
+        with self._lock:
+            alerts, stats = list(self._alerts), list(self._stats)
+            self._alerts.clear()
+            self._stats.clear()
+            self._signalled = False
+        if not alerts and not stats:
+            return
+        self.published += len(alerts) + len(stats)
+        # Subscribers with the same filter share the encoded frames
+        encoded = {}
+        for sub in list(self._subscribers.values()):
+            if sub.topic is None:
+                continue
+            frames = encoded.get(sub.topic)
+            if frames is None:
+                picked_alerts, picked_stats = self._select(sub.topic, alerts, stats)
+                # Split by encoded size: a backlog of long messages must not exceed MAX_FRAME
+                try:
+                    framed, failed = encode_frames(self.endpoint, picked_alerts, picked_stats)
+                except Exception as e:
+                    print(f"Event stream encoding error: {e}")
+                    framed, failed = [], len(picked_alerts) + len(picked_stats)
+                self.failed += failed
+                frames = encoded[sub.topic] = [frame for frame, _, _ in framed]
+            for frame in frames:
+                sub.enqueue(frame, self.max_buffer)
+                self.frames += 1
+            if frames:
+                self._send(sub)
+
+    # Introspection and shutdown
+
+    @property
+    def dropped(self):
+        """Frames discarded from full subscriber buffers, over all subscribers so far."""
+        return self._dropped_gone + sum(sub.dropped for sub in list(self._subscribers.values()))
+
+    def subscribers(self):
+        """(sent frames, queued bytes, dropped frames, topic) per connected subscriber."""
+        return [(sub.sent, sub.size, sub.dropped, sub.topic) for sub in list(self._subscribers.values())]
+
+    def memory_usage(self):
+        return sum(sub.size for sub in list(self._subscribers.values()))
+
+    def close(self):
+        """Deliver what is pending as far as sockets allow, disconnect everyone and stop."""
+        self._closing = True
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+        self._thread.join(timeout=2.0)
+        self._selector.close()
+        self._sock.close()
+        self._wake_r.close()
+        self._wake_w.close()
+        if self._family == "unix" and os.path.exists(self._path):
+            os.remove(self._path)
+
+
+class EventSubscriber:
+    """
+    Client side: connects, subscribes and yields (alerts, stats) batches, one per frame.
+    Iteration ends when the publisher goes away.
+    """
+    def __init__(self, address, kinds=ALERTS | STATS, sources=(), min_severity=Severity.LOW, timeout=None):
+        family, addr = parse_address(address)
+        if family == "unix":
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET6 if ":" in addr[0] else socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(addr)
+        self.sock.sendall(encode_subscription(kinds, sources, min_severity))
+        self._file = self.sock.makefile("rb")
+
+    def recv(self):
+        """Next (alerts, stats) batch, or None once the stream has ended."""
+        header = self._file.read(LENGTH.size)
+        if len(header) < LENGTH.size:
+            return None
+        (n,) = LENGTH.unpack(header)
+        body = self._file.read(n)
+        if len(body) < n:
+            return None
+        _, alerts, stats = decode_frame(body)
+        return alerts, stats
+
+    def __iter__(self):
+        while True:
+            batch = self.recv()
+            if batch is None:
+                return
+            yield batch
+
+    def close(self):
+        self._file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,144 @@
+"""
+Record types shared by the agents, sinks, recorders and the dashboard.
+
+Input events stay tuples (kind first, timestamp second) so pipeline stages can unpack
+them cheaply; the namedtuple types below name their fields without adding per-event
+storage. Alerts and stats are __slots__ records with enum-coded source and severity.
+An alert's message is only formatted when something reads it.
+"""
+from collections import namedtuple
+from enum import IntEnum
+
+MoveEvent = namedtuple("MoveEvent", "kind t x y")
+KeyEvent = namedtuple("KeyEvent", "kind t is_char")
+FocusEvent = namedtuple("FocusEvent", "kind t app")
+
+EVENT_TYPES = {"move": MoveEvent, "key": KeyEvent, "focus": FocusEvent}
+
+
+def make_event(fields):
+    """Typed event from a raw sequence such as a decoded recording line."""
+    cls = EVENT_TYPES.get(fields[0])
+    return cls._make(fields) if cls is not None else tuple(fields)
+
+
+class _Labelled(IntEnum):
+    """IntEnum that prints as its label, so alerts read the same as the old string values."""
+    def __str__(self):
+        return self.label
+
+    def __format__(self, spec):
+        return format(self.label, spec)
+
+    @classmethod
+    def coerce(cls, value):
+        """Enum member for a label such as "AppUsage"; unknown labels pass through as str."""
+        if isinstance(value, cls):
+            return value
+        return cls._by_label().get(value, value)
+
+    @classmethod
+    def _by_label(cls):
+        return {member.label: member for member in cls}
+
+
+class Source(_Labelled):
+    MOVEMENT = 1
+    TYPING = 2
+    APP_USAGE = 3
+    FUSION = 4
+
+    @property
+    def label(self):
+        return _SOURCE_LABELS[self]
+
+
+class Severity(_Labelled):
+    """Ordered by weight; the value is also the risk points an alert adds."""
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+
+    @property
+    def label(self):
+        return self.name.capitalize()
+
+
+_SOURCE_LABELS = {
+    Source.MOVEMENT: "Movement",
+    Source.TYPING: "Typing",
+    Source.APP_USAGE: "AppUsage",
+    Source.FUSION: "Fusion"
+}
+
+
+class Alert:
+    """
+    One anomaly, or a window of repeated ones: count flagged samples from ts to last_ts,
+    z the largest z-score among them. The message is built by fmt(data) on first access and
+    cached, so sinks that only count or store alerts never pay for string formatting.
+    Alerts are read from several threads (history writer, UI, event stream): the message is
+    built in a local and published with one assignment, and fmt/data are never cleared, so a
+    concurrent reader at worst formats the same string twice.
+    """
+    __slots__ = ("source", "severity", "ts", "count", "last_ts", "z", "_message", "_fmt", "_data")
+
+    def __init__(self, source, severity, ts, message=None, fmt=None, data=None,
+                 count=1, last_ts=None, z=None):
+        self.source = source
+        self.severity = severity
+        self.ts = ts
+        self.count = count
+        self.last_ts = ts if last_ts is None else last_ts
+        self.z = z
+        self._message = message
+        self._fmt = fmt
+        self._data = data
+
+    @property
+    def message(self):
+        message = self._message
+        if message is None and self._fmt is not None:
+            message = self._fmt(self._data)
+            if self.count > 1:
+                message += f" [x{self.count} over {self.last_ts - self.ts:.1f}s]"
+            self._message = message
+        return message or ""
+
+    def to_dict(self):
+        return {
+            "source": str(self.source),
+            "severity": str(self.severity),
+            "message": self.message,
+            "ts": self.ts,
+            "last_ts": self.last_ts,
+            "count": self.count,
+            "z": self.z
+        }
+
+    def __repr__(self):
+        return f"Alert({self.source}, {self.severity}, ts={self.ts}, count={self.count})"
+
+
+class Stats:
+    """Snapshot of one agent's profile for the dashboard. wpm is only set by the Typing agent."""
+    __slots__ = ("source", "mean", "std", "z", "note", "wpm", "ts")
+
+    def __init__(self, source, mean=None, std=None, z=None, note=None, wpm=None, ts=None):
+        self.source = source
+        self.mean = mean
+        self.std = std
+        self.z = z
+        self.note = note
+        self.wpm = wpm
+        self.ts = ts
+
+    def to_dict(self):
+        data = {"source": str(self.source), "mean": self.mean, "std": self.std,
+                "z": self.z, "note": self.note, "ts": self.ts}
+        if self.wpm is not None:
+            data["wpm"] = self.wpm
+        return data
+
+    def __repr__(self):
+        return f"Stats({self.source}, note={self.note})"
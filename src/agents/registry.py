@@ -0,0 +1,126 @@
+"""
+Agent registry and declarative per-agent configuration.
+
+Built-in agents are listed here; third-party detectors register under the
+"guardio.agents" entry-point group (value "package.module:AgentClass"). An agent's
+module is only imported when the agent is enabled and instantiated, so deployments pay
+only for the detectors they run.
+
+Configuration is JSON, by default ~/.guardio/agents.json (or $GUARDIO_AGENT_CONFIG):
+
+    {"agents": {"Typing": {"enabled": true, "sigma": 2.5, "cooldown": 5,
+                           "sampling_rate": 20, "batch_size": 256,
+                           "options": {"threshold": "quantile"}},
+                "AppUsage": {"enabled": false}}}
+
+sigma/cooldown of null follow the dashboard sliders; options are passed to the
+agent constructor as keyword arguments.
+"""
+import importlib
+import inspect
+import json
+import os
+
+ENTRY_POINT_GROUP = "guardio.agents"
+DEFAULT_CONFIG_PATH = os.path.join(os.path.expanduser("~"), ".guardio", "agents.json")
+
+AGENT_DEFAULTS = {
+    "enabled": True,
+    "sigma": None,
+    "cooldown": None,
+    "sampling_rate": None,
+    "batch_size": None,
+    "options": {}
+}
+
+
+class AgentSpec:
+    """Describes an agent without importing it. target is "module:Class"."""
+    def __init__(self, name, target, description="", defaults=None, fusion_source=False):
+        self.name = name
+        self.target = target
+        self.description = description or f"{name} detector"
+        self.defaults = dict(AGENT_DEFAULTS, **(defaults or {}))
+        self.fusion_source = fusion_source
+
+    def load(self):
+        module_name, _, attr = self.target.partition(":")
+        package = __package__ if module_name.startswith(".") else None
+        return getattr(importlib.import_module(module_name, package), attr)
+
+    def create(self, *args, **kwargs):
+        """Instantiate the agent, passing only keyword arguments its constructor accepts."""
+        cls = self.load()
+        params = inspect.signature(cls).parameters
+        if not any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values()):
+            kwargs = {k: v for k, v in kwargs.items() if k in params}
+        return cls(*args, **kwargs)
+
+
+BUILTIN_AGENTS = (
+    AgentSpec("Movement", ".movement_agent:MovementAgent", "Mouse movement pattern analysis",
+              {"sampling_rate": 20.0, "batch_size": 512}, fusion_source=True),
+    AgentSpec("Typing", ".typing_agent:TypingAgent", "Keystroke dynamics monitoring",
+              {"sampling_rate": 20.0, "batch_size": 512}, fusion_source=True),
+    AgentSpec("AppUsage", ".app_usage_agent:AppUsageAgent", "Application focus behavior",
+              {"sampling_rate": 0.5}, fusion_source=True),
+    AgentSpec("Fusion", ".fusion_agent:FusionAgent", "Cross-agent correlation analysis"),
+)
+
+
+class AgentRegistry:
+    """Ordered collection of agent specs plus their effective configuration."""
+    def __init__(self, specs=BUILTIN_AGENTS):
+        self.specs = {}
+        for spec in specs:
+            self.register(spec)
+        self.config = {}
+
+    def register(self, spec):
+        self.specs[spec.name] = spec
+
+    @classmethod
+    def discover(cls):
+        """Built-in agents plus any installed under the guardio.agents entry-point group."""
+        registry = cls()
+        try:
+            from importlib.metadata import entry_points
+            found = entry_points(group=ENTRY_POINT_GROUP)
+        except Exception:
+            found = ()
+        for ep in found:
+            if ep.name not in registry.specs:
+                # Plugins start disabled until the config file opts in
+                registry.register(AgentSpec(ep.name, ep.value, defaults={"enabled": False}))
+        return registry
+
+    def load_config(self, path=None):
+        """Merge a JSON config file over each spec's defaults. Missing file means defaults."""
+        path = path or os.environ.get("GUARDIO_AGENT_CONFIG") or DEFAULT_CONFIG_PATH
+        data = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                data = json.load(fh).get("agents", {})
+        self.configure(data)
+        return self
+
+    def configure(self, overrides):
+        for name, spec in self.specs.items():
+            cfg = dict(spec.defaults)
+            user = overrides.get(name, {})
+            cfg.update({k: v for k, v in user.items() if k != "options"})
+            cfg["options"] = dict(spec.defaults["options"], **user.get("options", {}))
+            self.config[name] = cfg
+            extra = overrides.get(name, {}).get("description")
+            if extra:
+                spec.description = extra
+        return self
+
+    def settings(self, name):
+        if name not in self.config:
+            self.configure({})
+        return self.config[name]
+
+    def enabled(self):
+        """Specs of enabled agents, in registration order."""
+        return [spec for name, spec in self.specs.items() if self.settings(name)["enabled"]]
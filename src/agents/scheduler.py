@@ -0,0 +1,266 @@
+"""
+Engine-wide scheduler: one thread running every periodic task on a hierarchical timer wheel.
+
+Time is counted in ticks (10 ms by default). The wheel has four levels of 256, 64, 64 and
+64 slots; a task due d ticks from now sits in the first level whose span covers d, and
+whole slots cascade down a level as the lower level wraps, so scheduling, cancelling and
+expiring a task are O(1) however many tasks there are. The thread sleeps until the next
+non-empty slot (found by scanning slot heads, not tasks) and runs everything due in that
+tick in one wakeup. Catching up after a suspend jumps between those slots the same way
+instead of stepping through every tick.
+
+Periodic tasks are aligned to multiples of their interval on the tick grid, so tasks with
+commensurate intervals (50 ms polling, 0.5 s stats, 30 s memory checks) share wakeups
+instead of drifting apart. With an ActivityMonitor, each reschedule goes through
+next_interval(), so periodic work backs off while the user is idle exactly as the agent
+loops did, and the first input brings every backed-off task back to its base rate.
+
+Every task keeps timing stats (runs, time spent, worst run, worst lateness) for stats().
+"""
+import threading
+import time
+
+LEVELS = (8, 6, 6, 6)
+
+
+class Task:
+    """A scheduled callable; returned by Scheduler.every() / call_later() for cancel()."""
+    __slots__ = ("name", "fn", "interval", "cap", "periodic", "due", "delay", "slot", "cancelled",
+                 "runs", "errors", "spent", "worst", "late")
+
+    def __init__(self, name, fn, interval, cap, periodic):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.cap = cap
+        self.periodic = periodic
+        self.due = 0
+        self.delay = interval
+        self.slot = None
+        self.cancelled = False
+        self.runs = 0
+        self.errors = 0
+        self.spent = 0.0
+        self.worst = 0.0
+        self.late = 0.0
+
+
+class Scheduler:
+    def __init__(self, tick=0.01, activity=None):
+        self.tick = tick
+        self.activity = activity
+        self._wheel = [[set() for _ in range(1 << bits)] for bits in LEVELS]
+        self._shifts = []
+        shift = 0
+        for bits in LEVELS:
+            self._shifts.append(shift)
+            shift += bits
+        self._horizon = (1 << shift) - 1
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._thread = None
+        self._stopping = False
+        self._rearm = False
+        self._start = time.monotonic()
+        self._now_tick = 0
+        self.tasks = []
+        self.wakeups = 0
+        if activity is not None:
+            activity.add_listener(self._on_active)
+
+    # Wheel
+
+    def _ticks(self, seconds):
+        return max(1, int(round(seconds / self.tick)))
+
+    def _insert(self, task):
+        delta = min(max(task.due - self._now_tick, 1), self._horizon)
+        task.due = self._now_tick + delta
+        for level, shift in enumerate(self._shifts):
+            if delta < (1 << (shift + LEVELS[level])) or level == len(LEVELS) - 1:
+                slot = self._wheel[level][(task.due >> shift) & ((1 << LEVELS[level]) - 1)]
+                slot.add(task)
+                task.slot = slot
+                return
+
+    def _remove(self, task):
+        if task.slot is not None:
+            task.slot.discard(task)
+            task.slot = None
+
+    def _cascade(self, level):
+        shift = self._shifts[level]
+        slot = self._wheel[level][(self._now_tick >> shift) & ((1 << LEVELS[level]) - 1)]
+        tasks = list(slot)
+        slot.clear()
+        for task in tasks:
+            task.slot = None
+            self._insert(task)
+
+    def _advance(self, target):
+        """Move the wheel to tick `target`, returning the tasks that came due on the way."""
+        due = []
+        while self._now_tick < target:
+            # Skip straight past ticks with nothing to run or cascade (a long suspend is one jump)
+            upcoming = self._next_tick()
+            if upcoming is None or upcoming > target:
+                self._now_tick = target
+                break
+            self._now_tick = max(self._now_tick, upcoming - 1) + 1
+            tick = self._now_tick
+            for level in range(1, len(LEVELS)):
+                if tick & ((1 << self._shifts[level]) - 1):
+                    break
+                self._cascade(level)
+            slot = self._wheel[0][tick & ((1 << LEVELS[0]) - 1)]
+            if slot:
+                for task in slot:
+                    task.slot = None
+                due.extend(slot)
+                slot.clear()
+        return due
+
+    def _next_tick(self):
+        """The next tick that has work (or a cascade that may bring some); None when empty."""
+        now = self._now_tick
+        for level, shift in enumerate(self._shifts):
+            slots = self._wheel[level]
+            size = len(slots)
+            base = now >> shift
+            cur = base & (size - 1)
+            for j in range(cur + 1, size):
+                if slots[j]:
+                    return (base + j - cur) << shift
+            # Entries behind the cursor belong to the next rotation: wake at the wrap to cascade
+            if any(slots[j] for j in range(cur + 1)):
+                return (base + size - cur) << shift
+        return None
+
+    # Tasks
+
+    def every(self, name, interval, fn, cap=None):
+        """Run fn() every `interval` seconds (backing off up to cap while the user is idle)."""
+        task = Task(name, fn, interval, cap, True)
+        with self._lock:
+            period = self._ticks(interval)
+            task.due = (self._now_tick // period + 1) * period
+            self._insert(task)
+            self.tasks.append(task)
+        self._event.set()
+        return task
+
+    def call_later(self, delay, fn, name=None):
+        """Run fn() once, `delay` seconds from now."""
+        task = Task(name or getattr(fn, "__name__", "call"), fn, delay, None, False)
+        with self._lock:
+            task.due = self._now_tick + self._ticks(delay)
+            self._insert(task)
+        self._event.set()
+        return task
+
+    def cancel(self, task):
+        with self._lock:
+            task.cancelled = True
+            self._remove(task)
+            if task in self.tasks:
+                self.tasks.remove(task)
+
+    def _reschedule(self, task):
+        delay = task.interval
+        if self.activity is not None:
+            delay = self.activity.next_interval(task.name, task.interval, task.cap)
+        task.delay = delay
+        period = self._ticks(delay)
+        task.due = (self._now_tick // period + 1) * period
+        self._insert(task)
+
+    def _on_active(self):
+        self._rearm = True
+        self._event.set()
+
+    def _rearm_tasks(self):
+        # Input after an idle spell: backed-off tasks return to their base rate now
+        self._rearm = False
+        for task in self.tasks:
+            if task.delay > task.interval and task.slot is not None:
+                self._remove(task)
+                task.delay = task.interval
+                period = self._ticks(task.interval)
+                task.due = (self._now_tick // period + 1) * period
+                self._insert(task)
+
+    # Thread
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="guardio-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.5):
+        """Stop the thread after the task it is running, if any; pending tasks are dropped."""
+        self._stopping = True
+        self._event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        if self.activity is not None:
+            self.activity.remove_listener(self._on_active)
+        with self._lock:
+            for task in self.tasks:
+                self._remove(task)
+            self.tasks = []
+
+    def wake(self):
+        self._event.set()
+
+    def _run(self):
+        clock = time.monotonic
+        while not self._stopping:
+            with self._lock:
+                target = self._next_tick()
+            timeout = None if target is None else max(0.0, self._start + target * self.tick - clock())
+            if timeout is None or timeout > 0:
+                self._event.wait(timeout)
+                self._event.clear()
+            if self._stopping:
+                break
+            now = clock()
+            with self._lock:
+                due = self._advance(int((now - self._start) / self.tick))
+                if self._rearm:
+                    self._rearm_tasks()
+            if not due:
+                continue
+            self.wakeups += 1
+            for task in due:
+                if task.cancelled or self._stopping:
+                    continue
+                started = clock()
+                task.late = max(task.late, started - (self._start + task.due * self.tick))
+                try:
+                    task.fn()
+                except Exception as e:
+                    task.errors += 1
+                    print(f"Scheduled task {task.name} failed: {e}")
+                elapsed = clock() - started
+                task.runs += 1
+                task.spent += elapsed
+                task.worst = max(task.worst, elapsed)
+                if task.periodic and not task.cancelled:
+                    with self._lock:
+                        self._reschedule(task)
+
+    def stats(self):
+        """{task name: runs, errors, mean/worst run time and worst lateness in ms, current interval}."""
+        with self._lock:
+            tasks = list(self.tasks)
+        return {task.name: {
+            "runs": task.runs,
+            "errors": task.errors,
+            "mean_ms": task.spent / task.runs * 1000.0 if task.runs else 0.0,
+            "worst_ms": task.worst * 1000.0,
+            "late_ms": task.late * 1000.0,
+            "interval": task.delay,
+        } for task in tasks}
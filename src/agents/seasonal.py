@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+
+HOURS_PER_WEEK = 168
+
+
+class HourOfWeekBaseline:
+    """
+    Behavioural baseline conditioned on the local hour of the week (Mon 00h = bucket 0).
+    Means, variances and counts live in preallocated (168 x features) arrays, so lookup and
+    update are O(1) per event. Lookups blend each bucket with its two neighbouring hours,
+    weighted by how much data each has seen, so sparse hours borrow from adjacent ones and
+    the baseline moves smoothly across hour boundaries.
+    """
+    def __init__(self, n_features=1, alpha=0.01, smoothing=0.25, min_count=10):
+        self.n_features = n_features
+        self.alpha = alpha
+        self.smoothing = smoothing
+        self.min_count = min_count
+        self.mean = np.zeros((HOURS_PER_WEEK, n_features))
+        self.var = np.zeros((HOURS_PER_WEEK, n_features))
+        self.count = np.zeros(HOURS_PER_WEEK, dtype=np.int64)
+        self._span = (0.0, 0.0, 0)
+
+    def reset(self):
+        self.mean.fill(0.0)
+        self.var.fill(0.0)
+        self.count.fill(0)
+
+    def bucket(self, ts):
+        """Hour-of-week index for ts; localtime is only consulted when the hour changes."""
+        start, end, b = self._span
+        if start <= ts < end:
+            return b
+        t = time.localtime(ts)
+        b = t.tm_wday * 24 + t.tm_hour
+        start = ts - t.tm_min * 60 - t.tm_sec - (ts % 1.0)
+        self._span = (start, start + 3600.0, b)
+        return b
+
+    def update(self, ts, values):
+        b = self.bucket(ts)
+        x = np.asarray(values, dtype=float)
+        n = self.count[b]
+        if n == 0:
+            self.mean[b] = x
+            self.var[b] = 0.0
+        else:
+            # Plain averaging until the bucket has ~1/alpha samples, EMA afterwards
+            a = max(self.alpha, 1.0 / (n + 1))
+            delta = x - self.mean[b]
+            self.mean[b] += a * delta
+            self.var[b] = (1 - a) * self.var[b] + a * (delta ** 2)
+        self.count[b] = n + 1
+
+    def lookup(self, ts):
+        """Return (mean, std) arrays for ts, or None while the neighbourhood is too sparse."""
+        b = self.bucket(ts)
+        idx = np.array([(b - 1) % HOURS_PER_WEEK, b, (b + 1) % HOURS_PER_WEEK])
+        counts = self.count[idx]
+        if counts.sum() < self.min_count:
+            return None
+        confidence = np.minimum(counts * self.alpha, 1.0)
+        w = np.array([self.smoothing / 2, 1.0 - self.smoothing, self.smoothing / 2]) * confidence
+        w = w / w.sum()
+        m = self.mean[idx]
+        mean = w @ m
+        # Variance of the mixture: within-bucket variance plus spread of the bucket means
+        var = w @ (self.var[idx] + m ** 2) - mean ** 2
+        return mean, np.sqrt(np.maximum(var, 0.0))
+
+    def state(self):
+        return {"mean": self.mean, "var": self.var, "count": self.count}
+
+    def load_state(self, state):
+        if state["mean"].shape != self.mean.shape:
+            return
+        self.mean[:] = state["mean"]
+        self.var[:] = state["var"]
+        self.count[:] = state["count"]
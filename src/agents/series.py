@@ -0,0 +1,199 @@
+"""
+Multi-resolution signal history for the dashboard sparklines.
+
+Samples are folded into fixed-width buckets at the finest resolution; each closed bucket is
+written to that level's ring and merged into the next coarser level's open bucket, so every
+horizon from a minute to a day is served from at most a few thousand pre-aggregated buckets.
+A window is then reduced to a fixed number of points with Largest-Triangle-Three-Buckets,
+which keeps the visually important peaks, so drawing cost depends on neither the horizon nor
+the event rate.
+"""
+import math
+import threading
+from array import array
+from bisect import bisect_left
+
+# (bucket seconds, buckets kept): 15 min at 1 s, 1 h at 5 s, 6 h at 30 s, 24 h at 2 min.
+# A window is served from the finest level that covers it, so it never spans more than 900 buckets.
+LEVELS = ((1.0, 900), (5.0, 720), (30.0, 720), (120.0, 720))
+
+_NAN = float("nan")
+
+
+def _zmax(a, b):
+    if math.isnan(a):
+        return b
+    return a if math.isnan(b) else max(a, b)
+
+
+def lttb(xs, ys, points):
+    """Indices of `points` samples chosen by Largest-Triangle-Three-Buckets."""
+    n = len(xs)
+    if points >= n or points < 3:
+        return list(range(n))
+    every = (n - 2) / (points - 2)
+    chosen = [0]
+    a = 0
+    for i in range(points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        # Third triangle vertex: average of the following bucket (the last point at the end)
+        nxt_end = min(int((i + 2) * every) + 1, n)
+        if nxt_end > end:
+            avg_x = sum(xs[end:nxt_end]) / (nxt_end - end)
+            avg_y = sum(ys[end:nxt_end]) / (nxt_end - end)
+        else:
+            avg_x, avg_y = xs[-1], ys[-1]
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        chosen.append(best)
+        a = best
+    chosen.append(n - 1)
+    return chosen
+
+
+class _Level:
+    """Ring of closed buckets plus the bucket currently being filled."""
+    COLUMNS = ("t", "sum", "count", "mean", "std", "zmax")
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.cols = {name: array("d", [_NAN]) * capacity for name in self.COLUMNS}
+        self.head = 0
+        self.size = 0
+        self.open = None
+
+    def write(self, bucket):
+        for name, value in zip(self.COLUMNS, bucket):
+            self.cols[name][self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def columns(self, since):
+        """Column lists of the buckets starting at or after since, oldest first, open bucket last."""
+        start = (self.head - self.size) % self.capacity
+        if start + self.size <= self.capacity:
+            cols = {name: col[start:start + self.size].tolist() for name, col in self.cols.items()}
+        else:
+            cols = {name: col[start:].tolist() + col[:self.head].tolist() for name, col in self.cols.items()}
+        # Buckets are written in time order, so the ring unrolls sorted by t
+        first = bisect_left(cols["t"], since)
+        if first:
+            cols = {name: col[first:] for name, col in cols.items()}
+        if self.open is not None and self.open[0] >= since:
+            for name, value in zip(self.COLUMNS, self.open):
+                cols[name].append(value)
+        return cols
+
+
+class SignalSeries:
+    """
+    History of one scored signal: bucket mean of the value, the profile's EMA mean/std at
+    bucket close, and the largest z-score in the bucket. add() runs on the agent thread and
+    is O(1) amortized; window() may be called from the UI thread.
+    """
+    def __init__(self, profile=None, levels=LEVELS):
+        self.profile = profile
+        self.levels = [_Level(res, cap) for res, cap in levels]
+        self._lock = threading.Lock()
+        self._t0 = None
+        self._sum = 0.0
+        self._count = 0
+        self._zmax = _NAN
+
+    def memory_usage(self):
+        """Bytes held by the preallocated rings (constant for the life of the series)."""
+        return sum(col.itemsize * len(col) for level in self.levels for col in level.cols.values())
+
+    def reset(self):
+        with self._lock:
+            for level in self.levels:
+                level.head = level.size = 0
+                level.open = None
+            self._t0 = None
+            self._sum = 0.0
+            self._count = 0
+            self._zmax = _NAN
+
+    def add(self, t, value, z=None):
+        res = self.levels[0].resolution
+        if self._t0 is None or t >= self._t0 + res:
+            if self._count:
+                self._close()
+            self._t0 = t - (t % res)
+            self._sum = 0.0
+            self._count = 0
+            self._zmax = _NAN
+        self._sum += value
+        self._count += 1
+        if z is not None and (z > self._zmax or math.isnan(self._zmax)):
+            self._zmax = z
+
+    def _band(self):
+        p = self.profile
+        if p is None or p.mean is None:
+            return _NAN, _NAN
+        return p.mean, p.std()
+
+    def _close(self):
+        mean, std = self._band()
+        bucket = (self._t0, self._sum, float(self._count), mean, std, self._zmax)
+        with self._lock:
+            self._push(0, bucket)
+
+    def _push(self, index, bucket):
+        level = self.levels[index]
+        level.write(bucket)
+        if index + 1 >= len(self.levels):
+            return
+        upper = self.levels[index + 1]
+        start = bucket[0] - (bucket[0] % upper.resolution)
+        if upper.open is not None and upper.open[0] != start:
+            closed, upper.open = tuple(upper.open), None
+            self._push(index + 1, closed)
+        if upper.open is None:
+            upper.open = [start, 0.0, 0.0, _NAN, _NAN, _NAN]
+        agg = upper.open
+        agg[1] += bucket[1]
+        agg[2] += bucket[2]
+        agg[3], agg[4] = bucket[3], bucket[4]
+        agg[5] = _zmax(agg[5], bucket[5])
+
+    def window(self, horizon, now, points=120):
+        """
+        Downsampled view of the last `horizon` seconds, served from the finest level that covers it:
+        {"t", "value", "mean", "std"} (LTTB on value) and {"zt", "z"} (LTTB on z), as lists.
+        """
+        level = self.levels[-1]
+        for candidate in self.levels:
+            if candidate.resolution * candidate.capacity >= horizon:
+                level = candidate
+                break
+        since = now - horizon
+        with self._lock:
+            cols = level.columns(since)
+        if level is self.levels[0] and self._count and self._t0 is not None and self._t0 >= since:
+            for name, value in zip(_Level.COLUMNS, (self._t0, self._sum, float(self._count)) +
+                                   self._band() + (self._zmax,)):
+                cols[name].append(value)
+
+        ts = cols["t"]
+        values = [total / n for total, n in zip(cols["sum"], cols["count"])]
+        keep = lttb(ts, values, points)
+        view = {
+            "t": [ts[i] for i in keep],
+            "value": [values[i] for i in keep],
+            "mean": [cols["mean"][i] for i in keep],
+            "std": [cols["std"][i] for i in keep]
+        }
+        zts = [t for t, z in zip(ts, cols["zmax"]) if not math.isnan(z)]
+        zs = [z for z in cols["zmax"] if not math.isnan(z)]
+        zkeep = lttb(zts, zs, points)
+        view["zt"] = [zts[i] for i in zkeep]
+        view["z"] = [zs[i] for i in zkeep]
+        return view
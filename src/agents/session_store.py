@@ -0,0 +1,369 @@
+"""
+Memory-mapped columnar session store.
+
+A session is a directory (by convention NAME.session) holding, per event kind, append-only
+segment files with one fixed-width column per event field:
+
+    move   t f8, x f4, y f4
+    key    t f8, is_char u1
+    focus  t f8, app u4      (index into focus.strings, one app name per line; 0 is "no app")
+
+A segment file is a 64-byte header (magic, version, rows, capacity) followed by its columns,
+each preallocated for `capacity` rows, so appending writes each column in place and then
+bumps the row count: a reader never sees a half-written row. Every `index_every`-th
+timestamp also goes to the segment's .idx file, a sparse index small enough to keep in
+memory. Timestamps are kept non-decreasing per kind (a clock stepping back is clamped),
+so seeking to a time is a bisect over segment start times, a search in the sparse index
+and a search within one index block: O(log n), touching a handful of pages however large
+the session. Reads mmap the segments and return NumPy views of the columns without
+copying, so scanning a feature over a range runs at memory bandwidth.
+
+SessionWriter is a pass-through pipeline stage like Recorder (and what the engine uses
+when record_path ends in .session); read_recording() replays a session like a JSON-lines
+recording.
+"""
+import bisect
+import heapq
+import json
+import mmap
+import os
+import struct
+import threading
+
+import numpy as np
+
+from .records import EVENT_TYPES
+
+SUFFIX = ".session"
+MAGIC = b"GSEG"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQ")
+HEADER_SIZE = 64
+ALIGN = 64
+
+COLUMNS = {
+    "move": (("t", "<f8"), ("x", "<f4"), ("y", "<f4")),
+    "key": (("t", "<f8"), ("is_char", "u1")),
+    "focus": (("t", "<f8"), ("app", "<u4")),
+}
+
+
+def is_session(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "focus.strings"))
+
+
+def _layout(kind, capacity):
+    """Byte offset of every column in a segment of this capacity, and the file size."""
+    offsets = {}
+    offset = HEADER_SIZE
+    for name, dtype in COLUMNS[kind]:
+        offsets[name] = offset
+        offset += -(-capacity * np.dtype(dtype).itemsize // ALIGN) * ALIGN
+    return offsets, offset
+
+
+def _segment_path(root, kind, seq):
+    return os.path.join(root, f"{kind}-{seq:06d}.seg")
+
+
+class _SegmentWriter:
+    def __init__(self, root, kind, seq, capacity, index_every):
+        self.kind = kind
+        self.path = _segment_path(root, kind, seq)
+        self.capacity = capacity
+        self.index_every = index_every
+        self.offsets, size = _layout(kind, capacity)
+        self.rows = 0
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        # Sparse file: untouched column space takes no disk
+        os.ftruncate(self.fd, size)
+        os.pwrite(self.fd, HEADER.pack(MAGIC, VERSION, 0, capacity), 0)
+        self.index = open(self.path[:-4] + ".idx", "wb")
+
+    def append(self, columns, start, stop):
+        """Write rows [start, stop) of the column arrays; returns how many fit."""
+        n = min(stop - start, self.capacity - self.rows)
+        for name, dtype in COLUMNS[self.kind]:
+            data = columns[name][start:start + n]
+            os.pwrite(self.fd, data.tobytes(), self.offsets[name] + self.rows * np.dtype(dtype).itemsize)
+        # Index entries for every row number divisible by index_every in this chunk
+        first = -(-self.rows // self.index_every) * self.index_every
+        marks = columns["t"][start + first - self.rows:start + n:self.index_every]
+        if len(marks):
+            self.index.write(marks.astype("<f8").tobytes())
+            self.index.flush()
+        self.rows += n
+        os.pwrite(self.fd, HEADER.pack(MAGIC, VERSION, self.rows, self.capacity), 0)
+        return n
+
+    def close(self):
+        os.close(self.fd)
+        self.index.close()
+
+
+class SessionWriter:
+    """
+    Append events of any kind to a session directory; shareable across agents. Events are
+    buffered per kind and written once flush_rows of them are pending (and on flush/close),
+    so the per-write cost is paid per block rather than per pipeline batch.
+    """
+    def __init__(self, path, segment_rows=1 << 20, index_every=1024, flush_rows=4096):
+        self.path = path
+        self.segment_rows = segment_rows
+        self.index_every = index_every
+        self.flush_rows = flush_rows
+        self._pending = {kind: [] for kind in COLUMNS}
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._strings = open(os.path.join(path, "focus.strings"), "a+", encoding="utf-8")
+        self._strings.seek(0)
+        self._apps = {None: 0}
+        for i, line in enumerate(self._strings, start=1):
+            self._apps[line.rstrip("\n")] = i
+        self._segments = {}
+        self._last_t = {}
+        self._seq = {}
+        for kind in COLUMNS:
+            existing = sorted(name for name in os.listdir(path) if name.startswith(kind + "-") and name.endswith(".seg"))
+            # Appending to an existing session starts a new segment after the last one, and
+            # continues its clock so segments stay in time order
+            self._seq[kind] = int(existing[-1][len(kind) + 1:-4]) + 1 if existing else 0
+            for name in reversed(existing):
+                seg = _Segment(os.path.join(path, name), kind)
+                if seg.rows:
+                    self._last_t[kind] = float(seg.t[seg.rows - 1])
+                seg.close()
+                if kind in self._last_t:
+                    break
+        self.closed = False
+
+    def _app_ids(self, apps):
+        ids = np.empty(len(apps), np.uint32)
+        for i, app in enumerate(apps):
+            index = self._apps.get(app)
+            if index is None:
+                index = self._apps[app] = len(self._apps)
+                self._strings.write(app.replace("\n", " ") + "\n")
+            ids[i] = index
+        self._strings.flush()
+        return ids
+
+    def _columns(self, kind, events):
+        fields = list(zip(*events))
+        t = np.array(fields[1], np.float64)
+        # Keep time non-decreasing so the sparse index stays searchable
+        last = self._last_t.get(kind)
+        if last is not None and t[0] < last:
+            t[0] = last
+        np.maximum.accumulate(t, out=t)
+        self._last_t[kind] = t[-1]
+        if kind == "move":
+            return {"t": t, "x": np.array(fields[2], np.float32), "y": np.array(fields[3], np.float32)}
+        if kind == "key":
+            return {"t": t, "is_char": np.array(fields[2], bool).view(np.uint8)}
+        return {"t": t, "app": self._app_ids(fields[2])}
+
+    def _write(self, kind, columns):
+        n = len(columns["t"])
+        done = 0
+        while done < n:
+            seg = self._segments.get(kind)
+            if seg is None or seg.rows == seg.capacity:
+                if seg is not None:
+                    seg.close()
+                seg = self._segments[kind] = _SegmentWriter(self.path, kind, self._seq[kind],
+                                                            self.segment_rows, self.index_every)
+                self._seq[kind] += 1
+            done += seg.append(columns, done, n)
+
+    def append(self, events):
+        """Append a batch of event tuples (any mix of kinds, in time order per kind)."""
+        with self._lock:
+            if self.closed:
+                return
+            pending = self._pending
+            for e in events:
+                part = pending.get(e[0])
+                if part is not None:
+                    part.append(e)
+            self._pending_rows += len(events)
+            if self._pending_rows >= self.flush_rows:
+                self._flush()
+
+    def _flush(self):
+        for kind, part in self._pending.items():
+            if part:
+                self._write(kind, self._columns(kind, part))
+                self._pending[kind] = []
+        self._pending_rows = 0
+
+    def flush(self):
+        """Write buffered events so readers can see them."""
+        with self._lock:
+            if not self.closed:
+                self._flush()
+
+    def __call__(self, batches):
+        for batch in batches:
+            if batch:
+                self.append(batch)
+            yield batch
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self._flush()
+            self.closed = True
+            for seg in self._segments.values():
+                seg.close()
+            self._segments = {}
+            self._strings.close()
+            with open(os.path.join(self.path, "session.json"), "w", encoding="utf-8") as fh:
+                json.dump({"version": VERSION, "columns": {k: dict(v) for k, v in COLUMNS.items()},
+                           "segment_rows": self.segment_rows, "index_every": self.index_every}, fh)
+
+
+class _Segment:
+    """Read-only mmap of one segment: column views over its rows and its sparse index."""
+    def __init__(self, path, kind):
+        self.kind = kind
+        with open(path, "rb") as fh:
+            magic, version, rows, capacity = HEADER.unpack(fh.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} session segment")
+            self.rows = rows
+            self.map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if rows else None
+        offsets, _ = _layout(kind, capacity)
+        self.columns = {name: np.frombuffer(self.map, dtype, rows, offsets[name]) if rows else np.empty(0, dtype)
+                        for name, dtype in COLUMNS[kind]}
+        self.index = np.fromfile(path[:-4] + ".idx", "<f8")
+        self.t = self.columns["t"]
+
+    def locate(self, t, side, index_every):
+        """Row of t in this segment (np.searchsorted semantics) via the sparse index."""
+        if not self.rows:
+            return 0
+        block = int(np.searchsorted(self.index[:-(-self.rows // index_every)], t, side)) - 1
+        lo = max(block, 0) * index_every
+        hi = min(lo + index_every + (index_every if block < 0 else 0), self.rows)
+        return lo + int(np.searchsorted(self.t[lo:hi], t, side))
+
+    def close(self):
+        self.columns = self.t = None
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                # Views handed out by chunks()/range() are still alive; the map goes with them
+                pass
+
+
+class SessionReader:
+    """
+    Time-range access to a session. chunks() yields zero-copy column views per segment;
+    range() joins them (copying only when the range spans segments); batches() replays
+    events of every kind in time order.
+    """
+    def __init__(self, path, index_every=1024):
+        self.path = path
+        meta = os.path.join(path, "session.json")
+        if os.path.exists(meta):
+            with open(meta, encoding="utf-8") as fh:
+                index_every = json.load(fh).get("index_every", index_every)
+        self.index_every = index_every
+        with open(os.path.join(path, "focus.strings"), encoding="utf-8") as fh:
+            self.apps = [None] + [line.rstrip("\n") for line in fh]
+        self.segments = {}
+        for kind in COLUMNS:
+            names = sorted(n for n in os.listdir(path) if n.startswith(kind + "-") and n.endswith(".seg"))
+            segments = [_Segment(os.path.join(path, n), kind) for n in names]
+            self.segments[kind] = [s for s in segments if s.rows]
+        self._starts = {kind: [float(s.t[0]) for s in segs] for kind, segs in self.segments.items()}
+
+    def __len__(self):
+        return sum(s.rows for segs in self.segments.values() for s in segs)
+
+    def rows(self, kind):
+        return sum(s.rows for s in self.segments[kind])
+
+    def time_range(self, kind=None):
+        """(first, last) timestamp of one kind, or over every kind; None if empty."""
+        kinds = [kind] if kind else list(COLUMNS)
+        ends = [(segs[0].t[0], segs[-1].t[segs[-1].rows - 1]) for k in kinds for segs in [self.segments[k]] if segs]
+        if not ends:
+            return None
+        return float(min(a for a, _ in ends)), float(max(b for _, b in ends))
+
+    def chunks(self, kind, start=None, end=None):
+        """{column: view} per segment for events with start <= t < end, oldest first."""
+        segs = self.segments[kind]
+        first = 0 if start is None else max(bisect.bisect_right(self._starts[kind], start) - 1, 0)
+        for seg in segs[first:]:
+            if end is not None and seg.rows and seg.t[0] >= end:
+                break
+            lo = 0 if start is None else seg.locate(start, "left", self.index_every)
+            hi = seg.rows if end is None else seg.locate(end, "left", self.index_every)
+            if hi > lo:
+                yield {name: col[lo:hi] for name, col in seg.columns.items()}
+
+    def range(self, kind, start=None, end=None):
+        """Columns of one kind over [start, end) as arrays; views when one segment covers it."""
+        parts = list(self.chunks(kind, start, end))
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return {name: np.empty(0, dtype) for name, dtype in COLUMNS[kind]}
+        return {name: np.concatenate([p[name] for p in parts]) for name, _ in COLUMNS[kind]}
+
+    def _events(self, kind, start, end, batch_size):
+        make = EVENT_TYPES[kind]
+        apps = self.apps
+        for chunk in self.chunks(kind, start, end):
+            for i in range(0, len(chunk["t"]), batch_size):
+                cols = [chunk[name][i:i + batch_size].tolist() for name, _ in COLUMNS[kind]]
+                if kind == "focus":
+                    cols[1] = [apps[a] for a in cols[1]]
+                elif kind == "key":
+                    cols[1] = [bool(c) for c in cols[1]]
+                yield from (make(kind, *row) for row in zip(*cols))
+
+    def batches(self, start=None, end=None, kinds=None, batch_size=512):
+        """Events of the chosen kinds in [start, end), merged in time order, as batches."""
+        streams = [self._events(kind, start, end, batch_size) for kind in (kinds or COLUMNS) if kind in COLUMNS]
+        batch = []
+        for event in heapq.merge(*streams, key=lambda e: e[1]):
+            batch.append(event)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def close(self):
+        for segs in self.segments.values():
+            for seg in segs:
+                seg.close()
+        self.segments = {kind: [] for kind in COLUMNS}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def convert(source, path, **kwargs):
+    """Write a JSON-lines recording (or any batch iterable) into a new session. Returns events written."""
+    from .pipeline import read_recording
+    batches = read_recording(source, batch_size=65536) if isinstance(source, str) else source
+    writer = SessionWriter(path, **kwargs)
+    count = 0
+    try:
+        for batch in batches:
+            writer.append(batch)
+            count += len(batch)
+    finally:
+        writer.close()
+    return count
@@ -0,0 +1,108 @@
+class P2Quantile:
+    """
+    Constant-memory streaming quantile estimator (Jain & Chlamtac P-square).
+    Keeps five markers and updates them in O(1) per observation.
+    With decay > 0 the marker positions shrink geometrically so that the
+    estimate tracks roughly the last 1/decay observations, and the min/max
+    markers relax towards their neighbours so a single spike is forgotten.
+    decay is capped at min(p, 1 - p) / 4 so the tail beyond p keeps a few observations
+    in that window; a larger one would squeeze the markers onto each other.
+    """
+    def __init__(self, p, decay=0.0):
+        if not 0.0 < p < 1.0:
+            raise ValueError("p must be in (0, 1)")
+        if decay < 0.0:
+            raise ValueError("decay must be >= 0")
+        self.p = p
+        self.decay = min(decay, min(p, 1.0 - p) / 4.0)
+        self.reset()
+
+    def reset(self):
+        p = self.p
+        self.count = 0
+        self._init = []
+        self.q = [0.0] * 5
+        self.n = [0.0, 1.0, 2.0, 3.0, 4.0]
+        self.np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self.dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    @property
+    def ready(self):
+        return self.count >= 5
+
+    def value(self):
+        if self.count >= 5:
+            return self.q[2]
+        if not self._init:
+            return None
+        ordered = sorted(self._init)
+        return ordered[min(int(self.p * len(ordered)), len(ordered) - 1)]
+
+    def update(self, x):
+        self.count += 1
+        if self.count <= 5:
+            self._init.append(x)
+            if self.count == 5:
+                self.q = sorted(self._init)
+                self._init = []
+            return
+
+        q, n = self.q, self.n
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1.0
+        for i in range(5):
+            self.np[i] += self.dn[i]
+
+        for i in (1, 2, 3):
+            # Decay can close the gap between neighbouring markers; both interpolations divide by it
+            if n[i + 1] - n[i] <= 0.0 or n[i] - n[i - 1] <= 0.0:
+                continue
+            d = self.np[i] - n[i]
+            if (d >= 1.0 and n[i + 1] - n[i] > 1.0) or (d <= -1.0 and n[i - 1] - n[i] < -1.0):
+                d = 1.0 if d > 0 else -1.0
+                qp = self._parabolic(i, d)
+                if not q[i - 1] < qp < q[i + 1]:
+                    j = i + int(d)
+                    qp = q[i] + d * (q[j] - q[i]) / (n[j] - n[i])
+                q[i] = qp
+                n[i] += d
+
+        if self.decay > 0.0:
+            keep = 1.0 - self.decay
+            for i in range(1, 5):
+                n[i] *= keep
+                self.np[i] *= keep
+            q[0] += self.decay * (q[1] - q[0])
+            q[4] += self.decay * (q[3] - q[4])
+
+    def state(self):
+        import numpy as np
+        return {
+            "q": np.array(self.q), "n": np.array(self.n), "np": np.array(self.np),
+            "count": np.array(self.count), "init": np.array(self._init, dtype=float)
+        }
+
+    def load_state(self, state):
+        self.q = [float(v) for v in state["q"]]
+        self.n = [float(v) for v in state["n"]]
+        self.np = [float(v) for v in state["np"]]
+        self.count = int(state["count"])
+        self._init = [float(v) for v in state["init"]]
+
+    def _parabolic(self, i, d):
+        q, n = self.q, self.n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
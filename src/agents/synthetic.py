@@ -0,0 +1,310 @@
+"""
+Synthetic user input for load, scale and detection-quality testing.
+
+A SyntheticUser produces the same event records the live listeners do (MoveEvent, KeyEvent,
+FocusEvent) in simulated time, so the stream can be fed straight into agent.process() /
+replay() at full speed or written out as a recording for analyze.py:
+
+  - mouse: point-to-point strokes with a minimum-jerk velocity profile, duration from
+    Fitts' law, sampled at the pointer's report rate, with hand jitter and pauses
+  - typing: sentences of common words; every digraph (key pair) has its own mean delay per
+    user, plus per-keystroke noise, occasional typos with backspace and thinking pauses
+  - focus: a per-user Markov chain over a handful of apps with log-normal dwell times,
+    polled every poll_interval like the AppUsage agent
+
+Mouse and typing alternate in activity segments, as one pair of hands would. Anomaly
+episodes are injected on a schedule after a warm-up and reported as ground-truth labels;
+everything is deterministic for a given seed, so schedule() and events() agree.
+"""
+import gzip
+import heapq
+import json
+import math
+import random
+from collections import namedtuple
+
+from .records import FocusEvent, KeyEvent, MoveEvent
+
+Episode = namedtuple("Episode", "kind source start end")
+
+# Injected anomaly kinds and the agent expected to catch each
+ANOMALIES = {
+    "bot_mouse": "Movement",        # constant-velocity straight jumps, far faster than a hand
+    "scripted_typing": "Typing",    # machine-regular keystrokes 20-35ms apart
+    "hesitant_typing": "Typing",    # hunt-and-peck, about a second per key
+    "app_hopping": "AppUsage",      # a different app at every focus poll
+    "rare_app": "AppUsage"          # focus on an app the user has never used
+}
+
+WORDS = ("the", "of", "and", "to", "in", "is", "you", "that", "it", "he", "was", "for", "on", "are",
+         "as", "with", "his", "they", "at", "be", "this", "have", "from", "or", "one", "had", "by",
+         "word", "but", "not", "what", "all", "were", "we", "when", "your", "can", "said", "there",
+         "use", "each", "which", "she", "do", "how", "their", "if", "will", "up", "other", "about",
+         "out", "many", "then", "them", "these", "so", "some", "her", "would", "make", "like")
+
+APPS = ("chrome.exe", "code.exe", "outlook.exe", "slack.exe", "explorer.exe", "teams.exe",
+        "excel.exe", "winword.exe", "spotify.exe", "WindowsTerminal.exe")
+
+SCREEN = (1920, 1080)
+EPOCH = 1700000000.0
+TYPO_RATE = 0.02
+
+# Mean activity segment length (s) and how often each mode is picked
+MODES = {"mouse": (20.0, 0.45), "typing": (30.0, 0.45), "idle": (15.0, 0.10)}
+
+
+class _Cursor:
+    """Monotonic lookup of the episode covering t in a sorted, non-overlapping list."""
+    def __init__(self, episodes):
+        self.episodes = episodes
+        self.i = 0
+
+    def at(self, t):
+        eps = self.episodes
+        while self.i < len(eps) and eps[self.i].end <= t:
+            self.i += 1
+        if self.i < len(eps) and eps[self.i].start <= t:
+            return eps[self.i]
+        return None
+
+
+class SyntheticUser:
+    """
+    One simulated person. Traits not given explicitly (typing speed, pauses, pointer skill,
+    app habits) are drawn from the seed, so different seeds behave like different users.
+    """
+    def __init__(self, seed=0, start=EPOCH, wpm=None, mouse_hz=125.0, poll_interval=2.0,
+                 anomalies=tuple(ANOMALIES), anomaly_every=900.0, anomaly_length=30.0, warmup=600.0):
+        rng = random.Random(seed)
+        self.seed = seed
+        self.start = start
+        self.wpm = wpm if wpm is not None else rng.uniform(35.0, 85.0)
+        self.mouse_hz = mouse_hz
+        self.poll_interval = poll_interval
+        self.anomalies = tuple(anomalies)
+        self.anomaly_every = anomaly_every
+        self.anomaly_length = anomaly_length
+        self.warmup = warmup
+
+        self.key_spread = rng.uniform(0.2, 0.4)    # log-normal sigma across digraph means
+        self.fitts = (rng.uniform(0.05, 0.15), rng.uniform(0.10, 0.20))
+        self.mouse_pause = rng.uniform(0.5, 2.0)
+        self.think_pause = rng.uniform(2.0, 6.0)
+        self.dwell = rng.uniform(20.0, 120.0)      # median seconds in one app
+        self.apps = rng.sample(APPS, rng.randint(4, 7))
+        self.transitions = self._markov(rng)
+        self._digraphs = {}
+
+    def _rng(self, stream):
+        # str seeds are hashed with SHA-512, so streams are reproducible across processes
+        return random.Random(f"{self.seed}:{stream}")
+
+    def _markov(self, rng):
+        """Cumulative transition weights: Zipf-popular apps, each with its own favourite next apps."""
+        rows = []
+        for i in range(len(self.apps)):
+            weights = [0.0 if j == i else rng.uniform(0.2, 1.0) / (j + 1) for j in range(len(self.apps))]
+            total, acc, row = sum(weights), 0.0, []
+            for w in weights:
+                acc += w / total
+                row.append(acc)
+            rows.append(row)
+        return rows
+
+    def _digraph(self, a, b):
+        """Mean delay before typing b after a; fixed per user and key pair."""
+        key = a + b
+        delay = self._digraphs.get(key)
+        if delay is None:
+            base = 60.0 / (self.wpm * 5.0)
+            delay = base * self._rng("digraph:" + key).lognormvariate(0.0, self.key_spread)
+            self._digraphs[key] = delay
+        return delay
+
+    # Schedules
+
+    def schedule(self, duration):
+        """Ground-truth anomaly episodes in the first `duration` seconds, in time order."""
+        rng = self._rng("episodes")
+        end = self.start + duration
+        t = self.start + self.warmup
+        episodes = []
+        while self.anomalies:
+            t += rng.expovariate(1.0 / self.anomaly_every)
+            if t + self.anomaly_length > end:
+                break
+            kind = rng.choice(self.anomalies)
+            episodes.append(Episode(kind, ANOMALIES[kind], t, t + self.anomaly_length))
+            t += self.anomaly_length
+        return episodes
+
+    def _modes(self, duration):
+        rng = self._rng("modes")
+        names = list(MODES)
+        weights = [MODES[name][1] for name in names]
+        end = self.start + duration
+        t, segments = self.start, []
+        while t < end:
+            mode = rng.choices(names, weights)[0]
+            length = rng.expovariate(1.0 / MODES[mode][0])
+            segments.append((t, min(t + length, end), mode))
+            t += length
+        return segments
+
+    @staticmethod
+    def _intervals(segments, episodes, mode, source):
+        """Time spans a modality is active: its mode segments plus its own anomaly episodes."""
+        spans = sorted([(s, e) for s, e, m in segments if m == mode] +
+                       [(ep.start, ep.end) for ep in episodes if ep.source == source])
+        merged = []
+        for s, e in spans:
+            if merged and s <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], e)
+            else:
+                merged.append([s, e])
+        return merged
+
+    # Streams
+
+    def _mouse(self, intervals, episodes):
+        rng = self._rng("mouse")
+        cursor = _Cursor(episodes)
+        dt = 1.0 / self.mouse_hz
+        x, y = SCREEN[0] / 2.0, SCREEN[1] / 2.0
+        for start, end in intervals:
+            t = start
+            while t < end:
+                episode = cursor.at(t)
+                bot = episode is not None and episode.kind == "bot_mouse"
+                if not bot:
+                    t += rng.expovariate(1.0 / self.mouse_pause)
+                tx, ty = rng.uniform(0, SCREEN[0] - 1), rng.uniform(0, SCREEN[1] - 1)
+                dist = math.hypot(tx - x, ty - y)
+                if bot:
+                    # Straight line at constant speed, no acceleration, no pause between targets
+                    steps = max(1, int(dist / (rng.uniform(8000.0, 15000.0) * dt)))
+                    path = [i / steps for i in range(1, steps + 1)]
+                    jitter = 0.0
+                else:
+                    a, b = self.fitts
+                    movement = a + b * math.log2(dist / rng.uniform(10.0, 60.0) + 1.0)
+                    steps = max(2, int(movement * self.mouse_hz))
+                    path = [tau ** 3 * (10.0 - 15.0 * tau + 6.0 * tau * tau)
+                            for tau in (i / steps for i in range(1, steps + 1))]
+                    jitter = 0.7
+                x0, y0 = x, y
+                for s in path:
+                    t += dt
+                    if t >= end:
+                        break
+                    x = x0 + (tx - x0) * s + (rng.gauss(0.0, jitter) if jitter else 0.0)
+                    y = y0 + (ty - y0) * s + (rng.gauss(0.0, jitter) if jitter else 0.0)
+                    yield MoveEvent("move", t, int(round(x)), int(round(y)))
+
+    def _sentence(self, rng):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(4, 14))]
+        return " ".join(words) + "."
+
+    def _typing(self, intervals, episodes):
+        rng = self._rng("typing")
+        cursor = _Cursor(episodes)
+        for start, end in intervals:
+            t = start
+            while t < end:
+                prev = " "
+                for ch in self._sentence(rng):
+                    episode = cursor.at(t)
+                    kind = episode.kind if episode is not None else None
+                    if kind == "scripted_typing":
+                        delay = rng.uniform(0.02, 0.035)
+                    elif kind == "hesitant_typing":
+                        delay = rng.uniform(0.9, 1.8)
+                    else:
+                        delay = self._digraph(prev, ch) * rng.lognormvariate(0.0, 0.15)
+                    t += delay
+                    if t >= end:
+                        break
+                    yield KeyEvent("key", t, ch != " ")
+                    if kind is None and rng.random() < TYPO_RATE:
+                        t += self._digraph(ch, "\b") * 1.5
+                        yield KeyEvent("key", t, False)
+                        t += self._digraph("\b", ch)
+                        yield KeyEvent("key", t, True)
+                    prev = ch
+                t += rng.expovariate(1.0 / self.think_pause)
+
+    def _focus(self, start, end, episodes):
+        rng = self._rng("focus")
+        cursor = _Cursor(episodes)
+        app = 0
+        switch_at = start + rng.lognormvariate(math.log(self.dwell), 0.8)
+        t = start
+        while t < end:
+            episode = cursor.at(t)
+            kind = episode.kind if episode is not None else None
+            if kind == "app_hopping":
+                app = (app + rng.randrange(1, len(self.apps))) % len(self.apps)
+                name = self.apps[app]
+            elif kind == "rare_app":
+                name = f"tool_{self.seed}_{int(episode.start)}.exe"
+            else:
+                if t >= switch_at:
+                    r = rng.random()
+                    row = self.transitions[app]
+                    app = next((j for j, acc in enumerate(row) if r < acc), len(row) - 1)
+                    switch_at = t + rng.lognormvariate(math.log(self.dwell), 0.8)
+                name = self.apps[app]
+            yield FocusEvent("focus", t, name)
+            t += self.poll_interval
+
+    def events(self, duration):
+        """Every event of the first `duration` seconds, merged in time order."""
+        episodes = self.schedule(duration)
+        segments = self._modes(duration)
+        end = self.start + duration
+        return heapq.merge(
+            self._mouse(self._intervals(segments, episodes, "mouse", "Movement"), episodes),
+            self._typing(self._intervals(segments, episodes, "typing", "Typing"), episodes),
+            self._focus(self.start, end, episodes),
+            key=lambda e: e[1])
+
+    def batches(self, duration, span=0.05, max_batch=512):
+        """Event batches covering `span` seconds of simulated time each, like a live agent's 50ms drain."""
+        batch, edge = [], None
+        for event in self.events(duration):
+            if edge is None:
+                edge = event[1] + span
+            elif event[1] >= edge or len(batch) >= max_batch:
+                yield batch
+                batch, edge = [], event[1] + span
+            batch.append(event)
+        if batch:
+            yield batch
+
+
+def labels_path(path):
+    """Where write_session() puts the ground truth for a recording path."""
+    for suffix in (".jsonl.gz", ".jsonl"):
+        if path.endswith(suffix):
+            return path[:-len(suffix)] + ".labels.json"
+    return path + ".labels.json"
+
+
+def write_session(user, path, duration):
+    """Write a user's stream as a recording (gzipped for .gz) plus its labels file; returns the episodes."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as fh:
+        for batch in user.batches(duration):
+            fh.write("".join(json.dumps(list(e), separators=(",", ":")) + "\n" for e in batch))
+    episodes = user.schedule(duration)
+    with open(labels_path(path), "w", encoding="utf-8") as fh:
+        json.dump({"seed": user.seed, "start": user.start, "duration": duration,
+                   "episodes": [ep._asdict() for ep in episodes]}, fh, indent=2)
+    return episodes
+
+
+def load_labels(path):
+    """Episodes from a labels file written by write_session()."""
+    with open(path, "r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    return [Episode(**ep) for ep in data["episodes"]]
@@ -1,130 +1,133 @@
+import math
 import time
-from pynput import keyboard
 
-class TypingAgent:
-    def __init__(self, anomaly_queue, stats_queue, alpha=0.01, sigma=3.0, cooldown=3.0):
+from .memory import approx_size
+from .pipeline import (AgentControl, AggregationPolicy, EventBuffer, FeatureTap, KeyBursts, KeyTiming, Pipeline,
+                       PipelineAgent, QueueSink, SeriesTap, ThresholdScorer, ZScoreScorer)
+from .profile import AdaptiveProfile
+from .records import KeyEvent, Severity
+from .series import SignalSeries
+
+class TypingAgent(PipelineAgent):
+    name = "Typing"
+    kinds = ("key",)
+    hold_stats = True
+
+    def __init__(self, anomaly_queue, stats_queue, alpha=0.01, sigma=3.0, cooldown=3.0,
+                 threshold="zscore", quantile=0.99, baseline="global", feature_sink=None,
+                 recorder=None, sample_interval=0.05, batch_size=512, burst_pause=1.0, scorer="zscore"):
         self.anomaly_queue = anomaly_queue
         self.stats_queue = stats_queue
-        self.last_ts = time.time()
+        self.feature_sink = feature_sink
         self.alpha = alpha
-        self.sigma = sigma
-        self.cooldown = cooldown
-        self.mean_delay = None
-        self.var_delay = None
-        self.count = 0
-        self._last_alert_ts = 0.0
-        self._last_stat_ts = 0.0
-        self.total_chars = 0
+        self.sample_interval = sample_interval
+        self.batch_size = batch_size
         self.start_time = time.time()
-        self.last_activity_time = time.time()
-        self.wpm_samples = []
-        self.typing_speed_wpm = 0
-        self.window_size = 60
-        self.char_timestamps = []
-        self.listener = keyboard.Listener(on_press=self._on_press)
+        self.profile = AdaptiveProfile(alpha=alpha, threshold=threshold, quantile=quantile,
+                                       baseline=baseline)
 
-    def _calculate_wpm(self):
-        now = time.time()
-        
-        while self.char_timestamps and (now - self.char_timestamps[0]) > self.window_size:
-            self.char_timestamps.pop(0)
-        
-        if not self.char_timestamps or (now - self.char_timestamps[-1]) > 5:
-            return 0
-            
-        chars_in_window = len(self.char_timestamps)
-        window_duration = min(self.window_size, now - self.char_timestamps[0]) / 60
-        
-        if window_duration > 0:
-            wpm = (chars_in_window / 5) / window_duration
-            return wpm
-        return 0
+        # Burst features get a profile each; burst_pause=None turns segmentation off
+        self.bursts = KeyBursts(pause=burst_pause) if burst_pause else None
+        self.burst_profiles = {
+            feature: AdaptiveProfile(alpha=alpha, threshold=threshold, quantile=quantile, baseline=baseline)
+            for feature in (KeyBursts.FEATURES if self.bursts else ())
+        }
+        self.extractor = KeyTiming(window_size=60, bursts=self.bursts)
+        self.scorer = ZScoreScorer(self.profile, "delay", sigma=sigma, min_count=10)
+        self.burst_scorers = tuple(ZScoreScorer(p, feature, sigma=sigma, min_count=20)
+                                   for feature, p in self.burst_profiles.items())
+        # scorer="halfspace" judges each delay together with the current speed and last burst length
+        self.model = None
+        if scorer != "zscore":
+            from .halfspace import make_scorer
+            self.model = make_scorer(scorer, ("delay", "wpm") + (("burst_keys",) if self.bursts else ()),
+                                     sigma=sigma, window=1000)
+        self.speed_scorer = ThresholdScorer("wpm", limit=80, severity=Severity.HIGH)
+        self.policy = AggregationPolicy(window=cooldown)
+        self.sink = QueueSink("Typing", anomaly_queue, stats_queue, self.profile, "delay", {
+            "wpm": lambda s: f"Unusual Speed Detected: {s.value:.0f} WPM",
+            "delay": lambda s: f"Delay {s.value*1000:.0f}ms, z={s.z or 0.0:.2f}",
+            "burst_keys": lambda s: f"Unusual burst length: {s.value} keys, z={s.z or 0.0:.2f}",
+            "burst_flight": lambda s: f"Unusual burst rhythm: {s.value*1000:.0f}ms per key, z={s.z or 0.0:.2f}",
+            "burst_jitter": lambda s: f"Unusual burst jitter: {s.value*1000:.0f}ms, z={s.z or 0.0:.2f}",
+            "burst_corrections": lambda s: f"Unusual corrections: {s.value:.0%} of burst, z={s.z or 0.0:.2f}",
+            "log_pause": lambda s: f"Unusual pause: {math.exp(s.value):.1f}s, z={s.z or 0.0:.2f}"
+        }, carry=("wpm",))
+        self.series = SignalSeries(self.profile)
+        self.stages = ((recorder,) if recorder else ()) + (
+            self.extractor, self.speed_scorer, self.scorer) + self.burst_scorers + (
+            (self.model,) if self.model else ()) + (FeatureTap("delay", "Typing", feature_sink),
+            SeriesTap("delay", self.series),
+            self.policy, self.sink
+        )
+        self.pipeline = Pipeline(*self.stages)
 
-    def _update_wpm(self):
-        current_wpm = self._calculate_wpm()
-        self.wpm_samples.append(current_wpm)
-        
-        if len(self.wpm_samples) > 5:
-            self.wpm_samples.pop(0)
-        
-        weights = [0.1, 0.15, 0.2, 0.25, 0.3][:len(self.wpm_samples)]
-        total_weight = sum(weights)
-        
-        self.typing_speed_wpm = sum(w * s for w, s in zip(weights, self.wpm_samples)) / total_weight
+        self.buffer = EventBuffer()
+        self.control = AgentControl()
+        self.listener = None
+        # Engine-wide ActivityMonitor (set by the engine); input here keeps every loop at full rate
+        self.activity = None
 
-    def _now(self):
-        return time.time()
+    @property
+    def sigma(self):
+        return self.scorer.sigma
 
-    def _std(self):
-        return (self.var_delay ** 0.5) if self.var_delay is not None else 0.0
+    @sigma.setter
+    def sigma(self, value):
+        self.scorer.sigma = value
+        for scorer in self.burst_scorers:
+            scorer.sigma = value
+        if self.model is not None:
+            self.model.sigma = value
 
-    def _update_profile(self, value):
-        if self.mean_delay is None:
-            self.mean_delay = value
-            self.var_delay = 0.0
-            self.count = 1
-        else:
-            self.count += 1
-            delta = value - self.mean_delay
-            self.mean_delay += self.alpha * delta
-            self.var_delay = (1 - self.alpha) * self.var_delay + self.alpha * (delta ** 2)
-
-    def _publish_stats(self, z=None, note=None):
-        now = self._now()
-        if now - self._last_stat_ts >= 0.5:
-            self._last_stat_ts = now
-            mean = self.mean_delay if self.mean_delay is not None else None
-            std = self._std() if self.mean_delay is not None else None
-            self.stats_queue.put({
-                "source": "Typing",
-                "mean": mean,
-                "std": std,
-                "z": z,
-                "note": note or ("Adapting" if self.count < 30 else "Stable"),
-                "wpm": self.typing_speed_wpm
-            })
+    @property
+    def typing_speed_wpm(self):
+        return self.extractor.typing_speed_wpm
 
     def _on_press(self, key):
-        now = self._now()
-        delay = now - self.last_ts
-        self.last_ts = now
+        if self.control.paused:
+            return
+        if self.activity is not None:
+            self.activity.touch()
+        is_char = getattr(key, 'char', None) is not None
+        self.buffer.append(KeyEvent("key", self._now(), is_char))
 
-        if hasattr(key, 'char') and key.char is not None:
-            self.total_chars += 1
-            self.char_timestamps.append(now)
-            self._update_wpm()
+    def reset(self):
+        self.profile.reset()
+        for profile in self.burst_profiles.values():
+            profile.reset()
+        if self.model is not None:
+            self.model.reset()
+        self.series.reset()
+        self.extractor.reset()
+        self.policy.reset()
 
-        if self.typing_speed_wpm > 80:
-            if now - self._last_alert_ts >= self.cooldown:
-                self._last_alert_ts = now
-                self.anomaly_queue.put({
-                    "source": "Typing",
-                    "severity": "High",
-                    "message": f"Unusual Speed Detected: {self.typing_speed_wpm:.0f} WPM"
-                })
+    def restart(self):
+        # Events on either side of a pause are not consecutive
+        self.extractor.reset()
 
-        if 0.01 < delay < 2.0:
-            z = None
-            if self.mean_delay is not None and self._std() > 1e-6 and self.count > 10:
-                z = abs(delay - self.mean_delay) / max(self._std(), 1e-6)
-                if z > self.sigma:
-                    if now - self._last_alert_ts >= self.cooldown:
-                        self._last_alert_ts = now
-                        sev = "High" if z > (self.sigma + 2.0) else "Medium"
-                        self.anomaly_queue.put({
-                            "source": "Typing",
-                            "severity": sev,
-                            "message": f"Delay {delay*1000:.0f}ms, z={z:.2f}"
-                        })
+    def memory_usage(self):
+        """Approximate bytes held: signal history rings and events not yet drained."""
+        model = self.model.memory_usage() if self.model is not None else 0
+        return (self.series.memory_usage() + self.buffer.memory_usage() + approx_size(self.extractor.char_timestamps)
+                + model)
 
-            self._update_profile(delay)
-            self._publish_stats(z=z)
-        else:
-            self._publish_stats(z=None, note="NoSignal")
+    def _stateful(self):
+        parts = {"profile": self.profile}
+        parts.update(self.burst_profiles)
+        if self.model is not None:
+            parts["model"] = self.model
+        return parts
 
-    def run(self, stop_event):
+    def start_input(self):
+        # Imported here so offline analysis never needs an input backend
+        from pynput import keyboard
+        self.listener = keyboard.Listener(on_press=self._on_press)
         self.listener.start()
-        self._publish_stats(z=None, note="Adapting")
-        while not stop_event.is_set():
-            time.sleep(0.05)
-        self.listener.stop()
\ No newline at end of file
+        if self.activity is not None:
+            self.activity.watch()
+
+    def stop_input(self):
+        self.listener.stop()
+        if self.activity is not None:
+            self.activity.unwatch()
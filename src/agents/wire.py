@@ -0,0 +1,182 @@
+"""
+Compact binary frames for shipping alerts and stats from Guardio instances to a collector.
+
+A frame is a 4-byte big-endian body length followed by the body:
+
+    header  >BBH      version, kind, endpoint name length, then the UTF-8 endpoint name
+    counts  >HH       number of alerts, number of stats records
+    alert   >BBIddf   source, severity, count, ts, last_ts, z; then >H length + UTF-8 message
+    stats   >Bdffff   source, ts, mean, std, z, wpm; then >B length + UTF-8 note
+
+Sources travel as their records.Source value; 0 means a >B length + UTF-8 name follows
+(third-party agents). Missing numbers travel as NaN. An alert is about 30 bytes plus its
+message and a stats record about 30 bytes, so a second of one endpoint's activity fits in
+a few hundred bytes.
+"""
+import math
+import struct
+
+from .records import Alert, Severity, Source, Stats
+
+VERSION = 1
+KIND_BATCH = 1
+MAX_FRAME = 1 << 20
+MAX_MESSAGE = 240
+MAX_RECORDS = 0xFFFF
+
+DEFAULT_PORT = 7355
+
+LENGTH = struct.Struct(">I")
+_HEADER = struct.Struct(">BBH")
+_COUNTS = struct.Struct(">HH")
+_ALERT = struct.Struct(">BBIddf")
+_STATS = struct.Struct(">Bdffff")
+_U8 = struct.Struct(">B")
+_U16 = struct.Struct(">H")
+
+_NAN = float("nan")
+
+
+def _num(value):
+    return _NAN if value is None else float(value)
+
+
+def _opt(value):
+    return None if math.isnan(value) else value
+
+
+def _text(value, limit):
+    return (value or "").encode("utf-8")[:limit]
+
+
+def _pack_source(parts, source):
+    source = Source.coerce(source)
+    if isinstance(source, Source):
+        return int(source)
+    name = _text(str(source), 255)
+    parts.append(_U8.pack(len(name)) + name)
+    return 0
+
+
+def _encode_alert(a):
+    extra = []
+    source = _pack_source(extra, a.source)
+    message = _text(a.message, MAX_MESSAGE)
+    return b"".join([_ALERT.pack(source, int(a.severity), a.count, _num(a.ts),
+                                 _num(a.last_ts if a.last_ts is not None else a.ts), _num(a.z))]
+                    + extra + [_U16.pack(len(message)), message])
+
+
+def _encode_stats(s):
+    extra = []
+    source = _pack_source(extra, s.source)
+    note = _text(s.note, 255)
+    return b"".join([_STATS.pack(source, _num(s.ts), _num(s.mean), _num(s.std), _num(s.z), _num(s.wpm))]
+                    + extra + [_U8.pack(len(note)), note])
+
+
+def _frame(name, alert_parts, stats_parts):
+    body = b"".join([_HEADER.pack(VERSION, KIND_BATCH, len(name)), name,
+                     _COUNTS.pack(len(alert_parts), len(stats_parts))] + alert_parts + stats_parts)
+    if len(body) > MAX_FRAME:
+        raise ValueError("frame too large")
+    return LENGTH.pack(len(body)) + body
+
+
+def encode_frame(endpoint, alerts=(), stats=()):
+    """Length-prefixed frame carrying up to MAX_RECORDS alerts and stats for one endpoint."""
+    alerts, stats = list(alerts), list(stats)
+    if len(alerts) > MAX_RECORDS or len(stats) > MAX_RECORDS:
+        raise ValueError("too many records for one frame")
+    return _frame(_text(endpoint, 0xFFFF), [_encode_alert(a) for a in alerts], [_encode_stats(s) for s in stats])
+
+
+def encode_frames(endpoint, alerts=(), stats=()):
+    """
+    Any number of records as frames that each stay within MAX_FRAME and MAX_RECORDS.
+    Returns ([(frame, alerts in it, number of stats in it)], records that could not be
+    encoded); those are left out rather than failing the rest.
+    """
+    name = _text(endpoint, 0xFFFF)
+    room = MAX_FRAME - _HEADER.size - len(name) - _COUNTS.size
+    frames = []
+    failed = 0
+    alert_parts, stats_parts, framed, size = [], [], [], 0
+    for kind, records in ((0, alerts), (1, stats)):
+        for record in records:
+            try:
+                part = _encode_alert(record) if kind == 0 else _encode_stats(record)
+            except (ValueError, TypeError, AttributeError, struct.error):
+                failed += 1
+                continue
+            if size + len(part) > room or len(stats_parts if kind else alert_parts) == MAX_RECORDS:
+                frames.append((_frame(name, alert_parts, stats_parts), framed, len(stats_parts)))
+                alert_parts, stats_parts, framed, size = [], [], [], 0
+            if kind == 0:
+                alert_parts.append(part)
+                framed.append(record)
+            else:
+                stats_parts.append(part)
+            size += len(part)
+    if alert_parts or stats_parts:
+        frames.append((_frame(name, alert_parts, stats_parts), framed, len(stats_parts)))
+    return frames, failed
+
+
+def _unpack_source(body, offset, code):
+    if code:
+        return Source(code), offset
+    n = body[offset]
+    return body[offset + 1:offset + 1 + n].decode("utf-8"), offset + 1 + n
+
+
+def decode_frame(body):
+    """(endpoint, [Alert], [Stats]) from a frame body (without its length prefix)."""
+    try:
+        version, kind, n = _HEADER.unpack_from(body, 0)
+        if version != VERSION or kind != KIND_BATCH:
+            raise ValueError(f"unsupported frame version {version} kind {kind}")
+        offset = _HEADER.size
+        endpoint = body[offset:offset + n].decode("utf-8")
+        offset += n
+        n_alerts, n_stats = _COUNTS.unpack_from(body, offset)
+        offset += _COUNTS.size
+
+        alerts = []
+        for _ in range(n_alerts):
+            code, severity, count, ts, last_ts, z = _ALERT.unpack_from(body, offset)
+            source, offset = _unpack_source(body, offset + _ALERT.size, code)
+            (n,) = _U16.unpack_from(body, offset)
+            message = body[offset + 2:offset + 2 + n].decode("utf-8", "replace")
+            offset += 2 + n
+            alerts.append(Alert(source, Severity(severity), _opt(ts), message=message,
+                                count=count, last_ts=_opt(last_ts), z=_opt(z)))
+
+        stats = []
+        for _ in range(n_stats):
+            code, ts, mean, std, z, wpm = _STATS.unpack_from(body, offset)
+            source, offset = _unpack_source(body, offset + _STATS.size, code)
+            n = body[offset]
+            note = body[offset + 1:offset + 1 + n].decode("utf-8", "replace") or None
+            offset += 1 + n
+            stats.append(Stats(source, _opt(mean), _opt(std), _opt(z), note, _opt(wpm), _opt(ts)))
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"malformed frame: {e}") from None
+    return endpoint, alerts, stats
+
+
+def parse_address(address):
+    """
+    ("unix", path) or ("tcp", (host, port)) from "unix:///run/guardio.sock",
+    "tcp://host:port", "host:port" or a bare path.
+    """
+    if address.startswith("unix://"):
+        return "unix", address[len("unix://"):]
+    if address.startswith("tcp://"):
+        address = address[len("tcp://"):]
+    elif "/" in address:
+        return "unix", address
+    host, _, port = address.rpartition(":")
+    if not host:
+        host, port = port or "127.0.0.1", DEFAULT_PORT
+    return "tcp", (host.strip("[]"), int(port))
@@ -0,0 +1,199 @@
+"""
+Guardio offline batch analyzer.
+
+Re-scores recorded sessions (JSON-lines files written by the pipeline Recorder, or .session
+directories written by SessionWriter) with the same detection pipeline the live agents use,
+one session per worker process.
+
+Usage:
+    python src/analyze.py SESSIONS_DIR [--out DIR] [--sigma 3.0] [--cooldown 3.0] [--workers N]
+                          [--config agents.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+SESSION_SUFFIXES = (".jsonl", ".jsonl.gz")
+SESSION_DIR_SUFFIX = ".session"
+
+
+class _Discard:
+    """Queue stand-in for the stats stream, which batch analysis does not need."""
+    def put(self, item):
+        pass
+
+
+class _AlertTimeline:
+    """Queue stand-in that streams alerts to disk and keeps only running counts in memory."""
+    def __init__(self, fh):
+        self.fh = fh
+        self.by_source = Counter()
+        self.by_severity = Counter()
+        self.flagged = 0
+        self.first_ts = None
+        self.last_ts = None
+
+    def put(self, alert):
+        self.by_source[str(alert.source)] += 1
+        self.by_severity[str(alert.severity)] += 1
+        self.flagged += alert.count
+        # Aggregated alerts are published when their window closes, so ts is not monotonic
+        if alert.ts is not None:
+            self.first_ts = alert.ts if self.first_ts is None else min(self.first_ts, alert.ts)
+            self.last_ts = alert.last_ts if self.last_ts is None else max(self.last_ts, alert.last_ts)
+        if self.fh is not None:
+            self.fh.write(json.dumps(alert.to_dict()) + "\n")
+
+
+def find_sessions(root):
+    sessions = []
+    for dirpath, dirs, files in os.walk(root):
+        # Columnar sessions are directories; record them and do not descend
+        for name in [d for d in dirs if d.endswith(SESSION_DIR_SUFFIX)]:
+            dirs.remove(name)
+            sessions.append(os.path.join(dirpath, name))
+        for name in files:
+            if name.endswith(SESSION_SUFFIXES):
+                sessions.append(os.path.join(dirpath, name))
+    # Largest first so long sessions do not end up as the tail of the pool
+    return sorted(sessions, key=_session_size, reverse=True)
+
+
+def _session_size(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    # Segment files are sparse; count allocated blocks, not the preallocated length
+    return sum(getattr(st, "st_blocks", 0) * 512 or st.st_size
+               for st in (os.stat(os.path.join(path, n)) for n in os.listdir(path)))
+
+
+def _session_name(path, root):
+    rel = os.path.relpath(path, root)
+    for suffix in SESSION_SUFFIXES + (SESSION_DIR_SUFFIX,):
+        if rel.endswith(suffix):
+            rel = rel[:-len(suffix)]
+    return rel.replace(os.sep, "__")
+
+
+def analyze_session(path, name, out_dir, sigma=3.0, cooldown=3.0, profile_path=None, config_path=None):
+    """Run every enabled agent pipeline over one recording and return its summary dict."""
+    from agents.persistence import load_profiles
+    from agents.pipeline import read_recording, replay
+    from agents.registry import AgentRegistry
+    from engine import GuardioEngine
+
+    started = time.perf_counter()
+    timeline_path = os.path.join(out_dir, name + ".alerts.jsonl") if out_dir else None
+    fh = open(timeline_path, "w", encoding="utf-8") if timeline_path else None
+    try:
+        alerts, stats = _AlertTimeline(fh), _Discard()
+        engine = GuardioEngine(alerts, stats, AgentRegistry.discover().load_config(config_path))
+        engine.sigma = sigma
+        engine.cooldown = cooldown
+        agents = engine.build_agents()
+        if profile_path:
+            load_profiles(profile_path, agents)
+
+        counts = Counter()
+        span = [None, None]
+
+        def counted(batches):
+            for batch in batches:
+                for event in batch:
+                    counts[event[0]] += 1
+                if batch:
+                    span[0] = batch[0][1] if span[0] is None else span[0]
+                    span[1] = batch[-1][1]
+                yield batch
+
+        replay(counted(read_recording(path)), agents)
+    finally:
+        if fh is not None:
+            fh.close()
+
+    elapsed = time.perf_counter() - started
+    events = sum(counts.values())
+    duration = (span[1] - span[0]) if span[0] is not None else 0.0
+    total_alerts = sum(alerts.by_source.values())
+    return {
+        "session": name,
+        "path": path,
+        "events": events,
+        "events_by_kind": dict(counts),
+        "duration_s": duration,
+        "alerts": total_alerts,
+        "alerts_by_source": dict(alerts.by_source),
+        "alerts_by_severity": dict(alerts.by_severity),
+        "flagged_samples": alerts.flagged,
+        "alerts_per_hour": total_alerts / (duration / 3600.0) if duration > 0 else None,
+        "first_alert_ts": alerts.first_ts,
+        "last_alert_ts": alerts.last_ts,
+        "timeline": timeline_path,
+        "elapsed_s": elapsed,
+        "events_per_s": events / elapsed if elapsed > 0 else None
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score recorded Guardio sessions offline.")
+    parser.add_argument("sessions", help="directory containing recorded *.jsonl / *.jsonl.gz sessions")
+    parser.add_argument("--out", default=None, help="directory for per-session alert timelines and summary.json")
+    parser.add_argument("--sigma", type=float, default=3.0, help="detection sensitivity (default 3.0)")
+    parser.add_argument("--cooldown", type=float, default=3.0, help="alert cooldown in seconds (default 3.0)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--profiles", default=None, help="seed every session from a saved profiles.npz")
+    parser.add_argument("--config", default=None, help="agent configuration (default ~/.guardio/agents.json)")
+    args = parser.parse_args(argv)
+
+    sessions = find_sessions(args.sessions)
+    if not sessions:
+        print(f"No recorded sessions found under {args.sessions}", file=sys.stderr)
+        return 1
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+
+    started = time.perf_counter()
+    summaries = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(analyze_session, path, _session_name(path, args.sessions), args.out,
+                        args.sigma, args.cooldown, args.profiles, args.config): path
+            for path in sessions
+        }
+        for future in as_completed(futures):
+            try:
+                summary = future.result()
+            except Exception as e:
+                print(f"[ERROR] {futures[future]}: {e}", file=sys.stderr)
+                continue
+            summaries.append(summary)
+            print(f"{summary['session']:<40} events={summary['events']:>9} "
+                  f"alerts={summary['alerts']:>5} ({summary['elapsed_s']:.2f}s)")
+
+    elapsed = time.perf_counter() - started
+    total_events = sum(s["events"] for s in summaries)
+    overall = {
+        "sessions": len(summaries),
+        "events": total_events,
+        "alerts": sum(s["alerts"] for s in summaries),
+        "elapsed_s": elapsed,
+        "events_per_s": total_events / elapsed if elapsed > 0 else None,
+        "sigma": args.sigma,
+        "cooldown": args.cooldown
+    }
+    print(f"\n{overall['sessions']} sessions, {overall['events']} events, {overall['alerts']} alerts "
+          f"in {elapsed:.2f}s ({overall['events_per_s'] or 0:.0f} events/s)")
+
+    if args.out:
+        summaries.sort(key=lambda s: s["session"])
+        with open(os.path.join(args.out, "summary.json"), "w", encoding="utf-8") as fh:
+            json.dump({"overall": overall, "sessions": summaries}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
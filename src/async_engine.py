@@ -0,0 +1,184 @@
+"""
+asyncio front end to the detection engine.
+
+    async with AsyncGuardioEngine() as engine:
+        async for alert in engine.alerts():
+            ...
+
+Agent threads publish into LoopChannel objects instead of queue.Queue. put() only appends
+under a lock; the first put after the loop has drained the channel schedules a single
+call_soon_threadsafe wakeup, so a burst of alerts or stats costs one loop iteration rather
+than one per item, and nothing on the loop side ever polls.
+"""
+import asyncio
+import threading
+from collections import deque
+
+from engine import GuardioEngine
+
+
+class LoopChannel:
+    """Thread-to-event-loop hand-off with batched wakeups; stands in for queue.Queue.put."""
+    def __init__(self, loop, on_batch):
+        self.loop = loop
+        self.on_batch = on_batch
+        self.wakeups = 0
+        self._lock = threading.Lock()
+        self._items = []
+        self._scheduled = False
+
+    def put(self, item):
+        with self._lock:
+            self._items.append(item)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            self.loop.call_soon_threadsafe(self._drain)
+        except RuntimeError:
+            # Loop already closed: nobody is listening any more
+            pass
+
+    def qsize(self):
+        return len(self._items)
+
+    def _drain(self):
+        with self._lock:
+            items, self._items = self._items, []
+            self._scheduled = False
+        self.wakeups += 1
+        self.on_batch(items)
+
+
+class _Subscription:
+    """Per-iterator alert buffer; the oldest alerts are dropped once maxlen is reached."""
+    def __init__(self, maxlen):
+        self.items = deque(maxlen=maxlen)
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+
+    def extend(self, items):
+        self.dropped += max(0, len(self.items) + len(items) - self.items.maxlen)
+        self.items.extend(items)
+        self.ready.set()
+
+
+class AsyncGuardioEngine:
+    """
+    asyncio lifecycle and streams over GuardioEngine. The agents keep running on the engine's
+    scheduler thread; only alert and stats delivery moves onto the event loop. Blocking work
+    (building agents, loading/saving profiles, joining threads) runs in the loop's default executor.
+    """
+    def __init__(self, registry=None, sigma=3.0, cooldown=3.0, max_pending=10000):
+        self.engine = GuardioEngine(None, None, registry)
+        self.engine.sigma = sigma
+        self.engine.cooldown = cooldown
+        self.max_pending = max_pending
+        self.alert_channel = None
+        self.stats_channel = None
+
+        self._loop = None
+        self._subscribers = set()
+        self._stats = {}
+        self._stats_waiters = []
+
+    @property
+    def running(self):
+        return self.engine.running
+
+    @property
+    def sigma(self):
+        return self.engine.sigma
+
+    @sigma.setter
+    def sigma(self, value):
+        self.engine.set_sigma(value)
+
+    @property
+    def cooldown(self):
+        return self.engine.cooldown
+
+    @cooldown.setter
+    def cooldown(self, value):
+        self.engine.set_cooldown(value)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def start(self):
+        """Start (or resume) the agents. Returns True when saved profiles were restored."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self.alert_channel = LoopChannel(loop, self._on_alerts)
+            self.stats_channel = LoopChannel(loop, self._on_stats)
+        self.engine.anomaly_queue = self.alert_channel
+        self.engine.stats_queue = self.stats_channel
+        return await loop.run_in_executor(None, self.engine.start)
+
+    async def stop(self):
+        """Stop the agents, save profiles and end every alerts() iterator."""
+        await asyncio.get_running_loop().run_in_executor(None, self.engine.stop)
+        # Wakeups scheduled before the threads exited have already run by now
+        for sub in self._subscribers:
+            sub.closed = True
+            sub.ready.set()
+        for fut in self._stats_waiters:
+            if not fut.done():
+                fut.cancel()
+        self._stats_waiters = []
+
+    def pause(self):
+        self.engine.pause()
+
+    def resume(self):
+        self.engine.resume()
+
+    def reset(self, profiles=True):
+        self.engine.reset(profiles)
+
+    def _on_alerts(self, items):
+        for sub in self._subscribers:
+            sub.extend(items)
+
+    def _on_stats(self, items):
+        for stats in items:
+            self._stats[str(stats.source)] = stats
+        if self._stats_waiters:
+            snapshot = self.snapshot()
+            for fut in self._stats_waiters:
+                if not fut.done():
+                    fut.set_result(snapshot)
+            self._stats_waiters = []
+
+    async def alerts(self):
+        """Async iterator over alerts published after it starts; ends when the engine stops."""
+        sub = _Subscription(self.max_pending)
+        self._subscribers.add(sub)
+        try:
+            while True:
+                while sub.items:
+                    yield sub.items.popleft()
+                if sub.closed:
+                    return
+                sub.ready.clear()
+                await sub.ready.wait()
+        finally:
+            self._subscribers.discard(sub)
+
+    def snapshot(self):
+        """Latest Stats record of every agent, keyed by source label."""
+        return dict(self._stats)
+
+    async def stats(self, fresh=False):
+        """Awaitable stats snapshot; fresh=True waits for the next stats update first."""
+        if not fresh:
+            return self.snapshot()
+        fut = asyncio.get_running_loop().create_future()
+        self._stats_waiters.append(fut)
+        return await fut
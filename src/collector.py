@@ -0,0 +1,358 @@
+"""
+Guardio fleet collector.
+
+Accepts wire frames (agents/wire.py) sent by FleetShipper from many Guardio instances, over
+TCP or a Unix socket, and keeps per-endpoint risk in memory. The listening socket is bound
+once and shared by the worker processes, each running an asyncio server on it, so the kernel
+spreads incoming connections across workers. A worker aggregates the endpoints whose
+connections it accepted in a table bounded by --max-endpoints / workers: per endpoint a
+decayed risk score, counters, the last stats record per agent and a short ring of recent
+alerts; the least recently seen endpoint is evicted when the table is full. Workers report
+counters and their riskiest endpoints to the parent every --report seconds.
+
+Usage:
+    python src/collector.py [--listen tcp://127.0.0.1:7355 | unix:///tmp/guardio.sock]
+                            [--workers N] [--max-endpoints 50000] [--half-life 300]
+                            [--report 10] [--top 20] [--snapshot fleet.json]
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import sys
+import time
+from collections import OrderedDict, deque
+
+from agents.wire import LENGTH, MAX_FRAME, decode_frame, parse_address
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Distinct agent names kept per endpoint, so a misbehaving client cannot grow its state
+MAX_SOURCES = 16
+COUNTERS = ("connections", "open", "frames", "bytes", "alerts", "stats", "errors")
+
+
+class EndpointState:
+    """Per-endpoint aggregate with fixed-size state."""
+    __slots__ = ("name", "risk", "updated", "last_seen", "alerts", "flagged", "by_severity", "stats", "recent")
+
+    def __init__(self, name, recent=20):
+        self.name = name
+        self.risk = 0.0
+        self.updated = 0.0
+        self.last_seen = 0.0
+        self.alerts = 0
+        self.flagged = 0
+        self.by_severity = [0, 0, 0]
+        self.stats = {}
+        self.recent = deque(maxlen=recent)
+
+    def current_risk(self, now, half_life):
+        return self.risk * 0.5 ** (max(0.0, now - self.updated) / half_life)
+
+    def add_alert(self, alert, now, half_life):
+        # Arrival time, not the endpoint's clock, drives the decay
+        self.risk = self.current_risk(now, half_life) + int(alert.severity)
+        self.updated = now
+        self.alerts += 1
+        self.flagged += alert.count
+        self.by_severity[min(max(int(alert.severity), 1), 3) - 1] += 1
+        self.recent.append(alert)
+
+    def add_stats(self, stats):
+        key = str(stats.source)
+        if key in self.stats or len(self.stats) < MAX_SOURCES:
+            self.stats[key] = stats
+
+    def to_dict(self, now, half_life):
+        return {
+            "endpoint": self.name,
+            "risk": round(self.current_risk(now, half_life), 3),
+            "last_seen": self.last_seen,
+            "alerts": self.alerts,
+            "flagged": self.flagged,
+            "by_severity": dict(zip(("Low", "Medium", "High"), self.by_severity)),
+            "stats": {src: s.to_dict() for src, s in self.stats.items()},
+            "recent": [a.to_dict() for a in self.recent]
+        }
+
+
+class EndpointTable:
+    """Endpoint states in least-recently-seen order, evicting the oldest beyond max_endpoints."""
+    def __init__(self, max_endpoints=50000, half_life=300.0, recent=20):
+        self.max_endpoints = max_endpoints
+        self.half_life = half_life
+        self.recent = recent
+        self.endpoints = OrderedDict()
+        self.evicted = 0
+
+    def ingest(self, endpoint, alerts, stats, now):
+        state = self.endpoints.get(endpoint)
+        if state is None:
+            state = self.endpoints[endpoint] = EndpointState(endpoint, self.recent)
+            if len(self.endpoints) > self.max_endpoints:
+                self.endpoints.popitem(last=False)
+                self.evicted += 1
+        else:
+            self.endpoints.move_to_end(endpoint)
+        state.last_seen = now
+        for alert in alerts:
+            state.add_alert(alert, now, self.half_life)
+        for s in stats:
+            state.add_stats(s)
+
+    def top(self, n, now):
+        return heapq.nlargest(n, self.endpoints.values(), key=lambda s: s.current_risk(now, self.half_life))
+
+    def summary(self, now, n=20):
+        return {
+            "endpoints": len(self.endpoints),
+            "evicted": self.evicted,
+            "top": [s.to_dict(now, self.half_life) for s in self.top(n, now)]
+        }
+
+
+def bind(address, backlog=4096):
+    """Listening socket for a collector address; a stale Unix socket file is replaced."""
+    family, addr = parse_address(address)
+    if family == "unix":
+        if os.path.exists(addr):
+            os.remove(addr)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(addr)
+        sock.listen(backlog)
+        return sock
+    return socket.create_server(addr, backlog=backlog, family=socket.AF_INET6 if ":" in addr[0] else socket.AF_INET)
+
+
+def _raise_fd_limit():
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def _worker(sock, index, reports, stop, max_endpoints, half_life, report_interval, top):
+    _raise_fd_limit()
+    try:
+        asyncio.run(_serve(sock, index, reports, stop, max_endpoints, half_life, report_interval, top))
+    except KeyboardInterrupt:
+        pass
+
+
+class _FrameProtocol(asyncio.Protocol):
+    """Splits a connection's byte stream into frames straight from data_received, without stream readers."""
+    def __init__(self, table, counters):
+        self.table = table
+        self.counters = counters
+        self.buffer = bytearray()
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.counters["connections"] += 1
+        self.counters["open"] += 1
+
+    def connection_lost(self, exc):
+        self.counters["open"] -= 1
+
+    def data_received(self, data):
+        buf = self.buffer
+        buf += data
+        counters = self.counters
+        offset, end = 0, len(buf)
+        now = time.time()
+        try:
+            while end - offset >= LENGTH.size:
+                (n,) = LENGTH.unpack_from(buf, offset)
+                if n > MAX_FRAME:
+                    raise ValueError("frame too large")
+                if end - offset - LENGTH.size < n:
+                    break
+                start = offset + LENGTH.size
+                endpoint, alerts, stats = decode_frame(bytes(buf[start:start + n]))
+                self.table.ingest(endpoint, alerts, stats, now)
+                counters["frames"] += 1
+                counters["bytes"] += n + LENGTH.size
+                counters["alerts"] += len(alerts)
+                counters["stats"] += len(stats)
+                offset = start + n
+        except ValueError:
+            counters["errors"] += 1
+            self.transport.close()
+            buf.clear()
+            return
+        if offset:
+            del buf[:offset]
+
+
+async def _serve(sock, index, reports, stop, max_endpoints, half_life, report_interval, top):
+    table = EndpointTable(max_endpoints, half_life)
+    counters = dict.fromkeys(COUNTERS, 0)
+
+    loop = asyncio.get_running_loop()
+    sock.setblocking(False)
+    if sock.family == getattr(socket, "AF_UNIX", None):
+        server = await loop.create_unix_server(lambda: _FrameProtocol(table, counters), sock=sock)
+    else:
+        server = await loop.create_server(lambda: _FrameProtocol(table, counters), sock=sock)
+
+    def report(final=False):
+        reports.put((index, dict(counters, cpu_s=time.process_time()), table.summary(time.time(), top), final))
+
+    async with server:
+        next_report = time.monotonic() + report_interval
+        while not stop.is_set():
+            await asyncio.sleep(min(0.2, report_interval))
+            if time.monotonic() >= next_report:
+                report()
+                next_report += report_interval
+        report(final=True)
+
+
+class Collector:
+    """
+    Parent side: binds the socket, starts the workers and merges their reports.
+    poll() folds in whatever reports have arrived; summary() is the merged fleet view.
+    """
+    def __init__(self, address, workers=None, max_endpoints=50000, half_life=300.0,
+                 report_interval=10.0, top=20):
+        self.address = address
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_endpoints = max_endpoints
+        self.half_life = half_life
+        self.report_interval = report_interval
+        self.top = top
+        self.reports = {}
+        self.sock = None
+        self._processes = []
+        self._queue = None
+        self._stop = None
+
+    def start(self):
+        self.sock = bind(self.address)
+        self._queue = multiprocessing.Queue()
+        self._stop = multiprocessing.Event()
+        per_worker = max(1, self.max_endpoints // self.workers)
+        for index in range(self.workers):
+            process = multiprocessing.Process(
+                target=_worker, daemon=True,
+                args=(self.sock, index, self._queue, self._stop, per_worker, self.half_life,
+                      self.report_interval, self.top))
+            process.start()
+            self._processes.append(process)
+        return self
+
+    def poll(self, timeout=None):
+        """Collect pending worker reports, waiting up to timeout for the first. Returns summary()."""
+        try:
+            item = self._queue.get(timeout=timeout) if timeout else self._queue.get_nowait()
+            while True:
+                index, counters, table, _ = item
+                self.reports[index] = (counters, table)
+                item = self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        return self.summary()
+
+    def summary(self):
+        totals = dict.fromkeys(COUNTERS + ("cpu_s", "endpoints", "evicted"), 0)
+        merged = {}
+        for counters, table in self.reports.values():
+            for key in COUNTERS + ("cpu_s",):
+                totals[key] += counters[key]
+            totals["endpoints"] += table["endpoints"]
+            totals["evicted"] += table["evicted"]
+            # An endpoint that reconnected may have been served by more than one worker
+            for entry in table["top"]:
+                seen = merged.get(entry["endpoint"])
+                if seen is None or entry["last_seen"] > seen["last_seen"]:
+                    merged[entry["endpoint"]] = entry
+        top = sorted(merged.values(), key=lambda e: e["risk"], reverse=True)[:self.top]
+        return {"workers": self.workers, "reporting": len(self.reports), "totals": totals, "top": top}
+
+    def stop(self, timeout=5.0):
+        """Stop the workers after a final report each; returns the final summary."""
+        if self._stop is None:
+            return self.summary()
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        final = set()
+        while len(final) < len(self._processes) and time.monotonic() < deadline:
+            try:
+                index, counters, table, last = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            self.reports[index] = (counters, table)
+            if last:
+                final.add(index)
+        for process in self._processes:
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        self.sock.close()
+        if self.sock.family == getattr(socket, "AF_UNIX", None):
+            path = parse_address(self.address)[1]
+            if os.path.exists(path):
+                os.remove(path)
+        self._processes = []
+        self._stop = None
+        return self.summary()
+
+
+def _print_summary(summary):
+    t = summary["totals"]
+    print(f"[{time.strftime('%H:%M:%S')}] endpoints={t['endpoints']} open={t['open']} frames={t['frames']} "
+          f"alerts={t['alerts']} stats={t['stats']} errors={t['errors']} evicted={t['evicted']}")
+    for entry in summary["top"][:10]:
+        if entry["risk"] <= 0:
+            break
+        sev = entry["by_severity"]
+        print(f"    {entry['endpoint']:<32} risk={entry['risk']:7.2f}  alerts={entry['alerts']:<6} "
+              f"high={sev['High']} medium={sev['Medium']} low={sev['Low']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate alerts and stats from many Guardio instances.")
+    parser.add_argument("--listen", default="tcp://127.0.0.1:7355",
+                        help="tcp://host:port or unix:///path (default tcp://127.0.0.1:7355)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--max-endpoints", type=int, default=50000, help="endpoints kept in memory in total")
+    parser.add_argument("--half-life", type=float, default=300.0, help="risk half-life in seconds")
+    parser.add_argument("--report", type=float, default=10.0, help="seconds between reports")
+    parser.add_argument("--top", type=int, default=20, help="riskiest endpoints kept per report")
+    parser.add_argument("--snapshot", default=None, help="rewrite this JSON file with every report")
+    args = parser.parse_args(argv)
+
+    collector = Collector(args.listen, args.workers, args.max_endpoints, args.half_life, args.report, args.top)
+    collector.start()
+    print(f"Collector listening on {args.listen} with {collector.workers} workers")
+    try:
+        while True:
+            summary = collector.poll(timeout=args.report)
+            _print_summary(summary)
+            if args.snapshot:
+                tmp = args.snapshot + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as fh:
+                    json.dump(summary, fh, indent=2)
+                os.replace(tmp, args.snapshot)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _print_summary(collector.stop())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,19 @@
 import customtkinter as ctk
+from collections import deque
 
 class GuardioDashboard(ctk.CTk):
-    def __init__(self):
+    # Used when no agent list is supplied; normally the engine passes the registry's enabled agents
+    DEFAULT_AGENTS = [
+        ("Movement", "Mouse movement pattern analysis"),
+        ("Typing", "Keystroke dynamics monitoring"),
+        ("AppUsage", "Application focus behavior"),
+        ("Fusion", "Cross-agent correlation analysis")
+    ]
+
+    def __init__(self, agents=None):
         super().__init__()
+
+        self.agents_config = list(agents) if agents is not None else list(self.DEFAULT_AGENTS)
         
         self.appearance_mode = "dark"
         ctk.set_appearance_mode(self.appearance_mode)
@@ -54,11 +65,46 @@ class GuardioDashboard(ctk.CTk):
         }
         
         self.current_colors = self.colors[self.appearance_mode]
+
+        # Paint a skeleton (header, controls, buttons) right away and build the heavier
+        # metrics and log panels incrementally once the window is on screen. Calls that
+        # arrive before the panels exist are buffered and replayed when they are ready.
+        # The same buffering suspends rendering while the window is minimized or withdrawn:
+        # only the latest status/stats/risk/speed and the newest LOG_BACKLOG log lines are
+        # kept, and restoring the window applies them in one catch-up render.
+        self._ready = False
+        self.suspended = False
+        self.skipped_renders = 0
+        self._pending_status = {}
+        self._pending_logs = deque(maxlen=self.LOG_BACKLOG)
+        self._skipped_logs = 0
+        self._pending_clear = False
+        self._pending_risk = None
+        self._pending_wpm = None
+        # Activity log size, tracked here so the memory accountant can read it off the Tk thread
+        self._log_lines = 0
+        self._log_chars = 0
+        self._trim_log = False
+        self._series_provider = None
+        self._activity = None
+        self.spark_horizon = "10m"
+        self._build_steps = [self._build_metrics_panel, self._build_agent_cards,
+                             self._build_activity_panel, self._finish_build]
         self._build_ui()
         self._apply_theme()
+        self.bind("<Unmap>", self._on_unmap, add="+")
+        self.bind("<Map>", self._on_map, add="+")
+        self.after_idle(self._build_next)
+
+    def _build_next(self):
+        """Run one incremental build step, yielding to Tk between steps so it can paint"""
+        step = self._build_steps.pop(0)
+        step()
+        if self._build_steps:
+            self.after(1, self._build_next)
 
     def _build_ui(self):
-        """Build Samsung One UI interface"""
+        """Build the Samsung One UI skeleton: header, controls and action buttons"""
         
         # Header
         self.header = ctk.CTkFrame(self, corner_radius=16, height=85)
@@ -242,10 +288,34 @@ class GuardioDashboard(ctk.CTk):
         )
         self.clear_button.pack(side="left", padx=12)
 
+        self.history_button = ctk.CTkButton(
+            button_container,
+            text="ALERT HISTORY",
+            font=self.typography["button"],
+            corner_radius=12,
+            width=150,
+            height=48
+        )
+        self.history_button.pack(side="left", padx=12)
+        self.history_window = None
+
+        self.memory_button = ctk.CTkButton(
+            button_container,
+            text="MEMORY",
+            font=self.typography["button"],
+            corner_radius=12,
+            width=110,
+            height=48
+        )
+        self.memory_button.pack(side="left", padx=12)
+        self.memory_window = None
+
         # Main content
         self.main_content = ctk.CTkFrame(self, fg_color="transparent")
         self.main_content.pack(fill="both", expand=True, padx=24, pady=(0, 24))
 
+    def _build_metrics_panel(self):
+        """Build the risk assessment panel"""
         # Left panel - metrics (INCREASED WIDTH)
         self.metrics_panel = ctk.CTkFrame(self.main_content, corner_radius=16, width=500)
         self.metrics_panel.pack(side="left", fill="y", padx=(0, 24))
@@ -307,21 +377,30 @@ class GuardioDashboard(ctk.CTk):
         )
         self.typing_metrics.pack(anchor="w")
 
+    def _build_agent_cards(self):
+        """Build one status card per detection agent"""
         # Agent status (IMPROVED SPACING)
+        agents_header = ctk.CTkFrame(self.metrics_panel, fg_color="transparent")
+        agents_header.pack(fill="x", padx=28, pady=(20, 12))
+
         ctk.CTkLabel(
-            self.metrics_panel,
+            agents_header,
             text="Detection Agents",
             font=self.typography["title"]
-        ).pack(anchor="w", padx=28, pady=(20, 12))
+        ).pack(side="left")
+
+        # Sparkline horizon
+        self.horizon_selector = ctk.CTkSegmentedButton(
+            agents_header,
+            values=list(self.SPARK_HORIZONS),
+            font=self.typography["caption"],
+            command=self._set_spark_horizon
+        )
+        self.horizon_selector.set(self.spark_horizon)
+        self.horizon_selector.pack(side="right")
 
         self.agent_status = {}
-        agents_config = [
-            ("Movement", "Mouse movement pattern analysis"),
-            ("Typing", "Keystroke dynamics monitoring"),
-            ("AppUsage", "Application focus behavior")
-        ]
-        
-        for agent_name, description in agents_config:
+        for agent_name, description in self.agents_config:
             agent_card = ctk.CTkFrame(
                 self.metrics_panel,
                 corner_radius=12,
@@ -370,12 +449,25 @@ class GuardioDashboard(ctk.CTk):
             )
             stats_label.pack(anchor="w", pady=(1, 0))
 
+            # Signal, EMA band and z-score over the selected horizon
+            sparkline = ctk.CTkCanvas(
+                card_content,
+                width=self.SPARK_SIZE[0],
+                height=self.SPARK_SIZE[1],
+                highlightthickness=0
+            )
+            sparkline.place(relx=1.0, rely=1.0, anchor="se")
+
             self.agent_status[agent_name] = {
+                "card": agent_card,
                 "status": status_badge,
                 "description": desc_label,
-                "stats": stats_label
+                "stats": stats_label,
+                "sparkline": sparkline
             }
 
+    def _build_activity_panel(self):
+        """Build the activity log panel"""
         # Right panel - log
         self.activity_panel = ctk.CTkFrame(self.main_content, corner_radius=16)
         self.activity_panel.pack(fill="both", expand=True)
@@ -408,6 +500,61 @@ class GuardioDashboard(ctk.CTk):
         self.log_display.pack(fill="both", expand=True, padx=28, pady=(16, 28))
         self.log_display.configure(state="disabled")
 
+    def _finish_build(self):
+        """Style the late panels and replay updates received while they were being built"""
+        self._ready = True
+        self._apply_theme()
+        if not self.suspended:
+            self._flush_pending()
+
+    @property
+    def _buffering(self):
+        return not self._ready or self.suspended
+
+    def _on_unmap(self, event):
+        if event.widget is self:
+            self.suspend_rendering()
+
+    def _on_map(self, event):
+        if event.widget is self:
+            self.resume_rendering()
+
+    def suspend_rendering(self):
+        """Stop touching widgets while nobody can see them; updates are buffered instead"""
+        self.suspended = True
+
+    def resume_rendering(self):
+        """Apply everything buffered while suspended in one catch-up render"""
+        if not self.suspended:
+            return
+        self.suspended = False
+        if self._ready:
+            self._flush_pending()
+            self._draw_sparklines()
+
+    def _flush_pending(self):
+        if self._pending_clear:
+            self._delete_log()
+        for agent_name, (status, stats) in self._pending_status.items():
+            if stats is not None:
+                self.update_agent_stats(agent_name, stats)
+            if status is not None:
+                self.set_agent_status(agent_name, status)
+        if self._pending_risk is not None:
+            self.update_risk_score(self._pending_risk)
+        if self._pending_wpm is not None:
+            self.update_typing_speed(self._pending_wpm)
+        lines = list(self._pending_logs)
+        if self._skipped_logs:
+            lines.insert(0, f"[System] {self._skipped_logs} older log lines skipped while the window was hidden")
+        if lines:
+            self._append_log("\n".join(lines))
+        self._pending_status = {}
+        self._pending_logs.clear()
+        self._skipped_logs = 0
+        self._pending_clear = False
+        self._pending_risk = self._pending_wpm = None
+
     def _update_sensitivity_display(self, value):
         """Update sensitivity value display"""
         self.sens_value.configure(text=f"{float(value):.1f}σ")
@@ -437,10 +584,13 @@ class GuardioDashboard(ctk.CTk):
         frames_with_borders = [
             (self.header, c["secondary"]),
             (self.control_panel, c["secondary"]),
-            (self.action_panel, c["secondary"]),
-            (self.metrics_panel, c["secondary"]),
-            (self.activity_panel, c["secondary"])
+            (self.action_panel, c["secondary"])
         ]
+        if self._ready:
+            frames_with_borders += [
+                (self.metrics_panel, c["secondary"]),
+                (self.activity_panel, c["secondary"])
+            ]
         
         for frame, bg_color in frames_with_borders:
             frame.configure(
@@ -455,10 +605,13 @@ class GuardioDashboard(ctk.CTk):
             (self.subtitle_label, c["text_secondary"]),
             (self.theme_toggle, c["text"]),
             (self.sens_value, c["text_secondary"]),
-            (self.cool_value, c["text_secondary"]),
-            (self.typing_metrics, c["text"]),
-            (self.risk_description, c["text_secondary"])
+            (self.cool_value, c["text_secondary"])
         ]
+        if self._ready:
+            text_elements += [
+                (self.typing_metrics, c["text"]),
+                (self.risk_description, c["text_secondary"])
+            ]
         
         for element, color in text_elements:
             element.configure(text_color=color)
@@ -468,11 +621,16 @@ class GuardioDashboard(ctk.CTk):
         self.stop_button.configure(fg_color=c["danger"], hover_color=c["danger"], text_color="white")
         self.reset_button.configure(fg_color=c["warning"], hover_color=c["warning"], text_color="white")
         self.clear_button.configure(fg_color=c["text_secondary"], hover_color=c["disabled"], text_color="white")
+        self.history_button.configure(fg_color=c["accent"], hover_color=c["accent"], text_color="white")
+        self.memory_button.configure(fg_color=c["text_secondary"], hover_color=c["disabled"], text_color="white")
         
         # Sliders
         self.sensitivity_scale.configure(progress_color=c["accent"], button_color=c["accent"], fg_color=c["surface"])
         self.cooldown_scale.configure(progress_color=c["warning"], button_color=c["warning"], fg_color=c["surface"])
         
+        if not self._ready:
+            return
+
         # Risk display
         self.risk_score_label.configure(text_color=c["success"])
         self.risk_level_label.configure(text_color=c["success"])
@@ -481,6 +639,12 @@ class GuardioDashboard(ctk.CTk):
         # Log display
         self.log_display.configure(fg_color=c["surface"], text_color=c["text"], border_color=c["border"])
 
+        # Sparklines sit on the card background
+        for widgets in self.agent_status.values():
+            card = widgets["card"]
+            widgets["sparkline"].configure(bg=card._apply_appearance_mode(card.cget("fg_color")))
+        self._draw_sparklines()
+
     # Public API methods
     def set_state(self, state):
         """Update system status"""
@@ -488,6 +652,7 @@ class GuardioDashboard(ctk.CTk):
         status_config = {
             "Stopped": ("STOPPED", c["text_secondary"], c["surface"]),
             "Monitoring": ("ACTIVE", "white", c["success"]),
+            "Paused": ("PAUSED", c["text_secondary"], c["surface"]),
             "Learning": ("LEARNING", "white", c["warning"])
         }
         
@@ -496,12 +661,17 @@ class GuardioDashboard(ctk.CTk):
 
     def set_agent_status(self, agent_name, status):
         """Update agent status"""
+        if self._buffering:
+            self.skipped_renders += 1
+            self._pending_status[agent_name] = (status, self._pending_status.get(agent_name, (None, None))[1])
+            return
         if agent_name not in self.agent_status:
             return
             
         c = self.current_colors
         status_config = {
             "Idle": ("IDLE", c["text_secondary"], c["surface"]),
+            "Paused": ("PAUSED", c["text_secondary"], c["surface"]),
             "Running": ("ACTIVE", "white", c["success"]),
             "Stable": ("STABLE", "white", c["success"]),
             "Adapting": ("LEARNING", "white", c["warning"]),
@@ -514,12 +684,16 @@ class GuardioDashboard(ctk.CTk):
 
     def update_agent_stats(self, agent_name, stats):
         """Update agent statistics"""
+        if self._buffering:
+            self.skipped_renders += 1
+            self._pending_status[agent_name] = (self._pending_status.get(agent_name, (None, None))[0], stats)
+            return
         if agent_name not in self.agent_status:
             return
             
         try:
-            if all(stats.get(k) is not None for k in ["mean", "std", "z"]):
-                stats_text = f"Mean: {stats['mean']:.3f}, Std: {stats['std']:.3f}, Z-Score: {stats['z']:.2f}"
+            if stats.mean is not None and stats.std is not None and stats.z is not None:
+                stats_text = f"Mean: {stats.mean:.3f}, Std: {stats.std:.3f}, Z-Score: {stats.z:.2f}"
             else:
                 stats_text = "Mean: --, Std: --, Z-Score: --"
         except:
@@ -527,11 +701,15 @@ class GuardioDashboard(ctk.CTk):
         
         self.agent_status[agent_name]["stats"].configure(text=stats_text, text_color=self.current_colors["text_secondary"])
         
-        if stats.get("note"):
-            self.set_agent_status(agent_name, stats["note"])
+        if stats.note:
+            self.set_agent_status(agent_name, stats.note)
 
     def update_risk_score(self, risk_score):
         """Update risk assessment"""
+        if self._buffering:
+            self.skipped_renders += 1
+            self._pending_risk = risk_score
+            return
         c = self.current_colors
         
         self.risk_score_label.configure(text=str(risk_score))
@@ -556,6 +734,10 @@ class GuardioDashboard(ctk.CTk):
 
     def update_typing_speed(self, wpm):
         """Update typing speed (FIXED TYPO)"""
+        if self._buffering:
+            self.skipped_renders += 1
+            self._pending_wpm = wpm
+            return
         if wpm > 0:
             if wpm >= 70:
                 status = " (Fast)"
@@ -576,15 +758,227 @@ class GuardioDashboard(ctk.CTk):
         import datetime
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         formatted_message = f"[{timestamp}] {message}"
-        
+        if self._buffering:
+            self.skipped_renders += 1
+            if len(self._pending_logs) == self._pending_logs.maxlen:
+                self._skipped_logs += 1
+            self._pending_logs.append(formatted_message)
+            return
+        self._append_log(formatted_message)
+
+    def _append_log(self, formatted_message):
         self.log_display.configure(state="normal")
         self.log_display.insert("end", formatted_message + "\n")
+        self._log_lines += formatted_message.count("\n") + 1
+        self._log_chars += len(formatted_message) + 1
+        if self._log_lines > self.LOG_MAX_LINES or self._trim_log:
+            # Drop the oldest lines: down to LOG_MAX_LINES, or to half when asked to compact
+            keep = self._log_lines // 2 if self._trim_log else self.LOG_MAX_LINES
+            drop = self._log_lines - keep
+            self.log_display.delete("1.0", f"{drop + 1}.0")
+            self._log_chars -= self._log_chars * drop // self._log_lines
+            self._log_lines = keep
+            self._trim_log = False
         self.log_display.see("end")
         self.log_display.configure(state="disabled")
 
-    def _clear_log(self):
-        """Clear activity log"""
+    def log_memory_usage(self):
+        """Approximate bytes held by the activity log (text plus Tk's per-line bookkeeping)"""
+        pending = sum(map(len, list(self._pending_logs)))
+        return self._log_chars + pending + self._log_lines * self.LOG_LINE_OVERHEAD
+
+    def request_log_trim(self):
+        """Halve the activity log on its next append; safe to call from any thread"""
+        self._trim_log = True
+
+    def _delete_log(self):
         self.log_display.configure(state="normal")
         self.log_display.delete("1.0", "end")
         self.log_display.configure(state="disabled")
+        self._log_lines = self._log_chars = 0
+
+    def _clear_log(self):
+        """Clear activity log"""
+        if self._buffering:
+            self._pending_logs.clear()
+            self._skipped_logs = 0
+            self._pending_clear = self._ready
+            self.add_log_message("[System] Activity log cleared")
+            return
+        self._delete_log()
         self.add_log_message("[System] Activity log cleared")
+
+    LOG_BACKLOG = 500
+    # Oldest lines beyond this are dropped as new ones arrive
+    LOG_MAX_LINES = 5000
+    LOG_LINE_OVERHEAD = 100
+
+    SPARK_HORIZONS = {"1m": 60, "10m": 600, "1h": 3600, "6h": 21600, "24h": 86400}
+    SPARK_SIZE = (120, 34)
+    SPARK_POINTS = 60
+    SPARK_REFRESH_MS = 1000
+    SPARK_IDLE_MAX_MS = 8000
+
+    def attach_series(self, provider):
+        """provider() returns {agent name: SignalSeries}; sparklines redraw from it once a second"""
+        start = self._series_provider is None
+        self._series_provider = provider
+        if start:
+            self.after(self.SPARK_REFRESH_MS, self._refresh_sparklines)
+
+    def attach_activity(self, activity):
+        """Back the sparkline refresh off (up to SPARK_IDLE_MAX_MS) while the ActivityMonitor reports idle"""
+        self._activity = activity
+
+    def _set_spark_horizon(self, value):
+        self.spark_horizon = value
+        self._draw_sparklines()
+
+    def _refresh_sparklines(self):
+        self._draw_sparklines()
+        delay = self.SPARK_REFRESH_MS
+        if self._activity is not None:
+            delay = int(1000 * self._activity.next_interval("Sparklines", delay / 1000, cap=self.SPARK_IDLE_MAX_MS / 1000))
+        self.after(delay, self._refresh_sparklines)
+
+    def _draw_sparklines(self):
+        if self._buffering or self._series_provider is None:
+            return
+        import time
+        try:
+            series = self._series_provider()
+        except Exception as e:
+            print(f"Error reading signal history: {e}")
+            return
+        now = time.time()
+        horizon = self.SPARK_HORIZONS[self.spark_horizon]
+        sigma = float(self.sensitivity_scale.get())
+        for agent_name, widgets in self.agent_status.items():
+            canvas = widgets["sparkline"]
+            canvas.delete("all")
+            if agent_name in series:
+                view = series[agent_name].window(horizon, now, self.SPARK_POINTS)
+                self._draw_sparkline(canvas, view, now - horizon, horizon, sigma)
+
+    def _draw_sparkline(self, canvas, view, t0, horizon, sigma):
+        """Signal line over its EMA band (mean ± sigma·std) with a z-score strip underneath"""
+        c = self.current_colors
+        width, height = self.SPARK_SIZE
+        strip = 10
+        top = height - strip - 2
+
+        def x(t):
+            return (t - t0) / horizon * (width - 1)
+
+        ts, values = view["t"], view["value"]
+        bands = [(t, m - sigma * sd, m + sigma * sd) for t, m, sd in zip(ts, view["mean"], view["std"])
+                 if m == m and sd == sd]
+        span = values + [b[1] for b in bands] + [b[2] for b in bands]
+        if span:
+            lo, hi = min(span), max(span)
+            scale = (hi - lo) or 1.0
+
+            def y(v):
+                return top - (v - lo) / scale * (top - 1)
+
+            if len(bands) > 1:
+                outline = [(x(t), y(up)) for t, _, up in bands] + [(x(t), y(low)) for t, low, _ in reversed(bands)]
+                canvas.create_polygon(*[p for xy in outline for p in xy], fill=c["border"], outline="")
+            if len(values) > 1:
+                canvas.create_line(*[p for t, v in zip(ts, values) for p in (x(t), y(v))],
+                                   fill=c["accent"], width=1.5)
+
+        zts, zs = view["zt"], view["z"]
+        if zs:
+            zmax = max(max(zs), sigma * 1.5)
+
+            def zy(z):
+                return height - 1 - min(z, zmax) / zmax * (strip - 1)
+
+            canvas.create_line(0, zy(sigma), width, zy(sigma), fill=c["disabled"], dash=(2, 2))
+            if len(zs) > 1:
+                canvas.create_line(*[p for t, z in zip(zts, zs) for p in (x(t), zy(z))],
+                                   fill=c["warning"], width=1)
+            for t, z in zip(zts, zs):
+                if z > sigma:
+                    canvas.create_oval(x(t) - 1.5, zy(z) - 1.5, x(t) + 1.5, zy(z) + 1.5,
+                                       fill=c["danger"], outline="")
+
+    HISTORY_RANGES = {"1 hour": 1, "24 hours": 24, "7 days": 168}
+
+    def open_history(self, query):
+        """Show stored alerts; query(hours) returns Alert records, newest first"""
+        if self.history_window is not None and self.history_window.winfo_exists():
+            self.history_window.focus()
+            return
+        c = self.current_colors
+        window = ctk.CTkToplevel(self)
+        window.title("Guardio - Alert History")
+        window.geometry("760x520")
+        window.configure(fg_color=c["primary"])
+        self.history_window = window
+
+        header = ctk.CTkFrame(window, fg_color="transparent")
+        header.pack(fill="x", padx=24, pady=(20, 0))
+        ctk.CTkLabel(header, text="Alert History", font=self.typography["title"],
+                     text_color=c["text"]).pack(side="left")
+        summary = ctk.CTkLabel(header, text="", font=self.typography["caption"],
+                               text_color=c["text_secondary"])
+        summary.pack(side="right", padx=(12, 0))
+
+        listing = ctk.CTkTextbox(window, corner_radius=12, font=self.typography["monospace"],
+                                 border_width=1, wrap="none", fg_color=c["surface"],
+                                 text_color=c["text"], border_color=c["border"])
+
+        def show(label):
+            import datetime
+            alerts = query(self.HISTORY_RANGES[label])
+            listing.configure(state="normal")
+            listing.delete("1.0", "end")
+            for alert in alerts:
+                when = datetime.datetime.fromtimestamp(alert.ts).strftime("%Y-%m-%d %H:%M:%S")
+                listing.insert("end", f"{when}  {alert.source:<9} {alert.severity:<6}  {alert.message}\n")
+            listing.configure(state="disabled")
+            summary.configure(text=f"{len(alerts)} alerts in the last {label}")
+
+        ranges = ctk.CTkSegmentedButton(header, values=list(self.HISTORY_RANGES), command=show,
+                                        font=self.typography["caption"])
+        ranges.pack(side="right")
+        listing.pack(fill="both", expand=True, padx=24, pady=16)
+        ranges.set("24 hours")
+        show("24 hours")
+
+    def open_memory(self, report):
+        """Show memory diagnostics; report(trace) returns the text, trace adding a tracemalloc snapshot"""
+        if self.memory_window is not None and self.memory_window.winfo_exists():
+            self.memory_window.focus()
+            return
+        c = self.current_colors
+        window = ctk.CTkToplevel(self)
+        window.title("Guardio - Memory")
+        window.geometry("760x460")
+        window.configure(fg_color=c["primary"])
+        self.memory_window = window
+
+        header = ctk.CTkFrame(window, fg_color="transparent")
+        header.pack(fill="x", padx=24, pady=(20, 0))
+        ctk.CTkLabel(header, text="Memory", font=self.typography["title"],
+                     text_color=c["text"]).pack(side="left")
+
+        listing = ctk.CTkTextbox(window, corner_radius=12, font=self.typography["monospace"],
+                                 border_width=1, wrap="none", fg_color=c["surface"],
+                                 text_color=c["text"], border_color=c["border"])
+        trace = ctk.BooleanVar(value=False)
+
+        def refresh():
+            listing.configure(state="normal")
+            listing.delete("1.0", "end")
+            listing.insert("end", report(trace.get()))
+            listing.configure(state="disabled")
+
+        ctk.CTkButton(header, text="Refresh", width=90, command=refresh,
+                      font=self.typography["caption"]).pack(side="right")
+        ctk.CTkCheckBox(header, text="Trace allocations", variable=trace, command=refresh,
+                        font=self.typography["caption"], text_color=c["text_secondary"]).pack(side="right", padx=12)
+        listing.pack(fill="both", expand=True, padx=24, pady=16)
+        refresh()
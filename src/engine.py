@@ -0,0 +1,368 @@
+import os
+import threading
+
+from agents.activity import ActivityMonitor
+from agents.memory import MemoryAccountant, queue_usage
+from agents.registry import AgentRegistry
+from agents.scheduler import Scheduler
+
+class GuardioEngine:
+    """
+    Headless detection engine.
+    Instantiates the agents enabled in the registry, runs them and owns profile persistence
+    and optional raw-event recording. Alerts and stats go to
+    the anomaly/stats queues handed in, exactly as the agents publish them.
+
+    pause()/resume() and reset() are in-place: agent threads and input listeners stay up
+    and the request is applied by each agent between batches, so none of them block the
+    caller. stop() is the full teardown for shutdown.
+
+    scheduler runs all periodic work on one thread: agent polling, stats publishing, Fusion
+    buckets, memory checks and profile checkpoints, so adding agents adds no threads.
+    Agents whose poll blocks (AppUsage forks xdotool/xprop) and plugin agents without a
+    schedule() method still get a thread running agent.run().
+
+    activity is shared by every agent: keyboard and mouse input mark the user active, and
+    after idle_after seconds without input all periodic loops back off until the next event.
+
+    memory is the memory budget ($GUARDIO_MEMORY_MB, default 64): while running, the agents,
+    queues, history writer and fleet shipper report their footprint to it and are compacted
+    when the total goes over budget. Callers may register further components (the dashboard
+    log); those outlive stop().
+    """
+    def __init__(self, anomaly_queue, stats_queue, registry=None):
+        self.anomaly_queue = anomaly_queue
+        self.stats_queue = stats_queue
+        self.registry = registry or AgentRegistry.discover().load_config()
+
+        self.sigma = 3.0
+        self.cooldown = 3.0
+
+        # Learned profiles are kept across sessions on this device only
+        self.profile_path = os.path.join(os.path.expanduser("~"), ".guardio", "profiles.npz")
+        # Optional raw-event recording (JSON lines) for offline replay; None disables it
+        self.record_path = None
+        # Alert/stats history (SQLite) for incident review; None disables it
+        self.history_path = os.path.join(os.path.expanduser("~"), ".guardio", "history.db")
+        self.history = None
+        # Fleet collector address (tcp://host:port or unix:///path) to ship alerts/stats to; None disables it
+        self.collector_address = os.environ.get("GUARDIO_COLLECTOR") or None
+        self.endpoint = None
+        self.shipper = None
+        # Local publish/subscribe stream (unix:///path or tcp://127.0.0.1:port) for external consumers; None disables it
+        self.events_address = os.environ.get("GUARDIO_EVENTS") or None
+        self.events = None
+
+        # Profiles are also saved every checkpoint_interval seconds while running; None disables it
+        self.checkpoint_interval = 300.0
+
+        self.agents = []
+        self.agent_threads = []
+        self.scheduler = None
+        self.stop_event = None
+        self.recorder = None
+        self.paused = False
+        self._save_lock = threading.Lock()
+        # Last background profile step (pause's save, reset's delete); each new one runs after it
+        self._save_thread = None
+        # Idle detection and wakeup counting for agent loops and UI ticks
+        self.activity = ActivityMonitor()
+        self.memory = MemoryAccountant(budget=int(float(os.environ.get("GUARDIO_MEMORY_MB") or 64) * 2**20))
+        self._accounted = []
+
+    @property
+    def agent_names(self):
+        return [spec.name for spec in self.registry.enabled()]
+
+    def series(self):
+        """Signal history of every running agent that keeps one, keyed by agent name."""
+        return {agent.name: agent.series for agent in self.agents if hasattr(agent, "series")}
+
+    def descriptions(self):
+        """(name, description) of every enabled agent, for the dashboard cards."""
+        return [(spec.name, spec.description) for spec in self.registry.enabled()]
+
+    @property
+    def running(self):
+        return self.stop_event is not None and not self.stop_event.is_set() and not self.paused
+
+    def _agent_kwargs(self, cfg):
+        kwargs = dict(cfg["options"])
+        kwargs["sigma"] = cfg["sigma"] if cfg["sigma"] is not None else self.sigma
+        kwargs["cooldown"] = cfg["cooldown"] if cfg["cooldown"] is not None else self.cooldown
+        if cfg["sampling_rate"]:
+            kwargs["sample_interval"] = 1.0 / cfg["sampling_rate"]
+        if cfg["batch_size"]:
+            kwargs["batch_size"] = int(cfg["batch_size"])
+        return kwargs
+
+    def open_history(self):
+        """The history store, opened on first use; None when history is disabled."""
+        if self.history is None and self.history_path:
+            from agents.history import HistoryStore
+            self.history = HistoryStore(self.history_path)
+        return self.history
+
+    def recent_alerts(self, hours=24, **filters):
+        """Alerts recorded in the last N hours, newest first."""
+        history = self.open_history()
+        return history.recent_alerts(hours, **filters) if history is not None else []
+
+    def _queues(self):
+        alerts, stats = self.anomaly_queue, self.stats_queue
+        for store in (self.history, self.shipper, self.events):
+            if store is not None:
+                from agents.history import HistoryTap
+                alerts = HistoryTap(alerts, store.add_alert)
+                stats = HistoryTap(stats, store.add_stats)
+        return alerts, stats
+
+    def build_agents(self):
+        """Instantiate the enabled agents, wired to the engine's queues, Fusion and recorder."""
+        specs = self.registry.enabled()
+        alerts, stats = self._queues()
+        sources = [spec.name for spec in specs if spec.fusion_source]
+
+        # Fusion correlates the features the other agents report through feature_sink
+        fusion = None
+        fusion_spec = next((spec for spec in specs if spec.name == "Fusion"), None)
+        if fusion_spec is not None:
+            fusion = fusion_spec.create(alerts, stats, sources=sources,
+                                        **self._agent_kwargs(self.registry.settings("Fusion")))
+
+        agents = []
+        for spec in specs:
+            if spec is fusion_spec:
+                fusion.activity = self.activity
+                agents.append(fusion)
+                continue
+            kwargs = self._agent_kwargs(self.registry.settings(spec.name))
+            if fusion is not None and spec.fusion_source:
+                kwargs["feature_sink"] = fusion.observe
+            if self.recorder is not None:
+                kwargs["recorder"] = self.recorder
+            agent = spec.create(alerts, stats, **kwargs)
+            if not hasattr(agent, "name"):
+                agent.name = spec.name
+            agent.activity = self.activity
+            agents.append(agent)
+        return agents
+
+    def start(self):
+        """
+        Create the enabled agents, restore their profiles and start their threads, or resume
+        them if they are paused. Returns True when saved profiles were restored.
+        """
+        if self.stop_event is not None and not self.stop_event.is_set():
+            self.resume()
+            return False
+
+        from agents.persistence import load_profiles
+        from agents.pipeline import Recorder
+        from agents.session_store import SUFFIX, SessionWriter
+
+        self.stop_event = threading.Event()
+        try:
+            history = self.open_history()
+            if history is not None:
+                history.begin_session()
+        except Exception as e:
+            print(f"Alert history disabled: {e}")
+            self.history = None
+        if self.collector_address:
+            try:
+                from agents.fleet import FleetShipper
+                self.shipper = FleetShipper(self.collector_address, self.endpoint)
+            except Exception as e:
+                print(f"Fleet collector disabled: {e}")
+                self.shipper = None
+        if self.events_address:
+            try:
+                from agents.pubsub import EventPublisher
+                self.events = EventPublisher(self.events_address, self.endpoint)
+            except Exception as e:
+                print(f"Event stream disabled: {e}")
+                self.events = None
+        if self.record_path:
+            # A .session path records into the columnar store instead of JSON lines
+            writer = SessionWriter if self.record_path.rstrip("/\\").endswith(SUFFIX) else Recorder
+            self.recorder = writer(self.record_path)
+        self.agents = self.build_agents()
+        try:
+            restored = load_profiles(self.profile_path, self.agents)
+        except Exception as e:
+            print(f"Could not restore profiles: {e}")
+            restored = False
+
+        self.scheduler = Scheduler(activity=self.activity)
+        for agent in self.agents:
+            if hasattr(agent, "schedule") and not getattr(agent, "blocking", False):
+                agent.schedule(self.scheduler)
+                continue
+            thread = threading.Thread(target=agent.run, args=(self.stop_event,), daemon=True)
+            thread.start()
+            self.agent_threads.append(thread)
+        self._account_components()
+        self.scheduler.every("Memory", self.memory.check_interval, self.memory.check)
+        if self.checkpoint_interval:
+            self.scheduler.every("Checkpoint", self.checkpoint_interval, self._checkpoint)
+        self.scheduler.start()
+        self.paused = False
+        return restored
+
+    def _account(self, name, usage, compact=None):
+        self.memory.register(name, usage, compact)
+        self._accounted.append(name)
+
+    def _account_components(self):
+        for agent in self.agents:
+            if hasattr(agent, "memory_usage"):
+                # Agents compact on their own loop, like reset
+                compact = getattr(agent, "compact", None)
+                if compact is not None and hasattr(agent, "request_compact"):
+                    compact = agent.request_compact
+                self._account(agent.name, agent.memory_usage, compact)
+        self._account("Alert queue", lambda: queue_usage(self.anomaly_queue))
+        self._account("Stats queue", lambda: queue_usage(self.stats_queue))
+        if self.history is not None:
+            self._account("History writer", self.history.memory_usage)
+        if self.shipper is not None:
+            self._account("Fleet shipper", self.shipper.memory_usage, self.shipper.compact)
+        if self.events is not None:
+            # Bounded per subscriber by max_buffer, so nothing to compact
+            self._account("Event stream", self.events.memory_usage)
+
+    def _checkpoint(self):
+        if not self.paused:
+            self._save_profiles(self.agents)
+
+    def scheduler_stats(self):
+        """Runs, mean/worst run time and worst lateness of every scheduled task; empty when stopped."""
+        return self.scheduler.stats() if self.scheduler is not None else {}
+
+    def memory_report(self, trace=False):
+        """Per-component memory against the budget; trace=True adds a tracemalloc snapshot."""
+        return self.memory.diagnostics(trace=trace)
+
+    def _each(self, method):
+        for agent in self.agents:
+            if hasattr(agent, method):
+                getattr(agent, method)()
+
+    def pause(self):
+        """Stop consuming input without tearing down threads or listeners; profiles are saved in the background."""
+        if not self.running:
+            return
+        self._each("pause")
+        self.paused = True
+        self._in_background(self._save_profiles, list(self.agents))
+
+    def resume(self):
+        """Resume paused agents with the current sigma/cooldown."""
+        if not self.paused:
+            return
+        self.set_sigma(self.sigma)
+        self.set_cooldown(self.cooldown)
+        self._each("resume")
+        self.paused = False
+        self.activity.wake()
+
+    def reset(self, profiles=True):
+        """
+        Forget learned behaviour in place. The running agents clear their profiles before
+        their next batch; with profiles=True the saved profile file is deleted as well.
+        """
+        self._each("request_reset")
+        if profiles:
+            self.forget_profiles()
+
+    def _in_background(self, fn, *args):
+        """Run fn off the caller's thread, after any profile step still running, in order."""
+        previous = self._save_thread
+
+        def step():
+            if previous is not None:
+                previous.join()
+            fn(*args)
+
+        self._save_thread = threading.Thread(target=step, daemon=True)
+        self._save_thread.start()
+
+    def _save_profiles(self, agents):
+        try:
+            from agents.persistence import save_profiles
+            with self._save_lock:
+                # An agent still to apply a reset must not write back the state being forgotten
+                agents = [a for a in agents if not getattr(getattr(a, "control", None), "reset_pending", False)]
+                save_profiles(self.profile_path, agents)
+        except Exception as e:
+            print(f"Error saving profiles: {e}")
+
+    def stop(self, timeout=1.5):
+        """Stop every agent thread, then persist learned profiles."""
+        if self.stop_event is None:
+            return
+        self.stop_event.set()
+        # Idle loops sleep on the activity monitor, not on stop_event
+        self.activity.wake()
+        if self.scheduler is not None:
+            self.scheduler.stop(timeout=timeout)
+            self.scheduler = None
+            for agent in self.agents:
+                if hasattr(agent, "schedule") and not getattr(agent, "blocking", False):
+                    agent.close()
+        for thread in self.agent_threads:
+            thread.join(timeout=timeout)
+        # A queued delete from reset() must not land after the final save
+        if self._save_thread is not None:
+            self._save_thread.join()
+            self._save_thread = None
+
+        self._save_profiles(self.agents)
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+        if self.shipper is not None:
+            self.shipper.close()
+            self.shipper = None
+        if self.events is not None:
+            self.events.close()
+            self.events = None
+
+        for name in self._accounted:
+            self.memory.unregister(name)
+        self._accounted = []
+        self.agent_threads = []
+        self.agents = []
+        self.stop_event = None
+        self.paused = False
+
+    def forget_profiles(self):
+        """Delete persisted profiles so the next start adapts from scratch; returns at once."""
+        # Queued behind any save still running from pause(), which would otherwise recreate the file
+        self._in_background(self._delete_profiles)
+
+    def _delete_profiles(self):
+        try:
+            with self._save_lock:
+                if os.path.exists(self.profile_path):
+                    os.remove(self.profile_path)
+        except OSError as e:
+            print(f"Error deleting profiles: {e}")
+
+    def set_sigma(self, sigma):
+        """Apply the global sensitivity to running agents without a per-agent override."""
+        self.sigma = sigma
+        for agent in self.agents:
+            if hasattr(agent, 'sigma') and self.registry.settings(agent.name)["sigma"] is None:
+                agent.sigma = sigma
+
+    def set_cooldown(self, cooldown):
+        """Apply the global cooldown to running agents without a per-agent override."""
+        self.cooldown = cooldown
+        for agent in self.agents:
+            if hasattr(agent, 'cooldown') and self.registry.settings(agent.name)["cooldown"] is None:
+                agent.cooldown = cooldown
@@ -1,30 +1,58 @@
+import argparse
 import queue
-import threading
-import customtkinter as ctk
-from agents.movement_agent import MovementAgent
-from agents.typing_agent import TypingAgent
-from agents.app_usage_agent import AppUsageAgent
 from dashboard import GuardioDashboard
+from agents.records import Severity
+from engine import GuardioEngine
 
 class GuardioApp:
-    def __init__(self):
-        self.root = GuardioDashboard()
-        
+    # Queue polling interval (ms) while the dashboard renders, and while it is hidden
+    POLL_MS = 100
+    HIDDEN_POLL_MS = 500
+    # Longest queue polling interval while the user is idle (the interval doubles up to this)
+    IDLE_POLL_MS = 1000
+
+    def __init__(self, tray=False):
         self.anomaly_queue = queue.Queue()
         self.stats_queue = queue.Queue()
+
+        # Which agents run, and how, comes from the registry config (~/.guardio/agents.json);
+        # threshold mode, baseline, sampling rate etc. are per-agent options there
+        self.engine = GuardioEngine(self.anomaly_queue, self.stats_queue)
+        self.root = GuardioDashboard(agents=self.engine.descriptions())
+
         self.risk_score = 0
-        self.agent_threads = []
-        self.agents = []
-        self.stop_event = None
+        self._polling = False
+        self._was_idle = False
 
         self.sensitivity_sigma = 3.0
         self.cooldown_seconds = 3.0
 
         self._setup_ui_connections()
+        self.root.attach_series(self.engine.series)
+        self.root.attach_activity(self.engine.activity)
+        self.engine.memory.register("Dashboard log", self.root.log_memory_usage, self.root.request_log_trim)
+        self._over_budget = 0
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
         self.root.set_state("Stopped")
-        self.root.set_agent_status("Movement", "Idle")
-        self.root.set_agent_status("Typing", "Idle")
-        self.root.set_agent_status("AppUsage", "Idle")
+        self._set_all_agent_status("Idle")
+
+        # Optional tray-only mode: no main window until it is asked for from the tray menu
+        self.tray = None
+        if tray:
+            import tray as tray_module
+            if tray_module.available():
+                self.tray = tray_module.GuardioTray(self)
+                self.root.protocol("WM_DELETE_WINDOW", self.tray.hide_window)
+            else:
+                print("Tray mode needs pystray and Pillow (pip install pystray pillow); showing the window instead")
+
+    @property
+    def agents(self):
+        return self.engine.agents
+
+    def _set_all_agent_status(self, status):
+        for name in self.engine.agent_names:
+            self.root.set_agent_status(name, status)
 
     def _setup_ui_connections(self):
         try:
@@ -39,6 +67,12 @@ class GuardioApp:
             
             if hasattr(self.root, 'clear_button'):
                 self.root.clear_button.configure(command=self._clear_log)
+
+            if hasattr(self.root, 'history_button'):
+                self.root.history_button.configure(command=self._show_history)
+
+            if hasattr(self.root, 'memory_button'):
+                self.root.memory_button.configure(command=self._show_memory)
             
             # Connect sliders if they exist
             if hasattr(self.root, 'sensitivity_scale'):
@@ -56,9 +90,7 @@ class GuardioApp:
             self.sensitivity_sigma = float(val)
             self.root.add_log_message(f"[System] Sensitivity updated to {self.sensitivity_sigma:.1f}σ")
             # Update running agents if they exist
-            for agent in self.agents:
-                if hasattr(agent, 'sigma'):
-                    agent.sigma = self.sensitivity_sigma
+            self.engine.set_sigma(self.sensitivity_sigma)
         except Exception as e:
             print(f"Error updating sensitivity: {e}")
 
@@ -68,9 +100,7 @@ class GuardioApp:
             self.cooldown_seconds = float(val)
             self.root.add_log_message(f"[System] Cooldown updated to {self.cooldown_seconds:.1f}s")
             # Update running agents if they exist
-            for agent in self.agents:
-                if hasattr(agent, 'cooldown'):
-                    agent.cooldown = self.cooldown_seconds
+            self.engine.set_cooldown(self.cooldown_seconds)
         except Exception as e:
             print(f"Error updating cooldown: {e}")
 
@@ -86,37 +116,29 @@ class GuardioApp:
                 self.root.reset_button.configure(state="disabled")
             
             self.root.set_state("Monitoring")
-            self.root.add_log_message("[System] Starting adaptive monitoring agents...")
-            
-            # Create stop event and agents
-            self.stop_event = threading.Event()
-            self.agents = [
-                MovementAgent(self.anomaly_queue, self.stats_queue, 
-                             sigma=self.sensitivity_sigma, cooldown=self.cooldown_seconds),
-                TypingAgent(self.anomaly_queue, self.stats_queue, 
-                           sigma=self.sensitivity_sigma, cooldown=self.cooldown_seconds),
-                AppUsageAgent(self.anomaly_queue, self.stats_queue, 
-                             sigma=self.sensitivity_sigma, cooldown=self.cooldown_seconds)
-            ]
-
-            # Start agent threads
-            for agent in self.agents:
-                thread = threading.Thread(target=agent.run, args=(self.stop_event,), daemon=True)
-                thread.start()
-                self.agent_threads.append(thread)
+
+            # First start creates the agents; after a stop they resume in place
+            self.engine.sigma = self.sensitivity_sigma
+            self.engine.cooldown = self.cooldown_seconds
+            if self.engine.paused:
+                self.root.add_log_message("[System] Resuming adaptive monitoring agents...")
+            else:
+                self.root.add_log_message("[System] Starting adaptive monitoring agents...")
+            if self.engine.start():
+                self.root.add_log_message("[System] Restored learned behavior profiles")
 
             # Update agent status
-            self.root.set_agent_status("Movement", "Running")
-            self.root.set_agent_status("Typing", "Running") 
-            self.root.set_agent_status("AppUsage", "Running")
+            self._set_all_agent_status("Running")
 
             # Start processing queues
-            self.process_queues()
+            if not self._polling:
+                self._polling = True
+                self.process_queues()
 
             # Enable reset after startup
             if hasattr(self.root, 'reset_button'):
                 self.root.after(2000, lambda: self.root.reset_button.configure(state="normal")
-                               if self.stop_event and not self.stop_event.is_set() else None)
+                               if self.engine.running else None)
                                
         except Exception as e:
             print(f"Error starting monitoring: {e}")
@@ -125,24 +147,13 @@ class GuardioApp:
     def stop_monitoring(self):
         """Stop all monitoring agents"""
         try:
-            if self.stop_event:
-                self.root.add_log_message("[System] Stopping all agents...")
-                self.stop_event.set()
-                
-                # Wait for threads to complete
-                for thread in self.agent_threads:
-                    thread.join(timeout=1.5)
-                
-                # Clean up
-                self.agent_threads = []
-                self.agents = []
-                self.stop_event = None
+            if self.engine.running:
+                # Agents stop consuming input but keep their threads, listeners and learned state
+                self.engine.pause()
 
                 # Update UI state
-                self.root.set_state("Stopped")
-                self.root.set_agent_status("Movement", "Idle")
-                self.root.set_agent_status("Typing", "Idle")
-                self.root.set_agent_status("AppUsage", "Idle")
+                self.root.set_state("Paused")
+                self._set_all_agent_status("Paused")
 
                 if hasattr(self.root, 'start_button'):
                     self.root.start_button.configure(state="normal")
@@ -155,28 +166,38 @@ class GuardioApp:
                 if hasattr(self.root, 'update_typing_speed'):
                     self.root.update_typing_speed(0)
                 
-                self.root.add_log_message("[System] All agents stopped.")
+                self.root.add_log_message("[System] All agents paused.")
         except Exception as e:
             print(f"Error stopping monitoring: {e}")
 
     def reset_monitoring(self):
-        """Reset system - stop, clear data, restart"""
+        """Reset system - clear learned profiles, risk score and log while agents keep running"""
         try:
-            if hasattr(self.root, 'reset_button'):
-                self.root.reset_button.configure(state="disabled")
-            self.stop_monitoring()
-            
+            # Agents forget their profiles before their next batch; listeners stay attached
+            self.engine.reset(profiles=True)
+
             # Reset risk score and clear log
             self.risk_score = 0
             self.root.update_risk_score(self.risk_score)
             self._clear_log()
-            
-            # Restart monitoring
-            self.root.add_log_message("[System] Resetting system...")
-            self.root.after(500, self.start_monitoring)
+            self.root.add_log_message("[System] Learned profiles cleared, re-learning behavior...")
         except Exception as e:
             print(f"Error resetting: {e}")
 
+    def _show_history(self):
+        """Open the stored alert history (survives log clears and restarts)"""
+        try:
+            self.root.open_history(self.engine.recent_alerts)
+        except Exception as e:
+            print(f"Error opening history: {e}")
+
+    def _show_memory(self):
+        """Open per-component memory diagnostics (tracemalloc snapshot on demand)"""
+        try:
+            self.root.open_memory(self.engine.memory_report)
+        except Exception as e:
+            print(f"Error opening memory view: {e}")
+
     def _clear_log(self):
         """Clear the log area"""
         try:
@@ -190,22 +211,18 @@ class GuardioApp:
             # Process anomaly events
             while True:
                 try:
-                    event = self.anomaly_queue.get_nowait()
-                    source = event.get("source", "Unknown")
-                    severity = event.get("severity", "Low")
-                    message = event.get("message", "")
-
-                    # Update risk score based on severity
-                    if severity == "High":
-                        self.risk_score += 3
-                    elif severity == "Medium":
-                        self.risk_score += 2
-                    else:
-                        self.risk_score += 1
+                    alert = self.anomaly_queue.get_nowait()
+
+                    # Update risk score based on severity (Low=1, Medium=2, High=3)
+                    self.risk_score += int(alert.severity)
 
                     # Update UI
                     self.root.update_risk_score(self.risk_score)
-                    self.root.add_log_message(f"[ALERT] {source} Anomaly ({severity}): {message}")
+                    self.root.add_log_message(f"[ALERT] {alert.source} Anomaly ({alert.severity}): {alert.message}")
+                    if self.tray is not None:
+                        self.tray.set_risk(self.risk_score)
+                        if alert.severity >= Severity.HIGH:
+                            self.tray.notify(alert)
 
                     # Check for critical risk level
                     if self.risk_score > 15:
@@ -220,14 +237,15 @@ class GuardioApp:
             while True:
                 try:
                     stats = self.stats_queue.get_nowait()
-                    source = stats.get("source", "")
-                    if source:
+                    source = str(stats.source)
+                    # Stats still in flight when monitoring was paused would overwrite the paused status
+                    if source and self.engine.running:
                         self.root.update_agent_stats(source, stats)
                         
                         # Update typing speed if available (FIXED TYPO)
-                        if source == "Typing" and "wpm" in stats:
+                        if stats.wpm is not None:
                             if hasattr(self.root, 'update_typing_speed'):
-                                self.root.update_typing_speed(stats["wpm"])
+                                self.root.update_typing_speed(stats.wpm)
                                 
                 except queue.Empty:
                     break
@@ -235,15 +253,62 @@ class GuardioApp:
         except Exception as e:
             print(f"Error processing queues: {e}")
 
-        # Continue polling if monitoring is active
-        if not self.stop_event or not self.stop_event.is_set():
-            self.root.after(100, self.process_queues)
+        self._check_activity()
+        self._check_memory()
+
+        # Continue polling if monitoring is active; hidden windows only need the queues kept short,
+        # and while the user is idle the interval backs off like the agent loops
+        if self.engine.running:
+            base = self.HIDDEN_POLL_MS if self.root.suspended else self.POLL_MS
+            delay = self.engine.activity.next_interval("UI", base / 1000, cap=self.IDLE_POLL_MS / 1000)
+            self.root.after(int(delay * 1000), self.process_queues)
+        else:
+            self._polling = False
+
+    def _check_activity(self):
+        """Log power-saving transitions, with the wakeup rates that show what idling saved"""
+        activity = self.engine.activity
+        if activity.idle == self._was_idle:
+            return
+        self._was_idle = activity.idle
+        if activity.idle:
+            self.root.add_log_message(f"[System] No input for {activity.idle_after:.0f}s - power saving, polling backed off")
+        else:
+            rates = ", ".join(f"{name} {rate:.0f}" for name, rate in sorted(activity.wakeup_rates().items()))
+            self.root.add_log_message(f"[System] Input resumed - full rate (wakeups/min over the last minute: {rates})")
+
+    def _check_memory(self):
+        """Log each over-budget check with what was compacted"""
+        memory = self.engine.memory
+        if memory.over_budget == self._over_budget:
+            return
+        self._over_budget = memory.over_budget
+        if memory.events:
+            _, total, compacted = memory.events[-1]
+            self.root.add_log_message(f"[System] Memory over budget ({total / 2**20:.1f} of {memory.budget / 2**20:.0f} MB); "
+                                      f"compacted: {', '.join(compacted) or 'nothing compactable'}")
+
+    def _on_close(self):
+        """Shut the agents down and save profiles before the window goes away"""
+        try:
+            self.engine.stop()
+        except Exception as e:
+            print(f"Error shutting down: {e}")
+        self.root.destroy()
 
     def run(self):
         """Run the application"""
+        if self.tray is not None:
+            self.tray.start()
+            # Nobody sees the window in tray mode, so monitoring starts right away
+            self.root.after_idle(self.start_monitoring)
         self.root.mainloop()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Guardio adaptive anomaly detection")
+    parser.add_argument("--tray", action="store_true", help="run from the system tray without a main window")
+    args = parser.parse_args()
+
     # Create and run the application
-    app = GuardioApp()
+    app = GuardioApp(tray=args.tray)
     app.run()
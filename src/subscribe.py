@@ -0,0 +1,48 @@
+"""
+Print a running Guardio's alert/stats stream as JSON lines, e.g. for a SIEM forwarder.
+
+Guardio publishes the stream when started with GUARDIO_EVENTS set (see agents/pubsub.py).
+
+Usage:
+    python src/subscribe.py [--socket unix://~/.guardio/events.sock] [--alerts-only | --stats-only]
+                            [--source Typing --source Movement] [--min-severity Medium]
+"""
+import argparse
+import json
+import os
+import sys
+
+from agents.pubsub import ALERTS, STATS, EventSubscriber
+from agents.records import Severity
+
+DEFAULT_SOCKET = "unix://" + os.path.join(os.path.expanduser("~"), ".guardio", "events.sock")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print Guardio's alert/stats stream as JSON lines.")
+    parser.add_argument("--socket", default=os.environ.get("GUARDIO_EVENTS") or DEFAULT_SOCKET,
+                        help="publisher address (default $GUARDIO_EVENTS or ~/.guardio/events.sock)")
+    kinds = parser.add_mutually_exclusive_group()
+    kinds.add_argument("--alerts-only", action="store_true")
+    kinds.add_argument("--stats-only", action="store_true")
+    parser.add_argument("--source", action="append", default=[], help="only this agent (repeatable)")
+    parser.add_argument("--min-severity", default="Low", choices=[s.label for s in Severity])
+    args = parser.parse_args(argv)
+
+    mask = ALERTS if args.alerts_only else STATS if args.stats_only else ALERTS | STATS
+    try:
+        with EventSubscriber(args.socket, mask, args.source, args.min_severity) as stream:
+            for alerts, stats in stream:
+                lines = [json.dumps(dict(kind="alert", **a.to_dict())) for a in alerts]
+                lines += [json.dumps(dict(kind="stats", **s.to_dict())) for s in stats]
+                print("\n".join(lines), flush=True)
+    except OSError as e:
+        print(f"Cannot subscribe at {args.socket}: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Optional system tray front end: python src/main.py --tray
+
+Guardio runs with no main window. The dashboard stays withdrawn, so its rendering is
+suspended, and a tray icon coloured by the current risk level offers Show/Hide dashboard,
+Start/Pause monitoring and Quit; high-severity alerts raise a desktop notification while
+the window is hidden. Needs pystray and Pillow. pystray runs its own loop on a separate
+thread, so menu actions are queued and carried out on the Tk thread.
+"""
+import queue
+import threading
+
+# Lowest risk score for each icon colour, checked in order
+RISK_COLORS = ((8, "#DA3633"), (1, "#D29922"), (0, "#238636"))
+
+
+def available():
+    try:
+        import pystray  # noqa: F401
+        from PIL import Image  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _icon_image(color):
+    from PIL import Image, ImageDraw
+    image = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((4, 4, 60, 60), fill=color)
+    draw.ellipse((22, 22, 42, 42), fill="#F0F6FC")
+    return image
+
+
+class GuardioTray:
+    def __init__(self, app):
+        import pystray
+
+        self.app = app
+        self.root = app.root
+        self._commands = queue.SimpleQueue()
+        self._color = RISK_COLORS[-1][1]
+        self._window_visible = False
+        self._closing = False
+        menu = pystray.Menu(
+            pystray.MenuItem(lambda item: "Hide dashboard" if self._window_visible else "Show dashboard",
+                             self._command(self.toggle_window), default=True),
+            pystray.MenuItem(lambda item: "Pause monitoring" if app.engine.running else "Start monitoring",
+                             self._command(self.toggle_monitoring)),
+            pystray.MenuItem("Quit", self._command(self.quit))
+        )
+        self.icon = pystray.Icon("guardio", _icon_image(self._color), "Guardio", menu)
+
+    def _command(self, action):
+        return lambda icon, item: self._commands.put(action)
+
+    def start(self):
+        """Hide the main window, show the icon and start relaying menu actions to Tk."""
+        self.root.withdraw()
+        # Never mapped yet, so no <Unmap> will suspend it: do it here
+        self.root.suspend_rendering()
+        threading.Thread(target=self.icon.run, daemon=True).start()
+        self._poll()
+
+    def _poll(self):
+        while True:
+            try:
+                action = self._commands.get_nowait()
+            except queue.Empty:
+                break
+            action()
+            if self._closing:
+                return
+        self.root.after(200, self._poll)
+
+    def set_risk(self, risk_score):
+        color = next(c for floor, c in RISK_COLORS if risk_score >= floor)
+        if color != self._color:
+            self._color = color
+            self.icon.icon = _icon_image(color)
+        self.icon.title = f"Guardio — risk {risk_score}"
+
+    def notify(self, alert):
+        if not self._window_visible and getattr(self.icon, "HAS_NOTIFICATION", False):
+            self.icon.notify(alert.message, f"Guardio: {alert.source} anomaly ({alert.severity})")
+
+    def toggle_window(self):
+        if self._window_visible:
+            self.hide_window()
+        else:
+            self.root.deiconify()
+            self.root.lift()
+            self.root.resume_rendering()
+            self._window_visible = True
+
+    def hide_window(self):
+        self.root.withdraw()
+        self.root.suspend_rendering()
+        self._window_visible = False
+
+    def toggle_monitoring(self):
+        if self.app.engine.running:
+            self.app.stop_monitoring()
+        else:
+            self.app.start_monitoring()
+        self.icon.update_menu()
+
+    def quit(self):
+        # _on_close destroys root; _poll must not reschedule itself on it afterwards
+        self._closing = True
+        self.icon.stop()
+        self.app._on_close()
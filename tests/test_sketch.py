@@ -0,0 +1,27 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from agents.sketch import P2Quantile
+
+
+@pytest.mark.parametrize("p", [0.01, 0.5, 0.99, 0.999])
+def test_fast_decay_keeps_markers_apart(p):
+    # decay=0.01 used to close the marker gaps and raise ZeroDivisionError within ~30k updates
+    rng = random.Random(0)
+    sketch = P2Quantile(p, decay=0.01)
+    for _ in range(50000):
+        sketch.update(rng.lognormvariate(0.0, 1.0))
+    assert sketch.value() > 0.0
+    assert all(a <= b for a, b in zip(sketch.q, sketch.q[1:]))
+
+
+def test_decay_is_capped_by_tail_mass():
+    assert P2Quantile(0.99, decay=0.01).decay == pytest.approx(0.0025)
+    assert P2Quantile(0.99, decay=0.001).decay == 0.001
+    with pytest.raises(ValueError):
+        P2Quantile(0.99, decay=-0.1)